@@ -0,0 +1,163 @@
+"""
+Import-time cost of every page of both dashboards (`python -X importtime`).
+
+Streamlit is already loaded in a running server, so every measurement starts
+from a fresh interpreter that has imported streamlit and only counts what the
+page adds on top of it. Two numbers per page:
+
+- import_s:      the page's module-level import statements (paid before the
+                 page can show anything)
+- run_import_s:  all imports during a full headless run of the page, including
+                 the ones deferred to the code that needs them
+
+Each comes with the heaviest top-level packages (cumulative time):
+
+    python benchmarks/import_times.py
+    python benchmarks/import_times.py --app walmart --pages Home 9_Business --no-run
+    python benchmarks/run_pages.py compare benchmarks/results/imports_OLD.json benchmarks/results/imports_NEW.json
+"""
+import argparse
+import ast
+import glob
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import textwrap
+from datetime import datetime, timezone
+
+from run_pages import CHURN_DIR, RESULTS_DIR, WALMART_DIR, _git_commit, make_churn_data
+
+MARKER = "--- page imports ---"
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def module_level_imports(script):
+    """Source of the import statements executed when the script starts (module body, try/if blocks)."""
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script)
+    statements = []
+
+    def walk(body):
+        for node in body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                statements.append(ast.unparse(node))
+            elif isinstance(node, ast.Try):
+                for block in (node.body, *(h.body for h in node.handlers), node.orelse, node.finalbody):
+                    walk(block)
+            elif isinstance(node, ast.If):
+                walk(node.body)
+                walk(node.orelse)
+
+    walk(tree.body)
+    return statements
+
+
+def parse_importtime(stderr):
+    """Total seconds and {package: seconds} of the top-level imports after MARKER."""
+    _, _, stderr = stderr.partition(MARKER)
+    packages = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match and not match.group(3):
+            name = match.group(4).split(".")[0]
+            packages[name] = packages.get(name, 0.0) + int(match.group(2)) / 1e6
+    return sum(packages.values()), packages
+
+
+def _measure(code, app_dir, env, timeout):
+    """Run `code` after importing streamlit in a fresh `python -X importtime` process."""
+    prelude = f"import streamlit, streamlit.testing.v1, sys\nsys.stderr.write({MARKER!r} + '\\n')\n"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", prelude + code], cwd=app_dir,
+                          env={**os.environ, **env}, capture_output=True, text=True, timeout=timeout)
+    total, packages = parse_importtime(proc.stderr)
+    error = None
+    if proc.returncode:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+    return total, packages, error
+
+
+def measure_page(script, app_dir, env, run_page, timeout, top):
+    record = {"page": os.path.relpath(script, app_dir)}
+    # Missing optional packages must not stop the measurement, as in the pages themselves
+    guarded = "\n".join(f"try:\n    {stmt}\nexcept ImportError:\n    pass" for stmt in module_level_imports(script))
+    total, packages, error = _measure(f"sys.path.insert(0, {app_dir!r})\n" + guarded, app_dir, env, timeout)
+    record.update(import_s=round(total, 4), top_imports=_top(packages, top), errors=[error] if error else [])
+    if run_page:
+        code = textwrap.dedent(f"""
+            sys.path.insert(0, {app_dir!r})
+            at = streamlit.testing.v1.AppTest.from_file({script!r}, default_timeout={timeout}).run()
+            if at.exception:
+                raise SystemExit(at.exception[0].message.splitlines()[0])
+        """)
+        total, packages, error = _measure(code, app_dir, env, timeout + 60)
+        record.update(run_import_s=round(total, 4), top_run_imports=_top(packages, top))
+        if error:
+            record["errors"].append(error)
+    return record
+
+
+def _top(packages, n):
+    return {name: round(sec, 4) for name, sec in sorted(packages.items(), key=lambda kv: -kv[1])[:n]}
+
+
+def run(args):
+    jobs = []
+    if args.app in ("all", "walmart"):
+        scripts = [os.path.join(WALMART_DIR, "Home.py")] + sorted(glob.glob(os.path.join(WALMART_DIR, "pages", "*.py")))
+        jobs += [("walmart", WALMART_DIR, s, {"WALMART_TRACE": "0"}) for s in scripts]
+    with tempfile.TemporaryDirectory(prefix="bench_data_") as tmp:
+        if args.app in ("all", "churn"):
+            env = {"CHURN_TRACE": "0"}
+            if not args.no_run:
+                env["CHURN_DATA_PATH"] = make_churn_data(1, tmp)
+            jobs.append(("churn", CHURN_DIR, os.path.join(CHURN_DIR, "story_app.py"), env))
+        if args.pages:
+            jobs = [j for j in jobs if any(p in os.path.basename(j[2]) for p in args.pages)]
+
+        records = []
+        for app, app_dir, script, env in jobs:
+            print(f"  {app}: {os.path.relpath(script, app_dir)}", flush=True)
+            record = measure_page(script, app_dir, env, not args.no_run, args.timeout, args.top)
+            records.append({"app": app, "scale": 1, **record})
+
+    print(f"\n{'page':<45} {'import_s':>9} {'run_import_s':>13}  heaviest module-level imports")
+    for r in records:
+        heavy = ", ".join(f"{k} {v:.2f}" for k, v in list(r["top_imports"].items())[:4])
+        run_s = f"{r['run_import_s']:>13.3f}" if "run_import_s" in r else f"{'-':>13}"
+        print(f"{r['app'] + ': ' + r['page']:<45} {r['import_s']:>9.3f} {run_s}  {heavy}")
+        for error in r["errors"]:
+            print(f"{'':<45} error: {error}")
+
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "benchmark": "imports",
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = args.output or os.path.join(
+        RESULTS_DIR, f"imports_{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}_{meta['commit'] or 'nogit'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": records}, f, indent=2)
+    print(f"Wrote {len(records)} records to {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", choices=["all", "walmart", "churn"], default="all")
+    parser.add_argument("--pages", nargs="*", help="Only scripts whose file name contains one of these")
+    parser.add_argument("--no-run", action="store_true", help="Only measure module-level imports")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages kept per page (default 8)")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-page timeout in seconds")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/imports_<time>_<commit>.json)")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+"""
+Headless page-rendering benchmarks for both dashboards.
+
+Every page of the Walmart dashboard (Home.py and pages/*.py) and every BQ step
+of the churn story app is run through streamlit.testing.v1.AppTest at several
+data scales. For each script we record:
+
+- cold_run_s:      first run with empty Streamlit caches
+- rerun_s:         median wall time of repeated reruns (warm caches)
+- interactions:    wall time of one rerun per widget interaction
+- peak_mem_mb:     peak Python heap (tracemalloc, includes NumPy buffers) during the script
+- cache:           st.cache_data / st.cache_resource hits and misses per cached function
+
+Results are written as JSON to benchmarks/results/ so runs can be compared
+between commits:
+
+    python benchmarks/run_pages.py --scales 1 4 16
+    python benchmarks/run_pages.py --app walmart --pages 2_Sales_Trend 4_Store_Comparison
+    python benchmarks/run_pages.py compare benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+import argparse
+import glob
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WALMART_DIR = os.path.join(ROOT, "walmart-sale-dashboard-phamvugiaminh")
+CHURN_DIR = os.path.join(ROOT, "customer-churn-analysis-vuthevinh")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+# ------------------------------------------------------------------
+# Cache hit/miss counting
+# ------------------------------------------------------------------
+class CacheCounter:
+    """
+    Hits and misses per cached function, read from the app's own perf module
+    (perf.cache_data / perf.cache_resource count them) relative to reset().
+    """
+
+    def __init__(self, module):
+        self.module = module
+        self.start = {}
+
+    def _counts(self):
+        perf = sys.modules.get(self.module)
+        return perf.cache_counts() if perf is not None else None
+
+    def reset(self):
+        self.start = self._counts() or {}
+
+    def snapshot(self):
+        counts = self._counts()
+        if counts is None:
+            return None
+        delta = {}
+        for name, (hits, misses) in sorted(counts.items()):
+            h0, m0 = self.start.get(name, (0, 0))
+            if hits - h0 or misses - m0:
+                delta[name] = {"hits": hits - h0, "misses": misses - m0}
+        hits = sum(d["hits"] for d in delta.values())
+        misses = sum(d["misses"] for d in delta.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+            "functions": delta,
+        }
+
+
+WALMART_CACHE = CacheCounter("perf")
+CHURN_CACHE = CacheCounter("bq_modules.perf")
+
+
+def clear_streamlit_caches():
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+
+@contextmanager
+def app_environment(app_dir, env):
+    """Run scripts as if launched from `app_dir`, with extra environment variables."""
+    old_cwd, old_path = os.getcwd(), list(sys.path)
+    old_env = {k: os.environ.get(k) for k in env}
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        os.chdir(old_cwd)
+        sys.path[:] = old_path
+        for k, v in old_env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+# ------------------------------------------------------------------
+# Synthetic data at several scales
+# ------------------------------------------------------------------
+def make_walmart_data(scale, out_dir, depts=1):
+    """
+    Walmart data with `scale` times the stores of the bundled file over the same
+    143 weeks. Scale 1 without departments is the bundled file itself; anything
+    else comes from generate_data.py. Returns the data path.
+    """
+    bundled = os.path.join(WALMART_DIR, "data", "Walmart_Sales_processed_with_climate.csv")
+    if scale == 1 and depts == 1:
+        return bundled
+    ext = "parquet" if _has_pyarrow() else "csv"
+    path = os.path.join(out_dir, f"walmart_x{scale}_d{depts}.{ext}")
+    _load_generator(WALMART_DIR).write(path, n_stores=45 * scale, n_depts=depts, n_weeks=143, seed=scale)
+    return path
+
+
+def _load_generator(app_dir):
+    """Import an app's generate_data.py (both apps use the same module name)."""
+    name = f"{os.path.basename(app_dir).replace('-', '_')}_generate_data"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(app_dir, "generate_data.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[name] = module
+    return sys.modules[name]
+
+
+def _has_pyarrow():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def make_churn_data(scale, out_dir):
+    """
+    Churn data with `scale` times the rows of data/churn.csv (resampled with
+    replacement). Without a bundled file, 250k x scale customers come from
+    generate_data.py. Returns the data path.
+    """
+    source = os.path.join(CHURN_DIR, "data", "churn.csv")
+    ext = "parquet" if _has_pyarrow() else "csv"
+    path = os.path.join(out_dir, f"churn_x{scale}.{ext}")
+    if os.path.exists(source):
+        if scale == 1:
+            return source
+        base = pd.read_csv(source)
+        data = base.sample(len(base) * scale, replace=True, random_state=scale)
+        data.to_parquet(path, index=False) if ext == "parquet" else data.to_csv(path, index=False)
+        return path
+    _load_generator(CHURN_DIR).write(path, n_rows=250_000 * scale, seed=scale)
+    return path
+
+
+# ------------------------------------------------------------------
+# Widget interactions
+# ------------------------------------------------------------------
+def _interact(widget):
+    """Apply one representative change to a widget. Returns False if nothing to do."""
+    kind = type(widget).__name__
+    if kind == "Button":
+        widget.click()
+    elif kind == "Checkbox":
+        widget.check() if not widget.value else widget.uncheck()
+    elif kind in ("Selectbox", "Radio"):
+        if len(widget.options) < 2:
+            return False
+        nxt = ((widget.index or 0) + 1) % len(widget.options)
+        if kind == "Selectbox":
+            widget.select_index(nxt)
+        else:
+            widget.set_value(widget.options[nxt])
+    elif kind == "Multiselect":
+        if widget.value:
+            widget.set_value([])
+        elif widget.options:
+            widget.select(widget.options[0])
+        else:
+            return False
+    elif kind == "Slider":
+        value = widget.value
+        if isinstance(value, tuple):
+            if value[0] == value[1]:
+                return False
+            widget.set_range(value[0], value[0])
+        else:
+            widget.set_value(type(value)(widget.max if value != widget.max else widget.min))
+    else:
+        return False
+    return True
+
+
+def _widget_label(widget):
+    return f"{type(widget).__name__}:{getattr(widget, 'key', None) or getattr(widget, 'label', '')}"
+
+
+def _interactive_widgets(at):
+    widgets = []
+    for attr in ("slider", "selectbox", "multiselect", "radio", "checkbox", "button"):
+        widgets.extend(getattr(at, attr))
+    return widgets
+
+
+# ------------------------------------------------------------------
+# Benchmark runners
+# ------------------------------------------------------------------
+def _timed_run(at, timeout):
+    start = time.perf_counter()
+    at.run(timeout=timeout)
+    return time.perf_counter() - start
+
+
+def _errors(at):
+    return [e.message for e in at.exception]
+
+
+def bench_script(script, cache, reruns, timeout, interact=True):
+    """Benchmark one script; returns a result dict."""
+    from streamlit.testing.v1 import AppTest
+
+    clear_streamlit_caches()
+    cache.reset()
+    tracemalloc.start()
+    at = AppTest.from_file(script, default_timeout=timeout)
+    result = {"cold_run_s": round(_timed_run(at, timeout), 4)}
+    result["errors"] = _errors(at)
+    result["rerun_s"] = round(statistics.median(_timed_run(at, timeout) for _ in range(reruns)), 4)
+
+    interactions = []
+    if interact and not result["errors"]:
+        for i, widget in enumerate(_interactive_widgets(at)):
+            label = _widget_label(widget)
+            fresh = _interactive_widgets(at)
+            if i >= len(fresh):
+                break
+            try:
+                if not _interact(fresh[i]):
+                    continue
+            except Exception as exc:  # widget types differ slightly between Streamlit versions
+                interactions.append({"widget": label, "error": repr(exc)})
+                continue
+            interactions.append({"widget": label, "wall_s": round(_timed_run(at, timeout), 4),
+                                 "errors": _errors(at)})
+    result["interactions"] = interactions
+    result["peak_mem_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    tracemalloc.stop()
+    result["cache"] = cache.snapshot()
+    return result
+
+
+def bench_walmart(scale, data_path, pages, reruns, timeout):
+    scripts = [os.path.join(WALMART_DIR, "Home.py")] + sorted(glob.glob(os.path.join(WALMART_DIR, "pages", "*.py")))
+    if pages:
+        scripts = [s for s in scripts if any(p in os.path.basename(s) for p in pages)]
+    records = []
+    with app_environment(WALMART_DIR, {"WALMART_DATA_PATH": data_path, "WALMART_TRACE": "0"}):
+        for script in scripts:
+            name = os.path.relpath(script, WALMART_DIR)
+            print(f"  walmart x{scale}: {name}", flush=True)
+            records.append({"app": "walmart", "scale": scale, "page": name,
+                            **bench_script(script, WALMART_CACHE, reruns, timeout)})
+    return records
+
+
+def bench_churn(scale, data_path, reruns, timeout):
+    """
+    Walk each BQ story from its first step to the conclusion the way a reader
+    does, clicking the 'next' button (key btn_bq<bq>_<step>) at the end of each
+    step. enter_s is the run that first renders a step (cold for step 1).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    script = os.path.join(CHURN_DIR, "story_app.py")
+    records = []
+    with app_environment(CHURN_DIR, {"CHURN_DATA_PATH": data_path, "CHURN_TRACE": "0"}):
+        for bq in (1, 2):
+            print(f"  churn x{scale}: story_app.py BQ{bq}", flush=True)
+            clear_streamlit_caches()
+            tracemalloc.start()
+            at = AppTest.from_file(script, default_timeout=timeout)
+            at.session_state["current_bq"] = bq
+            step, enter_s = 1, None
+            CHURN_CACHE.reset()
+            while True:
+                if enter_s is None:
+                    enter_s = _timed_run(at, timeout)
+                errors = _errors(at)
+                wall = [_timed_run(at, timeout) for _ in range(reruns)] if not errors else []
+                records.append({
+                    "app": "churn", "scale": scale, "page": f"story_app.py#bq{bq}_step{step}",
+                    ("cold_run_s" if step == 1 else "enter_s"): round(enter_s, 4),
+                    "rerun_s": round(statistics.median(wall), 4) if wall else None,
+                    "errors": errors,
+                    "peak_mem_mb": round(tracemalloc.get_traced_memory()[1] / 2**20, 2),
+                    "cache": CHURN_CACHE.snapshot(),
+                })
+                tracemalloc.reset_peak()
+                n_steps = len(at.sidebar.radio[0].options) if len(at.sidebar.radio) else step
+                buttons = [btn for btn in at.button if btn.key == f"btn_bq{bq}_{step}"]
+                if errors or step >= n_steps or not buttons:
+                    break
+                CHURN_CACHE.reset()
+                buttons[0].click()
+                enter_s = _timed_run(at, timeout)
+                step += 1
+            tracemalloc.stop()
+    return records
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    import streamlit
+
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "streamlit": streamlit.__version__,
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "scales": args.scales,
+    }
+    records = []
+    with tempfile.TemporaryDirectory(prefix="bench_data_") as tmp:
+        for scale in args.scales:
+            if args.app in ("all", "walmart"):
+                path = make_walmart_data(scale, tmp, args.depts)
+                records += bench_walmart(scale, path, args.pages, args.reruns, args.timeout)
+            if args.app in ("all", "churn"):
+                path = make_churn_data(scale, tmp)
+                records += bench_churn(scale, path, args.reruns, args.timeout)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}_{meta['commit'] or 'nogit'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"meta": meta, "results": records}, f, indent=2, default=str)
+    print(f"Wrote {len(records)} records to {out}")
+
+
+def compare(args):
+    """Print per-page rerun/cold-run ratios between two result files."""
+    def load(path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return {(r["app"], r["scale"], r["page"]): r for r in data["results"]}
+
+    old, new = load(args.old), load(args.new)
+    print(f"{'page':<55} {'metric':<11} {'old':>9} {'new':>9} {'ratio':>7}")
+    regressions = 0
+    for key in sorted(set(old) & set(new), key=str):
+        for metric in ("cold_run_s", "rerun_s", "peak_mem_mb", "import_s", "run_import_s"):
+            a, b = old[key].get(metric), new[key].get(metric)
+            if not a or b is None:
+                continue
+            ratio = b / a
+            flag = " !" if ratio > 1 + args.threshold else ""
+            regressions += bool(flag)
+            print(f"{key[0]} x{key[1]} {key[2]:<40} {metric:<11} {a:>9.3f} {b:>9.3f} {ratio:>6.2f}x{flag}")
+    print(f"{regressions} metric(s) regressed by more than {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command")
+    cmp_parser = sub.add_parser("compare", help="Compare two result files")
+    cmp_parser.add_argument("old")
+    cmp_parser.add_argument("new")
+    cmp_parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown to flag (default 0.2)")
+
+    parser.add_argument("--app", choices=["all", "walmart", "churn"], default="all")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 4, 16],
+                        help="Data scale factors (multiples of the bundled data)")
+    parser.add_argument("--depts", type=int, default=1,
+                        help="Departments per store in generated Walmart data (rows = stores x weeks x depts)")
+    parser.add_argument("--pages", nargs="*", help="Only Walmart scripts whose file name contains one of these")
+    parser.add_argument("--reruns", type=int, default=3, help="Warm reruns per script (median is reported)")
+    parser.add_argument("--timeout", type=float, default=600, help="Per-run timeout in seconds")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<time>_<commit>.json)")
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(compare(args))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Latency report from the JSON-lines rerun traces written by both apps.
+
+Every script run of the Walmart pages and of the churn story appends one record
+to <app>/logs/trace.jsonl (see perf.py / bq_modules/perf.py). This script reads
+those logs, including the rotated trace.jsonl.1 ... files, and prints p50, p95
+and p99 latency:
+
+- per page (total run time)
+- per page section (the perf.section() / perf.mark() spans)
+- per triggering widget (the session_state keys that changed before the run,
+  or initial / navigation / rerun)
+
+Groups are ranked by p95, slowest first:
+
+    python benchmarks/trace_report.py
+    python benchmarks/trace_report.py --app churn --since 2024-06-01 --top 10
+    python benchmarks/trace_report.py path/to/logs --json > report.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LOG_DIRS = [
+    os.path.join(ROOT, "walmart-sale-dashboard-phamvugiaminh", "logs"),
+    os.path.join(ROOT, "customer-churn-analysis-vuthevinh", "logs"),
+]
+QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+
+def trace_files(paths):
+    """trace.jsonl files (and their rotated backups) under the given files or folders."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "trace.jsonl*"))))
+        elif os.path.exists(path):
+            files.append(path)
+    return files
+
+
+def load_records(files):
+    """Parse all trace records, skipping lines cut off by a crash or rotation."""
+    records = []
+    for path in files:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def _frames(records):
+    """One row per run and one row per span."""
+    runs = pd.DataFrame([{
+        "ts": r.get("ts"),
+        "app": r.get("app"),
+        "page": r.get("page"),
+        "trigger": r.get("trigger") or "unknown",
+        "complete": r.get("complete", True),
+        "ms": r.get("total_ms"),
+        "cache_misses": r.get("cache", {}).get("misses", 0),
+    } for r in records])
+    spans = pd.DataFrame([{
+        "ts": r.get("ts"), "app": r.get("app"), "page": r.get("page"),
+        "section": s["name"], "ms": s["ms"],
+    } for r in records for s in r.get("spans", [])],
+        columns=["ts", "app", "page", "section", "ms"])
+    for df in (runs, spans):
+        df["ts"] = pd.to_datetime(df["ts"], utc=True, errors="coerce")
+    return runs, spans
+
+
+def summarize(df, keys):
+    """count and latency quantiles per group, slowest p95 first."""
+    if df.empty:
+        return pd.DataFrame(columns=keys + ["count"] + list(QUANTILES) + ["max"])
+    grouped = df.groupby(keys, sort=False)["ms"]
+    out = grouped.count().rename("count").to_frame()
+    for name, q in QUANTILES.items():
+        out[name] = grouped.quantile(q)
+    out["max"] = grouped.max()
+    return out.reset_index().sort_values("p95", ascending=False, ignore_index=True)
+
+
+def build_report(records, app=None, since=None):
+    """{'pages', 'sections', 'widgets'} summary tables for the selected records."""
+    runs, spans = _frames(records)
+    if app:
+        runs, spans = runs[runs["app"] == app], spans[spans["app"] == app]
+    if since:
+        cutoff = pd.Timestamp(since, tz="UTC")
+        runs, spans = runs[runs["ts"] >= cutoff], spans[spans["ts"] >= cutoff]
+
+    pages = summarize(runs, ["app", "page"])
+    if not pages.empty:
+        incomplete = runs[~runs["complete"].astype(bool)].groupby(["app", "page"]).size()
+        misses = runs.groupby(["app", "page"])["cache_misses"].mean()
+        pages["incomplete"] = [incomplete.get((a, p), 0) for a, p in zip(pages["app"], pages["page"])]
+        pages["avg_cache_misses"] = [round(misses.get((a, p), 0), 2) for a, p in zip(pages["app"], pages["page"])]
+    # A run triggered by several widgets at once counts for each of them
+    widgets = runs.assign(widget=runs["trigger"].str.split(",")).explode("widget")
+    return {
+        "pages": pages,
+        "sections": summarize(spans, ["app", "page", "section"]),
+        "widgets": summarize(widgets, ["app", "page", "widget"]),
+    }
+
+
+def print_report(report, top):
+    with pd.option_context("display.width", 200, "display.max_colwidth", 60, "display.float_format", "{:,.1f}".format):
+        for title, key in (("Pages", "pages"), ("Sections", "sections"), ("Widgets", "widgets")):
+            table = report[key]
+            print(f"\n== {title} (latency in ms, slowest p95 first) ==")
+            print("(no records)" if table.empty else table.head(top).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=DEFAULT_LOG_DIRS,
+                        help="Trace files or log folders (default: both apps' logs/ folders)")
+    parser.add_argument("--app", choices=["walmart", "churn"], help="Only records of this app")
+    parser.add_argument("--since", help="Only records at or after this date/time (UTC)")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table (default 20)")
+    parser.add_argument("--json", action="store_true", help="Print the full tables as JSON")
+    args = parser.parse_args()
+
+    files = trace_files(args.paths)
+    records = load_records(files)
+    if not records:
+        sys.exit(f"No trace records found in {', '.join(args.paths)}")
+    report = build_report(records, args.app, args.since)
+    if args.json:
+        json.dump({k: v.to_dict(orient="records") for k, v in report.items()}, sys.stdout,
+                  indent=2, default=str, ensure_ascii=False)
+        print()
+    else:
+        print(f"{len(records):,} runs from {len(files)} file(s)")
+        print_report(report, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Bitmap index trên các cờ/nhóm của khách hàng cho truy vấn phân khúc tùy ý.
+
+Mỗi mức của mỗi nhóm điều kiện (ví dụ "Phí cao", "Electronic check",
+"Rating 1-2") là một bitset: 1 bit cho mỗi khách hàng, đóng gói thành các từ
+uint64 (1/8 byte mỗi khách, 10 triệu khách ≈ 1.2MB mỗi mức). Một truy vấn là
+OR các mức được chọn trong cùng nhóm, AND giữa các nhóm, rồi đếm bit
+(popcount) của kết quả và của kết quả AND bitset Churn; không đụng tới
+DataFrame.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class SegmentGroup:
+    """Một nhóm điều kiện; mỗi mức là (nhãn, điều kiện).
+
+    Điều kiện là biểu thức DataFrame.eval hoặc hàm df -> mảng bool. Nếu
+    `column` được đặt, mỗi giá trị phân biệt của cột là một mức.
+    """
+    key: str
+    label: str
+    levels: tuple = ()
+    column: str = None
+
+
+def _below_mean(column):
+    return lambda df: df[column] < df[column].mean()
+
+
+def _at_least_mean(column):
+    return lambda df: df[column] >= df[column].mean()
+
+
+SEGMENT_GROUPS = (
+    SegmentGroup('new', 'Tuổi tài khoản', (
+        ('Mới (<= 3 tháng)', 'Is_New_Customer'),
+        ('Cũ (> 3 tháng)', '~Is_New_Customer'),
+    )),
+    SegmentGroup('charge', 'Mức phí', (
+        ('Phí cao (Top 25%)', 'Is_High_Charge'),
+        ('Phí thường', '~Is_High_Charge'),
+    )),
+    SegmentGroup('payment', 'Phương thức thanh toán', column='PaymentMethod'),
+    SegmentGroup('tickets', 'Support Ticket', (
+        ('Có ticket (>0)', 'SupportTicketsPerMonth > 0'),
+        ('Không ticket (=0)', 'SupportTicketsPerMonth == 0'),
+    )),
+    SegmentGroup('engagement', 'Mức gắn bó', (
+        ('Gắn bó Thấp (< TB)', _below_mean('ViewingHoursPerWeek')),
+        ('Gắn bó Cao (>= TB)', _at_least_mean('ViewingHoursPerWeek')),
+    )),
+    SegmentGroup('rating', 'User Rating', (
+        ('Rating 1-2', 'UserRating < 2'),
+        ('Rating 2-3', 'UserRating >= 2 and UserRating < 3'),
+        ('Rating 3-4', 'UserRating >= 3 and UserRating < 4'),
+        ('Rating 4-5', 'UserRating >= 4'),
+    )),
+)
+
+# Số bit 1 của mỗi byte, cho numpy < 2.0 (chưa có np.bitwise_count)
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    """Tổng số bit 1 trong mảng uint64."""
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+    return int(_POPCOUNT8[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def pack(mask):
+    """Mảng bool -> bitset uint64 (bit i = khách hàng i; phần đệm cuối là 0)."""
+    packed = np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def _condition_mask(df, condition):
+    if callable(condition):
+        return np.asarray(condition(df), dtype=bool)
+    return np.asarray(df.eval(condition), dtype=bool)
+
+
+class BitmapIndex:
+    """Bitset cho từng (nhóm, mức) và bitset Churn của cùng một tập khách hàng."""
+
+    def __init__(self, n, bitmaps, churn, groups):
+        self.n = n
+        self.bitmaps = bitmaps
+        self.churn = churn
+        self.groups = {group.key: group for group in groups}
+        self.levels = {}
+        for group_key, level in bitmaps:
+            self.levels.setdefault(group_key, []).append(level)
+        self.total_churned = popcount(churn)
+
+    @classmethod
+    def from_frame(cls, df, groups=SEGMENT_GROUPS):
+        bitmaps = {}
+        for group in groups:
+            if group.column is not None:
+                values = df[group.column].to_numpy()
+                levels = [(str(value), values == value) for value in sorted(df[group.column].dropna().unique())]
+            else:
+                levels = [(label, _condition_mask(df, condition)) for label, condition in group.levels]
+            for label, mask in levels:
+                bitmaps[(group.key, label)] = pack(mask)
+        return cls(len(df), bitmaps, pack(df['Churn'].to_numpy() == 1), groups)
+
+    @property
+    def nbytes(self):
+        return sum(words.nbytes for words in self.bitmaps.values()) + self.churn.nbytes
+
+    def mask(self, selection):
+        """Bitset của phân khúc: selection = {nhóm: [mức, ...]}; OR trong nhóm, AND giữa các nhóm.
+
+        Nhóm không có mức nào được chọn không lọc gì. Trả về None nếu không lọc gì cả.
+        """
+        result = None
+        for group_key, levels in selection.items():
+            if not levels:
+                continue
+            group_mask = self.bitmaps[(group_key, levels[0])]
+            for level in levels[1:]:
+                group_mask = group_mask | self.bitmaps[(group_key, level)]
+            result = group_mask if result is None else result & group_mask
+        return result
+
+    def stats(self, selection):
+        """Số khách, số churn, tỷ lệ churn, tỷ trọng khách và tỷ trọng churn của phân khúc."""
+        mask = self.mask(selection)
+        if mask is None:
+            size, churned = self.n, self.total_churned
+        else:
+            size, churned = popcount(mask), popcount(mask & self.churn)
+        return {
+            'size': size,
+            'churned': churned,
+            'churn_rate': churned / size if size else np.nan,
+            'share': size / self.n if self.n else np.nan,
+            'churn_share': churned / self.total_churned if self.total_churned else np.nan,
+        }
@@ -1,14 +1,142 @@
 """Business Question 1 Renderer - Toxic Combo Analysis."""
 
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import streamlit as st
 
+from . import figure_cache
+from .churn_cube import build_cube
+from .plotting import annotate_rates, subplots
+from .segment_explorer import TOXIC_COMBO_SELECTION, select_segment
 
-def render_bq1(df, next_step_callback):
+
+PAYMENT_ORDER = ['Others (Auto-pay)', 'Mailed Check', 'Electronic Check']
+SEGMENT_ORDER = ['Others', 'Toxic Combo (Mailed Check)', 'Toxic Combo (E-Check)']
+
+
+# ========== Biểu đồ của từng bước (vẽ được ở thread nền, xem figure_cache) ==========
+# Cột của mọi biểu đồ đọc từ churn cube (bq_modules/churn_cube.py), không quét lại df
+def draw_age(cube):
+    churn_by_age = cube.rates(['Is_New_Customer'])
+    churn_by_age['Loại khách hàng'] = churn_by_age['Is_New_Customer'].map({
+        False: 'Cũ (>3 tháng)',
+        True: 'Mới (<= 3 tháng)'
+    })
+    
+    fig1, ax1, sns = subplots((7, 4))
+    sns.barplot(
+        data=churn_by_age,
+        x='Loại khách hàng',
+        y='Churn',
+        palette=['#3498db', '#e74c3c'],
+        ax=ax1,
+        errorbar=None
+    )
+    ax1.set_title('TQ 1.1: Tỷ lệ Churn theo Tuổi tài khoản\n(Mới <= 3 tháng)', fontsize=14, fontweight='bold')
+    ax1.set_ylabel('Tỷ lệ Churn', fontsize=12)
+    ax1.set_xlabel('Loại khách hàng', fontsize=12)
+    annotate_rates(ax1, churn_by_age, 'Loại khách hàng')
+    return fig1
+
+
+def draw_charge(cube):
+    churn_by_charge = cube.rates(['Is_High_Charge'], where='Is_New_Customer')
+    churn_by_charge['Mức phí'] = churn_by_charge['Is_High_Charge'].map({
+        False: 'Phí thường',
+        True: 'Phí cao (Top 25%)'
+    })
+    
+    fig2, ax2, sns = subplots((7, 4))
+    sns.barplot(
+        data=churn_by_charge,
+        x='Mức phí',
+        y='Churn',
+        palette=['#95a5a6', '#e67e22'],
+        ax=ax2,
+        errorbar=None
+    )
+    ax2.set_title('TQ 1.2: Tỷ lệ Churn của KH Mới\ntheo Mức phí (High = Top 25%)', 
+                  fontsize=14, fontweight='bold')
+    ax2.set_ylabel('Tỷ lệ Churn', fontsize=12)
+    ax2.set_xlabel('Mức phí', fontsize=12)
+    annotate_rates(ax2, churn_by_charge, 'Mức phí')
+    return fig2
+
+
+def draw_payment(cube):
+    churn_by_payment = cube.rates(['Payment_Group_Detail'])
+    churn_by_payment = churn_by_payment.sort_values('Churn')
+    
+    fig3, ax3, sns = subplots((8, 4))
+    sns.barplot(
+        data=churn_by_payment,
+        x='Payment_Group_Detail',
+        y='Churn',
+        order=PAYMENT_ORDER,
+        palette=['#2ecc71', '#f39c12', '#e74c3c'],
+        ax=ax3,
+        errorbar=None
+    )
+    ax3.set_title('TQ 1.3 (Mở rộng): Tỷ lệ Churn theo\nPhương thức thanh toán', fontsize=14, fontweight='bold')
+    ax3.set_ylabel('Tỷ lệ Churn', fontsize=12)
+    ax3.set_xlabel('Phương thức thanh toán', fontsize=12)
+    annotate_rates(ax3, churn_by_payment, 'Payment_Group_Detail', PAYMENT_ORDER)
+    return fig3
+
+
+def draw_toxic_combo(cube):
+    churn_by_segment = cube.rates(['Combined_Risk_Segment'])
+    
+    fig4, ax4, sns = subplots((8, 5))
+    sns.barplot(
+        data=churn_by_segment,
+        x='Combined_Risk_Segment',
+        y='Churn',
+        order=SEGMENT_ORDER,
+        palette=['#3498db', '#f39c12', '#c0392b'],
+        ax=ax4,
+        errorbar=None
+    )
+    ax4.set_title('TQ 1.4 (Mở rộng): So sánh các phân khúc "Toxic Combo"', fontsize=16, fontweight='bold')
+    ax4.set_ylabel('Tỷ lệ Churn', fontsize=12)
+    ax4.set_xlabel('Phân khúc khách hàng', fontsize=12)
+    annotate_rates(ax4, churn_by_segment, 'Combined_Risk_Segment', SEGMENT_ORDER)
+    return fig4
+
+
+# Bước -> (figure id, hàm vẽ); bước 5 (Kết luận) không có biểu đồ
+FIGURES_BQ1 = {
+    1: ("bq1_age", draw_age),
+    2: ("bq1_charge", draw_charge),
+    3: ("bq1_payment", draw_payment),
+    4: ("bq1_toxic_combo", draw_toxic_combo),
+}
+
+
+def combo_ci_caption(churn_by_segment):
+    """Chú thích khoảng tin cậy của TQ 1.4: cận dưới của từng Toxic Combo có vượt cận trên của Others không."""
+    caption = "Thanh đen trên mỗi cột: khoảng tin cậy 95% (Wilson)."
+    rates = churn_by_segment.set_index('Combined_Risk_Segment')
+    combos = [s for s in SEGMENT_ORDER[1:] if s in rates.index]
+    if 'Others' not in rates.index or not combos:
+        return caption
+    others_high = rates.at['Others', 'ci_high']
+    overlapping = [s for s in combos if not rates.at[s, 'ci_low'] > others_high]
+    if not overlapping:
+        return caption + (" Các nhóm Toxic Combo nhỏ nên khoảng rộng, nhưng cận dưới vẫn cao hơn "
+                          "cận trên của nhóm Others.")
+    return caption + (f" Khoảng của {', '.join(overlapping)} chồng lên nhóm Others: chênh lệch "
+                      "có thể chỉ do ngẫu nhiên.")
+
+
+def _show_figure(step, cube, data_version):
+    figure_id, draw = FIGURES_BQ1[step]
+    figure_cache.show(figure_id, data_version, lambda: draw(cube))
+
+
+def render_bq1(df, next_step_callback, data_version=None, cube=None):
     """Render all steps for BQ1: Toxic Combo analysis."""
     
+    if cube is None:
+        cube = build_cube(df)
     current_step = st.session_state.current_step_bq1
     
     st.header('🔍 BQ1: "Cú sốc thanh toán" & "Sự phiền phức" có phải là lý do chính đẩy khách hàng mới rời đi không?')
@@ -25,33 +153,8 @@ def render_bq1(df, next_step_callback):
             """
         )
         
-        # Tính toán tỷ lệ churn thực tế từ dữ liệu
-        churn_by_age = df.groupby('Is_New_Customer')['Churn'].mean().reset_index()
-        churn_by_age['Loại khách hàng'] = churn_by_age['Is_New_Customer'].map({
-            False: 'Cũ (>3 tháng)',
-            True: 'Mới (<= 3 tháng)'
-        })
-        
-        # Vẽ biểu đồ
-        fig1, ax1 = plt.subplots(figsize=(7, 4))
-        sns.barplot(
-            data=churn_by_age,
-            x='Loại khách hàng',
-            y='Churn',
-            palette=['#3498db', '#e74c3c'],
-            ax=ax1,
-            errorbar=None
-        )
-        ax1.set_title('TQ 1.1: Tỷ lệ Churn theo Tuổi tài khoản\n(Mới <= 3 tháng)', fontsize=14, fontweight='bold')
-        ax1.set_ylabel('Tỷ lệ Churn', fontsize=12)
-        ax1.set_xlabel('Loại khách hàng', fontsize=12)
-        ax1.set_ylim(0, max(churn_by_age['Churn']) * 1.2)
-        
-        for container in ax1.containers:
-            ax1.bar_label(container, fmt='%.2f', padding=3)
-        
-        st.pyplot(fig1)
-        plt.close(fig1)
+        # Biểu đồ được vẽ một lần cho mỗi phiên bản dữ liệu và phục vụ từ cache
+        _show_figure(1, cube, data_version)
         
         st.markdown("---")
         st.button("Tiếp theo: Yếu tố Mức phí ➔", key="btn_bq1_1", on_click=next_step_callback, type="primary")
@@ -68,33 +171,7 @@ def render_bq1(df, next_step_callback):
             """
         )
         
-        df_new_customers = df[df['Is_New_Customer'] == True]
-        churn_by_charge = df_new_customers.groupby('Is_High_Charge')['Churn'].mean().reset_index()
-        churn_by_charge['Mức phí'] = churn_by_charge['Is_High_Charge'].map({
-            False: 'Phí thường',
-            True: 'Phí cao (Top 25%)'
-        })
-        
-        fig2, ax2 = plt.subplots(figsize=(7, 4))
-        sns.barplot(
-            data=churn_by_charge,
-            x='Mức phí',
-            y='Churn',
-            palette=['#95a5a6', '#e67e22'],
-            ax=ax2,
-            errorbar=None
-        )
-        ax2.set_title('TQ 1.2: Tỷ lệ Churn của KH Mới\ntheo Mức phí (High = Top 25%)', 
-                      fontsize=14, fontweight='bold')
-        ax2.set_ylabel('Tỷ lệ Churn', fontsize=12)
-        ax2.set_xlabel('Mức phí', fontsize=12)
-        ax2.set_ylim(0, max(churn_by_charge['Churn']) * 1.2)
-        
-        for container in ax2.containers:
-            ax2.bar_label(container, fmt='%.2f', padding=3)
-        
-        st.pyplot(fig2)
-        plt.close(fig2)
+        _show_figure(2, cube, data_version)
         
         st.markdown("---")
         st.button("Tiếp theo: Yếu tố Phiền phức ➔", key="btn_bq1_2", on_click=next_step_callback, type="primary")
@@ -111,29 +188,7 @@ def render_bq1(df, next_step_callback):
             """
         )
         
-        churn_by_payment = df.groupby('Payment_Group_Detail')['Churn'].mean().reset_index()
-        churn_by_payment = churn_by_payment.sort_values('Churn')
-        
-        fig3, ax3 = plt.subplots(figsize=(8, 4))
-        sns.barplot(
-            data=churn_by_payment,
-            x='Payment_Group_Detail',
-            y='Churn',
-            order=['Others (Auto-pay)', 'Mailed Check', 'Electronic Check'],
-            palette=['#2ecc71', '#f39c12', '#e74c3c'],
-            ax=ax3,
-            errorbar=None
-        )
-        ax3.set_title('TQ 1.3 (Mở rộng): Tỷ lệ Churn theo\nPhương thức thanh toán', fontsize=14, fontweight='bold')
-        ax3.set_ylabel('Tỷ lệ Churn', fontsize=12)
-        ax3.set_xlabel('Phương thức thanh toán', fontsize=12)
-        ax3.set_ylim(0, max(churn_by_payment['Churn']) * 1.2)
-        
-        for container in ax3.containers:
-            ax3.bar_label(container, fmt='%.2f', padding=3)
-        
-        st.pyplot(fig3)
-        plt.close(fig3)
+        _show_figure(3, cube, data_version)
         
         st.markdown("---")
         st.button("Tiếp theo: Tổ hợp Độc hại ➔", key="btn_bq1_3", on_click=next_step_callback, type="primary")
@@ -142,7 +197,7 @@ def render_bq1(df, next_step_callback):
     elif current_step == 4:
         st.header("⚠️ TQ 1.4: Khi 3 yếu tố kết hợp - 'Toxic Combo'")
         
-        churn_by_segment = df.groupby('Combined_Risk_Segment')['Churn'].mean().reset_index()
+        churn_by_segment = cube.rates(['Combined_Risk_Segment'])
         
         others_churn = churn_by_segment[churn_by_segment['Combined_Risk_Segment'] == 'Others']['Churn'].values[0]
         max_toxic_churn = churn_by_segment[churn_by_segment['Combined_Risk_Segment'].str.contains('Toxic')]['Churn'].max()
@@ -157,31 +212,8 @@ def render_bq1(df, next_step_callback):
             """
         )
         
-        fig4, ax4 = plt.subplots(figsize=(8, 5))
-        sns.barplot(
-            data=churn_by_segment,
-            x='Combined_Risk_Segment',
-            y='Churn',
-            order=['Others', 'Toxic Combo (Mailed Check)', 'Toxic Combo (E-Check)'],
-            palette=['#3498db', '#f39c12', '#c0392b'],
-            ax=ax4,
-            errorbar=None
-        )
-        ax4.set_title('TQ 1.4 (Mở rộng): So sánh các phân khúc "Toxic Combo"', fontsize=16, fontweight='bold')
-        ax4.set_ylabel('Tỷ lệ Churn', fontsize=12)
-        ax4.set_xlabel('Phân khúc khách hàng', fontsize=12)
-        ax4.set_ylim(0, max(churn_by_segment['Churn']) * 1.2)
-        
-        for container in ax4.containers:
-            ax4.bar_label(container, fmt='%.2f', padding=3)
-        
-        toxic_segments = churn_by_segment[churn_by_segment['Combined_Risk_Segment'].str.contains('Toxic')]
-        if len(toxic_segments) > 0:
-            max_idx = toxic_segments['Churn'].idxmax()
-            max_churn_val = toxic_segments.loc[max_idx, 'Churn']
-        
-        st.pyplot(fig4)
-        plt.close(fig4)
+        _show_figure(4, cube, data_version)
+        st.caption(combo_ci_caption(churn_by_segment))
         
         st.markdown("---")
         st.button("Đến phần Kết luận ➔", key="btn_bq1_4", on_click=next_step_callback, type="primary")
@@ -243,7 +275,16 @@ def render_bq1(df, next_step_callback):
         st.markdown("---")
         
         col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            st.button("📤 Chọn nhóm Toxic Combo để xuất danh sách", key="btn_bq1_export",
+                      on_click=select_segment, args=(TOXIC_COMBO_SELECTION,),
+                      help="Điền sẵn phân khúc trong mục \"Tự xây phân khúc\" bên dưới, rồi bấm \"Ghi file\" ở đó.")
         with col2:
             def reset_bq1():
                 st.session_state.current_step_bq1 = 1
             st.button("🔄 Bắt đầu lại câu chuyện", key="btn_bq1_5", on_click=reset_bq1, type="secondary")
+    
+    # Vẽ trước biểu đồ của bước kế tiếp trong lúc người dùng đọc bước hiện tại
+    if current_step + 1 in FIGURES_BQ1:
+        figure_id, draw = FIGURES_BQ1[current_step + 1]
+        figure_cache.prerender(figure_id, data_version, lambda: draw(cube))
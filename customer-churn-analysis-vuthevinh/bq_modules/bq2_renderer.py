@@ -1,15 +1,132 @@
 """Business Question 2 Renderer - Boredom vs Frustration Analysis."""
 
 import numpy as np
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import streamlit as st
 
+from . import figure_cache
+from .churn_cube import build_cube, churn_rates
+from .distributions import build_sketches
+from .plotting import annotate_rates, subplots
 
-def render_bq2(df, next_step_callback):
+QUADRANT_ORDER = [
+    'Gắn bó Cao (>= TB)\nKhông Ticket (=0)',
+    'Gắn bó Thấp (< TB)\nKhông Ticket (=0)',
+    'Gắn bó Thấp (< TB)\nCó Ticket (>0)',
+    'Gắn bó Cao (>= TB)\nCó Ticket (>0)'
+]
+
+
+def quadrant_stats(cube):
+    """Ngưỡng giờ xem TB, bảng Quadrant/Churn và churn của nhóm "Chán" / "Bực" (từ churn cube)."""
+    by_level = cube.rates(['Engagement_Level', 'SupportTicketsPerMonth'])
+    frustration_level = np.where(by_level['SupportTicketsPerMonth'] > 0, 'Có Ticket (>0)', 'Không Ticket (=0)')
+    by_level['Quadrant'] = by_level['Engagement_Level'].astype(str) + '\n' + frustration_level
+    
+    quadrant_churn = churn_rates(by_level, ['Quadrant'])
+    try:
+        churn_bored = quadrant_churn[quadrant_churn['Quadrant'].str.contains('Gắn bó Thấp.*Không Ticket')]['Churn'].values[0]
+        churn_frustrated = quadrant_churn[quadrant_churn['Quadrant'].str.contains('Gắn bó Cao.*Có Ticket')]['Churn'].values[0]
+    except:
+        churn_bored, churn_frustrated = 0.17, 0.14
+    return cube.avg_viewing, quadrant_churn, churn_bored, churn_frustrated
+
+
+# ========== Biểu đồ của từng bước (vẽ được ở thread nền, xem figure_cache) ==========
+CHURN_PALETTE = ['#3498db', '#e74c3c']
+
+
+def _sketch_boxplot(ax, by_class):
+    """Boxplot Không Churn / Churn từ quantile sketch (bq_modules/distributions.py), kiểu seaborn."""
+    stats = [by_class[churn].box_stats(label) for churn, label in ((0, 'Không Churn'), (1, 'Churn'))]
+    boxes = ax.bxp(stats, positions=[0, 1], widths=0.8, patch_artist=True, manage_ticks=False,
+                   boxprops={'edgecolor': '0.25'}, medianprops={'color': '0.25'},
+                   whiskerprops={'color': '0.25'}, capprops={'color': '0.25'},
+                   flierprops={'markeredgecolor': '0.25'})
+    for box, color in zip(boxes['boxes'], CHURN_PALETTE):
+        box.set_facecolor(color)
+    ax.set_xticks([0, 1], [stat['label'] for stat in stats])
+    ax.set_xlim(-0.5, 1.5)
+
+
+def draw_engagement(sketches):
+    fig1, ax1, _ = subplots((7, 4))
+    _sketch_boxplot(ax1, sketches['ViewingHoursPerWeek'])
+    ax1.set_title('TQ 2.1: Mức độ gắn bó (Giờ xem/Tuần) vs. Churn', fontsize=14, fontweight='bold')
+    ax1.set_ylabel('Số giờ xem hàng tuần', fontsize=12)
+    ax1.set_xlabel('Trạng thái khách hàng', fontsize=12)
+    return fig1
+
+
+def draw_rating(sketches):
+    fig2, ax2, _ = subplots((7, 4))
+    _sketch_boxplot(ax2, sketches['UserRating'])
+    ax2.set_title('TQ 2.3: User Rating vs. Churn (GẦN GIỐNG NHAU!)', fontsize=14, fontweight='bold')
+    ax2.set_ylabel('User Rating (1-5 sao)', fontsize=12)
+    ax2.set_xlabel('Trạng thái khách hàng', fontsize=12)
+    ax2.set_ylim(0.5, 5.5)
+    return fig2
+
+
+def draw_tickets(cube):
+    churn_by_ticket = cube.rates(['SupportTicketsPerMonth'])
+    
+    fig3, ax3, sns = subplots((8, 4))
+    sns.barplot(data=churn_by_ticket, x='SupportTicketsPerMonth', y='Churn', palette='Reds', ax=ax3, errorbar=None)
+    ax3.set_title('TQ 2.2: Tỷ lệ Churn theo Số Lượng Support Ticket', fontsize=14, fontweight='bold')
+    ax3.set_ylabel('Tỷ lệ Churn', fontsize=12)
+    ax3.set_xlabel('Số Support Ticket mỗi tháng', fontsize=12)
+    annotate_rates(ax3, churn_by_ticket, 'SupportTicketsPerMonth')
+    return fig3
+
+
+def draw_quadrants(cube):
+    _, quadrant_churn, churn_bored, churn_frustrated = quadrant_stats(cube)
+    
+    # Cột = churn trung bình của từng Quadrant (giống barplot trên toàn bộ dòng, errorbar=None)
+    fig4, ax4, sns = subplots((10, 5))
+    sns.barplot(data=quadrant_churn, x='Quadrant', y='Churn', order=QUADRANT_ORDER,
+               palette=['#2ecc71', '#f39c12', '#95a5a6', '#e74c3c'], ax=ax4, errorbar=None)
+    ax4.set_title('BQ2: "Sự Thất Vọng" vs "Sự Gắn Bó"', fontsize=16, fontweight='bold')
+    ax4.set_ylabel('Tỷ lệ Churn', fontsize=12)
+    ax4.set_xlabel('Phân khúc Khách hàng', fontsize=12)
+    annotate_rates(ax4, quadrant_churn, 'Quadrant', QUADRANT_ORDER)
+    
+    line_bored = ax4.axhline(y=churn_bored, color='#f39c12', linestyle='--', alpha=0.5)
+    line_frustrated = ax4.axhline(y=churn_frustrated, color='#e74c3c', linestyle='--', alpha=0.5)
+    # Handle chỉ định rõ: thanh khoảng tin cậy cũng là một artist nên không dựa vào thứ tự
+    ax4.legend([line_bored, line_frustrated],
+               [f'Nhóm "Chán" ({churn_bored:.2f})', f'Nhóm "Bực" ({churn_frustrated:.2f})'])
+    return fig4
+
+
+# Bước -> (figure id, hàm vẽ, nguồn: 'sketches' cho boxplot, 'cube' cho tỷ lệ churn);
+# bước 5 (Kết luận) không có biểu đồ
+FIGURES_BQ2 = {
+    1: ("bq2_engagement", draw_engagement, 'sketches'),
+    2: ("bq2_rating", draw_rating, 'sketches'),
+    3: ("bq2_tickets", draw_tickets, 'cube'),
+    4: ("bq2_quadrants", draw_quadrants, 'cube'),
+}
+
+
+def _figure(step, cube, sketches):
+    figure_id, draw, source = FIGURES_BQ2[step]
+    data = cube if source == 'cube' else sketches
+    return figure_id, lambda: draw(data)
+
+
+def _show_figure(step, cube, sketches, data_version):
+    figure_id, draw = _figure(step, cube, sketches)
+    figure_cache.show(figure_id, data_version, draw)
+
+
+def render_bq2(df, next_step_callback, data_version=None, cube=None, sketches=None):
     """Render all steps for BQ2: Boredom vs Frustration analysis."""
     
+    if cube is None:
+        cube = build_cube(df)
+    if sketches is None:
+        sketches = build_sketches(df)
     current_step = st.session_state.current_step_bq2
     
     st.header('🎯 BQ2: "Sự thất vọng" (Frustration) có phải là tín hiệu Churn mạnh hơn "Sự chán nản" (Thiếu gắn bó) không?')
@@ -19,8 +136,8 @@ def render_bq2(df, next_step_callback):
     if current_step == 1:
         st.header("📺 TQ 2.1: Đầu tiên, 'Sự Gắn Bó' (Engagement) có ảnh hưởng không?")
         
-        median_no_churn = df[df['Churn'] == 0]['ViewingHoursPerWeek'].median()
-        median_churn = df[df['Churn'] == 1]['ViewingHoursPerWeek'].median()
+        median_no_churn = sketches['ViewingHoursPerWeek'][0].median()
+        median_churn = sketches['ViewingHoursPerWeek'][1].median()
         
         st.write(
             f"""
@@ -32,15 +149,8 @@ def render_bq2(df, next_step_callback):
             """
         )
         
-        fig1, ax1 = plt.subplots(figsize=(7, 4))
-        sns.boxplot(data=df, x='Churn', y='ViewingHoursPerWeek', palette=['#3498db', '#e74c3c'], ax=ax1)
-        ax1.set_title('TQ 2.1: Mức độ gắn bó (Giờ xem/Tuần) vs. Churn', fontsize=14, fontweight='bold')
-        ax1.set_ylabel('Số giờ xem hàng tuần', fontsize=12)
-        ax1.set_xlabel('Trạng thái khách hàng', fontsize=12)
-        ax1.set_xticklabels(['Không Churn', 'Churn'])
-        
-        st.pyplot(fig1)
-        plt.close(fig1)
+        # Biểu đồ được vẽ một lần cho mỗi phiên bản dữ liệu và phục vụ từ cache
+        _show_figure(1, cube, sketches, data_version)
         
         st.markdown("---")
         st.button("Tiếp theo: Yếu tố Thất Vọng (Rating) ➔", key="btn_bq2_1", on_click=next_step_callback, type="primary")
@@ -49,8 +159,8 @@ def render_bq2(df, next_step_callback):
     elif current_step == 2:
         st.header("⭐ TQ 2.3: 'Sự Thất Vọng' (Frustration) - Tín hiệu User Rating thì sao?")
         
-        median_rating_no_churn = df[df['Churn'] == 0]['UserRating'].median()
-        median_rating_churn = df[df['Churn'] == 1]['UserRating'].median()
+        median_rating_no_churn = sketches['UserRating'][0].median()
+        median_rating_churn = sketches['UserRating'][1].median()
         
         st.write(
             f"""
@@ -63,16 +173,7 @@ def render_bq2(df, next_step_callback):
             """
         )
         
-        fig2, ax2 = plt.subplots(figsize=(7, 4))
-        sns.boxplot(data=df, x='Churn', y='UserRating', palette=['#3498db', '#e74c3c'], ax=ax2)
-        ax2.set_title('TQ 2.3: User Rating vs. Churn (GẦN GIỐNG NHAU!)', fontsize=14, fontweight='bold')
-        ax2.set_ylabel('User Rating (1-5 sao)', fontsize=12)
-        ax2.set_xlabel('Trạng thái khách hàng', fontsize=12)
-        ax2.set_xticklabels(['Không Churn', 'Churn'])
-        ax2.set_ylim(0.5, 5.5)
-        
-        st.pyplot(fig2)
-        plt.close(fig2)
+        _show_figure(2, cube, sketches, data_version)
         
         st.warning("⚠️ User Rating KHÔNG phân biệt được nhóm Churn và Không Churn!")
         
@@ -83,7 +184,7 @@ def render_bq2(df, next_step_callback):
     elif current_step == 3:
         st.header("🎫 TQ 2.2: 'Sự Thất Vọng' (Frustration) - Tín hiệu Support Ticket thì sao?")
         
-        churn_by_ticket = df.groupby('SupportTicketsPerMonth')['Churn'].mean().reset_index()
+        churn_by_ticket = cube.rates(['SupportTicketsPerMonth'])
         min_churn = churn_by_ticket['Churn'].min()
         max_churn = churn_by_ticket['Churn'].max()
         
@@ -98,17 +199,7 @@ def render_bq2(df, next_step_callback):
             """
         )
         
-        fig3, ax3 = plt.subplots(figsize=(8, 4))
-        sns.barplot(data=df, x='SupportTicketsPerMonth', y='Churn', palette='Reds', ax=ax3, errorbar=None)
-        ax3.set_title('TQ 2.2: Tỷ lệ Churn theo Số Lượng Support Ticket', fontsize=14, fontweight='bold')
-        ax3.set_ylabel('Tỷ lệ Churn', fontsize=12)
-        ax3.set_xlabel('Số Support Ticket mỗi tháng', fontsize=12)
-        
-        for container in ax3.containers:
-            ax3.bar_label(container, fmt='%.2f', padding=3)
-        
-        st.pyplot(fig3)
-        plt.close(fig3)
+        _show_figure(3, cube, sketches, data_version)
         
         st.markdown("---")
         st.button("Tiếp theo: Câu trả lời cuối cùng ➔", key="btn_bq2_3", on_click=next_step_callback, type="primary")
@@ -117,21 +208,7 @@ def render_bq2(df, next_step_callback):
     elif current_step == 4:
         st.header("💡 Câu trả lời cho BQ2: 'Chán' vs. 'Bực' - Cái nào tệ hơn?")
         
-        avg_viewing = df['ViewingHoursPerWeek'].mean()
-        
-        df_temp = df.copy()
-        df_temp['Engagement_Level'] = np.where(df_temp['ViewingHoursPerWeek'] >= avg_viewing, 
-                                              'Gắn bó Cao (>= TB)', 'Gắn bó Thấp (< TB)')
-        df_temp['Frustration_Level'] = np.where(df_temp['SupportTicketsPerMonth'] > 0, 
-                                               'Có Ticket (>0)', 'Không Ticket (=0)')
-        df_temp['Quadrant'] = df_temp['Engagement_Level'] + '\n' + df_temp['Frustration_Level']
-        
-        try:
-            quadrant_churn = df_temp.groupby('Quadrant')['Churn'].mean().reset_index()
-            churn_bored = quadrant_churn[quadrant_churn['Quadrant'].str.contains('Gắn bó Thấp.*Không Ticket')]['Churn'].values[0]
-            churn_frustrated = quadrant_churn[quadrant_churn['Quadrant'].str.contains('Gắn bó Cao.*Có Ticket')]['Churn'].values[0]
-        except:
-            churn_bored, churn_frustrated = 0.17, 0.14
+        avg_viewing, _, churn_bored, churn_frustrated = quadrant_stats(cube)
         
         st.write(
             f"""
@@ -144,29 +221,7 @@ def render_bq2(df, next_step_callback):
             """
         )
         
-        quadrant_order = [
-            'Gắn bó Cao (>= TB)\nKhông Ticket (=0)',
-            'Gắn bó Thấp (< TB)\nKhông Ticket (=0)',
-            'Gắn bó Thấp (< TB)\nCó Ticket (>0)',
-            'Gắn bó Cao (>= TB)\nCó Ticket (>0)'
-        ]
-        
-        fig4, ax4 = plt.subplots(figsize=(10, 5))
-        sns.barplot(data=df_temp, x='Quadrant', y='Churn', order=quadrant_order,
-                   palette=['#2ecc71', '#f39c12', '#95a5a6', '#e74c3c'], ax=ax4, errorbar=None)
-        ax4.set_title('BQ2: "Sự Thất Vọng" vs "Sự Gắn Bó"', fontsize=16, fontweight='bold')
-        ax4.set_ylabel('Tỷ lệ Churn', fontsize=12)
-        ax4.set_xlabel('Phân khúc Khách hàng', fontsize=12)
-        
-        for container in ax4.containers:
-            ax4.bar_label(container, fmt='%.2f', padding=3)
-        
-        ax4.axhline(y=churn_bored, color='#f39c12', linestyle='--', alpha=0.5)
-        ax4.axhline(y=churn_frustrated, color='#e74c3c', linestyle='--', alpha=0.5)
-        ax4.legend(['', '', f'Nhóm "Chán" ({churn_bored:.2f})', f'Nhóm "Bực" ({churn_frustrated:.2f})'])
-        
-        st.pyplot(fig4)
-        plt.close(fig4)
+        _show_figure(4, cube, sketches, data_version)
         
         st.error("🔥 INSIGHT: Khách hàng **chán** (ít xem, không phàn nàn) rời đi **cao hơn** khách hàng **bực** (xem nhiều, có phàn nàn)!")
         
@@ -206,3 +261,8 @@ def render_bq2(df, next_step_callback):
             def reset_bq2():
                 st.session_state.current_step_bq2 = 1
             st.button("🔄 Phân tích lại từ đầu", key="btn_bq2_5", on_click=reset_bq2, type="secondary")
+    
+    # Vẽ trước biểu đồ của bước kế tiếp trong lúc người dùng đọc bước hiện tại
+    if current_step + 1 in FIGURES_BQ2:
+        figure_id, draw = _figure(current_step + 1, cube, sketches)
+        figure_cache.prerender(figure_id, data_version, draw)
@@ -0,0 +1,86 @@
+"""Khối tỷ lệ churn (churn-rate cube) dùng chung cho các bước của BQ1/BQ2.
+
+Dữ liệu được gom một lần khi load theo mọi tổ hợp của các cờ phân tích
+(Khách mới, Phí cao, nhóm thanh toán, phân khúc Toxic Combo, số ticket, mức
+gắn bó). Mỗi ô chỉ lưu số khách hàng (`n`) và số khách churn (`churned`), nên
+tỷ lệ churn của bất kỳ nhóm nào ghép từ các chiều này chỉ là cộng vài trăm ô
+thay vì quét lại toàn bộ DataFrame ở mỗi lần bấm "Tiếp theo".
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .intervals import wilson_interval
+
+# Nhãn mức gắn bó theo ngưỡng giờ xem trung bình (dùng cho các Quadrant của BQ2)
+ENGAGEMENT_LEVELS = ('Gắn bó Cao (>= TB)', 'Gắn bó Thấp (< TB)')
+
+# Combined_Risk_Segment được suy ra từ các chiều trước nó nên không làm tăng số ô
+# Hai nhóm của câu trả lời BQ2 (xem quadrant_stats trong bq2_renderer)
+QUADRANTS = {
+    'bored': 'Chán (Gắn bó Thấp, Không Ticket)',
+    'frustrated': 'Bực (Gắn bó Cao, Có Ticket)',
+}
+
+DIMENSIONS = (
+    'Is_New_Customer',
+    'Is_High_Charge',
+    'Payment_Group_Detail',
+    'Combined_Risk_Segment',
+    'SupportTicketsPerMonth',
+    'Engagement_Level',
+)
+
+
+def churn_rates(cells, by):
+    """Gom các ô theo `by`: số khách (n), số churn (churned), tỷ lệ Churn và khoảng tin cậy 95%."""
+    rates = cells.groupby(list(by), observed=True)[['n', 'churned']].sum().reset_index()
+    rates['Churn'] = rates['churned'] / rates['n']
+    rates['ci_low'], rates['ci_high'] = wilson_interval(rates['churned'], rates['n'])
+    return rates
+
+
+def quadrant_rates(cells, by=()):
+    """churn_rates của nhóm "Chán" (gắn bó thấp, 0 ticket) và "Bực" (gắn bó cao, có ticket), cột Quadrant."""
+    low_engagement = cells['Engagement_Level'].astype(str) == ENGAGEMENT_LEVELS[1]
+    has_tickets = cells['SupportTicketsPerMonth'] > 0
+    quadrant = np.select([low_engagement & ~has_tickets, ~low_engagement & has_tickets],
+                         list(QUADRANTS.values()), default='')
+    cells = cells.assign(Quadrant=quadrant)
+    return churn_rates(cells[cells['Quadrant'] != ''], [*by, 'Quadrant'])
+
+
+@dataclass(frozen=True)
+class ChurnCube:
+    """Các ô (DIMENSIONS + n, churned) và ngưỡng giờ xem đã dùng cho Engagement_Level."""
+    cells: pd.DataFrame
+    avg_viewing: float
+
+    @property
+    def total(self):
+        return int(self.cells['n'].sum())
+
+    def rates(self, by, where=None):
+        """Tỷ lệ churn theo các chiều `by`, lọc trước bằng biểu thức DataFrame.eval `where`.
+
+        Ví dụ: cube.rates(['Is_High_Charge'], where='Is_New_Customer').
+        """
+        cells = self.cells if where is None else self.cells[self.cells.eval(where)]
+        return churn_rates(cells, by)
+
+
+def build_cube(df):
+    """Quét df một lần (sau apply_segments) và trả về ChurnCube."""
+    avg_viewing = df['ViewingHoursPerWeek'].mean()
+    engagement = pd.Categorical.from_codes(
+        np.where(df['ViewingHoursPerWeek'].to_numpy() >= avg_viewing, 0, 1).astype(np.int8),
+        categories=list(ENGAGEMENT_LEVELS),
+    )
+    keys = df[list(DIMENSIONS[:-1])].assign(Engagement_Level=engagement)
+    cells = (keys.assign(churned=df['Churn'].to_numpy())
+             .groupby(list(DIMENSIONS), observed=True)['churned']
+             .agg(n='size', churned='sum')
+             .reset_index())
+    return ChurnCube(cells=cells, avg_viewing=float(avg_viewing))
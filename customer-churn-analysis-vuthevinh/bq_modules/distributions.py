@@ -0,0 +1,137 @@
+"""Tóm tắt phân phối (quantile sketch) cho các boxplot của BQ2.
+
+Mỗi sketch là một histogram với các bin cố định theo miền giá trị của biến
+(SKETCH_RANGES), cộng với min/max chính xác. Kích thước chỉ phụ thuộc số bin,
+không phụ thuộc số khách hàng; hai sketch cùng miền gộp được bằng cách cộng
+số đếm (merge), nên có thể tính riêng từng phần dữ liệu rồi gộp lại. Sai số
+của quantile không quá một bin (ví dụ 168h / 2048 ≈ 0.08h cho giờ xem).
+
+Boxplot được vẽ bằng Axes.bxp từ box_stats(), không cần giữ các dòng dữ liệu.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_BINS = 2048
+
+# Miền cố định của từng biến: giống nhau ở mọi phần dữ liệu để các sketch gộp được.
+# Giá trị ngoài miền được dồn vào bin đầu/cuối (min/max vẫn chính xác).
+SKETCH_RANGES = {
+    'ViewingHoursPerWeek': (0.0, 168.0),
+    'UserRating': (1.0, 5.0),
+}
+
+
+@dataclass(frozen=True)
+class QuantileSketch:
+    """Histogram `counts` trên [lo, hi] (len(counts) bin đều nhau) và min/max chính xác."""
+    lo: float
+    hi: float
+    counts: np.ndarray
+    min: float
+    max: float
+
+    @classmethod
+    def from_values(cls, values, lo, hi, bins=DEFAULT_BINS):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        counts = np.bincount(_bin_index(values, lo, hi, bins), minlength=bins).astype(np.int64)
+        if values.size == 0:
+            return cls(lo, hi, counts, np.nan, np.nan)
+        return cls(lo, hi, counts, float(values.min()), float(values.max()))
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    @property
+    def edges(self):
+        return np.linspace(self.lo, self.hi, len(self.counts) + 1)
+
+    def merge(self, other):
+        """Sketch của hợp hai phần dữ liệu (cùng miền và số bin)."""
+        if (self.lo, self.hi, len(self.counts)) != (other.lo, other.hi, len(other.counts)):
+            raise ValueError("Chỉ gộp được các sketch có cùng miền và số bin")
+        return QuantileSketch(self.lo, self.hi, self.counts + other.counts,
+                              float(np.fmin(self.min, other.min)), float(np.fmax(self.max, other.max)))
+
+    def quantile(self, q):
+        """Quantile (nội suy tuyến tính trong bin); q là số hoặc mảng trong [0, 1]."""
+        cum = np.cumsum(self.counts)
+        if cum[-1] == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        rank = np.asarray(q, dtype=float) * cum[-1]
+        i = np.minimum(np.searchsorted(cum, rank, side='left'), len(cum) - 1)
+        before = np.where(i > 0, cum[i - 1], 0)
+        width = (self.hi - self.lo) / len(self.counts)
+        frac = (rank - before) / np.maximum(self.counts[i], 1)
+        value = np.clip(self.lo + (i + frac) * width, self.min, self.max)
+        return float(value) if np.ndim(value) == 0 else value
+
+    def cdf(self, x):
+        """Tỷ lệ giá trị <= x (giả định phân bố đều trong bin)."""
+        if self.count == 0:
+            return np.nan
+        position = (x - self.lo) / (self.hi - self.lo) * len(self.counts)
+        i = int(np.clip(np.floor(position), 0, len(self.counts) - 1))
+        inside = np.clip(position - i, 0, 1) * self.counts[i]
+        return float((self.counts[:i].sum() + inside) / self.count)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def box_stats(self, label=None, whis=1.5):
+        """Dict cho Axes.bxp (cùng quy ước râu 1.5 IQR như seaborn/matplotlib).
+
+        Râu dừng ở bin khác rỗng xa nhất còn trong hàng rào; outlier được gom
+        thành một điểm cho mỗi bin (tâm bin), nên số điểm vẽ bị chặn bởi số bin.
+        """
+        q1, med, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        lo_fence, hi_fence = q1 - whis * iqr, q3 + whis * iqr
+        edges = self.edges
+        centers = np.clip((edges[:-1] + edges[1:]) / 2, self.min, self.max)
+        filled = self.counts > 0
+        inside = filled & (centers >= lo_fence) & (centers <= hi_fence)
+        whislo = self.min if self.min >= lo_fence else centers[inside].min(initial=q1)
+        whishi = self.max if self.max <= hi_fence else centers[inside].max(initial=q3)
+        fliers = centers[filled & ~inside]
+        return {'label': label, 'med': med, 'q1': q1, 'q3': q3,
+                'whislo': whislo, 'whishi': whishi, 'fliers': fliers}
+
+
+def _bin_index(values, lo, hi, bins):
+    index = np.floor((values - lo) / (hi - lo) * bins).astype(np.int64)
+    return np.clip(index, 0, bins - 1)
+
+
+def build_sketches(df, by='Churn', ranges=SKETCH_RANGES, bins=DEFAULT_BINS):
+    """{cột: {giá trị của `by`: QuantileSketch}} cho mọi cột trong `ranges`, mỗi cột quét một lần."""
+    groups = df[by].to_numpy()
+    classes, group_index = np.unique(groups, return_inverse=True)
+    sketches = {}
+    for column, (lo, hi) in ranges.items():
+        values = df[column].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        # Một bincount cho tất cả các nhóm: chỉ số = nhóm * bins + bin
+        flat = group_index[valid] * bins + _bin_index(values[valid], lo, hi, bins)
+        counts = np.bincount(flat, minlength=len(classes) * bins).reshape(len(classes), bins)
+        extremes = df.groupby(by)[column].agg(['min', 'max'])
+        sketches[column] = {
+            cls.item(): QuantileSketch(lo, hi, counts[k].astype(np.int64),
+                                       float(extremes.at[cls, 'min']), float(extremes.at[cls, 'max']))
+            for k, cls in enumerate(classes)
+        }
+    return sketches
+
+
+def merge_sketches(parts):
+    """Gộp các kết quả build_sketches của nhiều phần dữ liệu."""
+    merged = {}
+    for part in parts:
+        for column, by_class in part.items():
+            target = merged.setdefault(column, {})
+            for cls, sketch in by_class.items():
+                target[cls] = target[cls].merge(sketch) if cls in target else sketch
+    return merged
@@ -0,0 +1,268 @@
+"""Drift giữa các snapshot: PSI/KS từ histogram lưu lúc ingest và kiểm tra lại câu chuyện.
+
+Lúc ingest, mỗi snapshot lưu thêm một profile nhỏ (vài chục KB, không phụ
+thuộc số khách hàng):
+- mỗi cột số: QuantileSketch (bq_modules/distributions.py) theo Churn 0/1,
+  với miền và số bin cố định (PROFILE_RANGES, PROFILE_BINS) để mọi snapshot
+  so sánh được bin với bin;
+- mỗi cột phân loại: số khách theo từng giá trị.
+
+So sánh hai snapshot chỉ dùng các profile này và churn cube đã lưu:
+- PSI trên 10 nhóm theo thập phân vị của snapshot gốc (ghép từ các bin),
+  KS = chênh lệch lớn nhất giữa hai hàm phân phối tích lũy tại các biên bin;
+- ngưỡng của câu chuyện (Phí cao = Top 25%, Gắn bó = giờ xem >= TB) được đo
+  lại trên snapshot mới bằng CDF của sketch;
+- mỗi phát hiện của các bước BQ1/BQ2 được kiểm tra lại trên churn cube của
+  snapshot (khoảng tin cậy Wilson 95%).
+"""
+
+from dataclasses import dataclass
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from .churn_cube import ENGAGEMENT_LEVELS, QUADRANTS, quadrant_rates
+from .distributions import SKETCH_RANGES, QuantileSketch, build_sketches
+
+PROFILE_BINS = 512
+
+# Miền cố định của các cột đầu vào (giá trị ngoài miền dồn vào bin đầu/cuối)
+PROFILE_RANGES = {
+    'AccountAge': (0.0, 256.0),
+    'MonthlyCharges': (0.0, 64.0),
+    **SKETCH_RANGES,
+    'SupportTicketsPerMonth': (0.0, 32.0),
+}
+CATEGORICAL_COLUMNS = ('PaymentMethod', 'SubscriptionType')
+
+PSI_BUCKETS = 10
+# Quy ước thường dùng: PSI < 0.1 ổn định, 0.1-0.25 thay đổi nhẹ, >= 0.25 thay đổi lớn
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# Ngưỡng của câu chuyện lệch (warn) khi tỷ lệ khách mỗi phía đổi quá mức này, alert khi gấp đôi
+THRESHOLD_TOLERANCE = 0.05
+# Rating "không phân biệt được" Churn/Không Churn khi KS giữa hai nhóm dưới mức này
+RATING_KS_MAX = 0.05
+
+OK, WARN, ALERT = 'ok', 'warn', 'alert'
+# Bằng chứng khi snapshot không có nhóm cần so sánh (mức None)
+INSUFFICIENT = 'không đủ dữ liệu'
+
+
+@dataclass(frozen=True)
+class SnapshotProfile:
+    """Sketch theo Churn của các cột số và số đếm của các cột phân loại."""
+    sketches: dict
+    categories: dict
+
+    def overall(self, column):
+        """Sketch của mọi khách hàng (gộp Churn 0 và 1)."""
+        return reduce(QuantileSketch.merge, self.sketches[column].values())
+
+    def to_dict(self):
+        return {
+            'sketches': {
+                column: {str(cls): {'lo': s.lo, 'hi': s.hi, 'min': s.min, 'max': s.max, 'counts': s.counts.tolist()}
+                         for cls, s in by_class.items()}
+                for column, by_class in self.sketches.items()
+            },
+            'categories': self.categories,
+        }
+
+    @classmethod
+    def from_dict(cls, payload):
+        sketches = {
+            column: {int(k): QuantileSketch(v['lo'], v['hi'], np.asarray(v['counts'], dtype=np.int64),
+                                            v['min'], v['max'])
+                     for k, v in by_class.items()}
+            for column, by_class in payload['sketches'].items()
+        }
+        return cls(sketches=sketches, categories=payload['categories'])
+
+
+def build_profile(df):
+    """Profile của một snapshot: một lần bincount cho mỗi cột số, value_counts cho cột phân loại."""
+    ranges = {c: r for c, r in PROFILE_RANGES.items() if c in df.columns}
+    categories = {c: {str(k): int(v) for k, v in df[c].value_counts().items()}
+                  for c in CATEGORICAL_COLUMNS if c in df.columns}
+    return SnapshotProfile(sketches=build_sketches(df, ranges=ranges, bins=PROFILE_BINS), categories=categories)
+
+
+def psi(expected, actual, eps=1e-4):
+    """Population Stability Index giữa hai mảng tỷ lệ cùng nhóm."""
+    expected = np.clip(np.asarray(expected, dtype=float), eps, None)
+    actual = np.clip(np.asarray(actual, dtype=float), eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_statistic(a, b):
+    """KS giữa hai sketch cùng miền: max |CDF_a - CDF_b| tại các biên bin (NaN nếu một sketch rỗng)."""
+    if a.count == 0 or b.count == 0:
+        return np.nan
+    return float(np.abs(np.cumsum(a.counts) / a.count - np.cumsum(b.counts) / b.count).max())
+
+
+def numeric_psi(base, current, buckets=PSI_BUCKETS):
+    """PSI trên các nhóm thập phân vị của `base`, ghép từ các bin (nên không cần dữ liệu gốc).
+
+    NaN nếu một trong hai sketch rỗng.
+    """
+    if base.count == 0 or current.count == 0:
+        return np.nan
+    cum = np.cumsum(base.counts)
+    cuts = np.searchsorted(cum, cum[-1] * np.arange(1, buckets) / buckets, side='left') + 1
+    starts = np.unique(np.concatenate([[0], cuts[cuts < len(cum)]]))
+    return psi(np.add.reduceat(base.counts, starts) / base.count,
+               np.add.reduceat(current.counts, starts) / current.count)
+
+
+def _status(value, warn, alert):
+    if np.isnan(value):
+        return None
+    return ALERT if value >= alert else WARN if value >= warn else OK
+
+
+def drift_table(base, current):
+    """PSI, KS và mức cảnh báo cho mọi cột đầu vào giữa hai SnapshotProfile."""
+    rows = []
+    for column in base.sketches:
+        if column not in current.sketches:
+            continue
+        a, b = base.overall(column), current.overall(column)
+        value = numeric_psi(a, b)
+        rows.append({'column': column, 'kind': 'số', 'psi': value, 'ks': ks_statistic(a, b),
+                     'status': _status(value, PSI_WARN, PSI_ALERT)})
+    for column, counts in base.categories.items():
+        if column not in current.categories:
+            continue
+        levels = sorted(set(counts) | set(current.categories[column]))
+        a = np.array([counts.get(k, 0) for k in levels], dtype=float)
+        b = np.array([current.categories[column].get(k, 0) for k in levels], dtype=float)
+        value = psi(a / a.sum(), b / b.sum()) if a.sum() and b.sum() else np.nan
+        rows.append({'column': column, 'kind': 'phân loại', 'psi': value, 'ks': np.nan,
+                     'status': _status(value, PSI_WARN, PSI_ALERT)})
+    return pd.DataFrame(rows)
+
+
+def threshold_checks(base_meta, base, current_meta, current):
+    """Ngưỡng của snapshot gốc còn chia khách hàng như câu chuyện mô tả trên snapshot mới không?
+
+    base_share/current_share: tỷ lệ khách thuộc nhóm Phí cao / Gắn bó Thấp theo ngưỡng của snapshot gốc.
+    """
+    rows = []
+    charge = base_meta['high_charge_threshold']
+    share_base = 1 - base.overall('MonthlyCharges').cdf(charge)
+    share_current = 1 - current.overall('MonthlyCharges').cdf(charge)
+    rows.append({
+        'step': 'BQ1 · TQ 1.2',
+        'threshold': f"Phí cao: > {charge:.2f} (P75 của snapshot gốc)",
+        'base_share': share_base, 'current_share': share_current,
+        'current_threshold': f"P75 hiện tại: {current_meta['high_charge_threshold']:.2f}",
+        'status': _status(abs(share_current - 0.25), THRESHOLD_TOLERANCE, 2 * THRESHOLD_TOLERANCE),
+    })
+    viewing = base_meta['avg_viewing']
+    share_base = base.overall('ViewingHoursPerWeek').cdf(viewing)
+    share_current = current.overall('ViewingHoursPerWeek').cdf(viewing)
+    rows.append({
+        'step': 'BQ2 · TQ 2.4',
+        'threshold': f"Gắn bó Thấp: < {viewing:.1f}h (giờ xem TB của snapshot gốc)",
+        'base_share': share_base, 'current_share': share_current,
+        'current_threshold': f"TB hiện tại: {current_meta['avg_viewing']:.1f}h",
+        'status': _status(abs(share_current - share_base), THRESHOLD_TOLERANCE, 2 * THRESHOLD_TOLERANCE),
+    })
+    return pd.DataFrame(rows)
+
+
+def _row(rates, column, value):
+    """Dòng của nhóm `column == value`; None nếu snapshot không có khách nào trong nhóm."""
+    rows = rates[rates[column] == value]
+    return rows.iloc[0] if len(rows) else None
+
+
+def _lowest(rates, column, exclude):
+    """Dòng có churn thấp nhất trong các nhóm khác `exclude`; None nếu không có nhóm nào."""
+    rows = rates[rates[column] != exclude]
+    return rows.loc[rows['Churn'].idxmin()] if len(rows) else None
+
+
+def _higher(high, low):
+    """(mức, bằng chứng) cho nhận định "nhóm high churn cao hơn nhóm low"; mức None nếu thiếu nhóm."""
+    if high is None or low is None:
+        return None, INSUFFICIENT
+    if high['ci_low'] > low['ci_high']:
+        status = OK
+    elif high['Churn'] > low['Churn']:
+        status = WARN  # vẫn cao hơn nhưng khoảng tin cậy chồng nhau
+    else:
+        status = ALERT
+    return status, f"{high['Churn']:.1%} vs {low['Churn']:.1%}"
+
+
+def _new_customers(cube, profile):
+    rates = cube.rates(['Is_New_Customer'])
+    return _higher(_row(rates, 'Is_New_Customer', True), _row(rates, 'Is_New_Customer', False))
+
+
+def _high_charge(cube, profile):
+    rates = cube.rates(['Is_High_Charge'], where='Is_New_Customer')
+    return _higher(_row(rates, 'Is_High_Charge', True), _row(rates, 'Is_High_Charge', False))
+
+
+def _manual_payment(cube, profile):
+    rates = cube.rates(['Payment_Group_Detail'])
+    return _higher(_lowest(rates, 'Payment_Group_Detail', 'Others (Auto-pay)'),
+                   _row(rates, 'Payment_Group_Detail', 'Others (Auto-pay)'))
+
+
+def _toxic_combo(cube, profile):
+    rates = cube.rates(['Combined_Risk_Segment'])
+    return _higher(_lowest(rates, 'Combined_Risk_Segment', 'Others'), _row(rates, 'Combined_Risk_Segment', 'Others'))
+
+
+def _engagement(cube, profile):
+    rates = cube.rates(['Engagement_Level'])
+    return _higher(_row(rates, 'Engagement_Level', ENGAGEMENT_LEVELS[1]),
+                   _row(rates, 'Engagement_Level', ENGAGEMENT_LEVELS[0]))
+
+
+def _rating(cube, profile):
+    by_class = profile.sketches.get('UserRating', {})
+    ks = ks_statistic(by_class[0], by_class[1]) if 0 in by_class and 1 in by_class else np.nan
+    if np.isnan(ks):
+        return None, INSUFFICIENT
+    return (OK if ks < RATING_KS_MAX else ALERT), f"KS Churn/Không Churn = {ks:.3f}"
+
+
+def _tickets(cube, profile):
+    rates = cube.rates(['SupportTicketsPerMonth'])
+    if len(rates) < 2:
+        return None, INSUFFICIENT
+    return _higher(rates.iloc[-1], rates.iloc[0])
+
+
+def _bored_vs_frustrated(cube, profile):
+    rates = quadrant_rates(cube.cells)
+    return _higher(_row(rates, 'Quadrant', QUADRANTS['bored']), _row(rates, 'Quadrant', QUADRANTS['frustrated']))
+
+
+# (bước, nhận định của câu chuyện, hàm kiểm tra(cube, profile) -> (mức, bằng chứng))
+FINDINGS = (
+    ('BQ1 · TQ 1.1', 'Khách Mới (<= 3 tháng) churn cao hơn khách Cũ', _new_customers),
+    ('BQ1 · TQ 1.2', 'Trong nhóm Mới, Phí cao churn cao hơn Phí thường', _high_charge),
+    ('BQ1 · TQ 1.3', 'Thanh toán thủ công churn cao hơn Auto-pay', _manual_payment),
+    ('BQ1 · TQ 1.4', 'Toxic Combo churn cao hơn hẳn Others', _toxic_combo),
+    ('BQ2 · TQ 2.1', 'Gắn bó Thấp churn cao hơn Gắn bó Cao', _engagement),
+    ('BQ2 · TQ 2.3', 'User Rating không phân biệt được Churn / Không Churn', _rating),
+    ('BQ2 · TQ 2.2', 'Nhiều ticket churn cao hơn 0 ticket', _tickets),
+    ('BQ2 · TQ 2.4', '"Chán" churn cao hơn "Bực"', _bored_vs_frustrated),
+)
+
+
+def finding_checks(cube, profile):
+    """Mức (ok / warn: chưa chắc chắn / alert: không còn đúng / None: không đủ dữ liệu) của từng phát hiện."""
+    rows = []
+    for step, claim, check in FINDINGS:
+        status, evidence = check(cube, profile)
+        rows.append({'step': step, 'claim': claim, 'evidence': evidence, 'status': status})
+    return pd.DataFrame(rows)
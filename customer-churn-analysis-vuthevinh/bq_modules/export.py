@@ -0,0 +1,108 @@
+"""Xuất danh sách khách hàng của một phân khúc ra CSV/Parquet theo từng khối.
+
+Phân khúc là một bitset của BitmapIndex. Bitset được giải nén từng khối
+CHUNK_ROWS khách hàng thành vị trí dòng, chỉ các dòng khớp của khối đó được
+lấy ra và ghi nối vào file; bảng đã lọc đầy đủ không bao giờ nằm trong bộ
+nhớ. Số dòng sẽ xuất xem trước được từ BitmapIndex.stats (popcount).
+
+File được ghi vào exports/ (đổi bằng CHURN_EXPORT_DIR). Parquet cần pyarrow.
+"""
+
+import importlib.util
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+
+EXPORT_DIR = os.environ.get("CHURN_EXPORT_DIR",
+                            os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "exports"))
+CHUNK_ROWS = 500_000
+
+EXPORT_COLUMNS = [
+    'CustomerID', 'AccountAge', 'MonthlyCharges', 'TotalCharges', 'SubscriptionType', 'PaymentMethod',
+    'ViewingHoursPerWeek', 'UserRating', 'SupportTicketsPerMonth', 'Churn',
+]
+
+
+def has_parquet():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _columns(df, columns):
+    return [c for c in (columns or EXPORT_COLUMNS) if c in df.columns]
+
+
+def iter_positions(mask, n, chunk_rows=CHUNK_ROWS):
+    """Vị trí các dòng có bit 1, theo từng khối chunk_rows dòng (mask None = mọi dòng)."""
+    chunk_rows = max(64, chunk_rows - chunk_rows % 64)  # mỗi khối là số nguyên từ uint64, ít nhất 1 từ
+    for start in range(0, n, chunk_rows):
+        stop = min(start + chunk_rows, n)
+        if mask is None:
+            yield np.arange(start, stop)
+            continue
+        words = mask[start // 64:-(-stop // 64)]
+        bits = np.unpackbits(words.view(np.uint8), bitorder='little')[:stop - start]
+        positions = np.flatnonzero(bits)
+        if len(positions):
+            yield positions + start
+
+
+def iter_frames(df, mask, columns=None, chunk_rows=CHUNK_ROWS):
+    """Các DataFrame nhỏ chứa dòng khớp của từng khối."""
+    column_positions = [df.columns.get_loc(c) for c in _columns(df, columns)]
+    for positions in iter_positions(mask, len(df), chunk_rows):
+        yield df.iloc[positions, column_positions]
+
+
+def write_csv(df, mask, path, columns=None, chunk_rows=CHUNK_ROWS):
+    """Ghi CSV theo khối; trả về số dòng đã ghi."""
+    rows = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, frame in enumerate(iter_frames(df, mask, columns, chunk_rows)):
+            frame.to_csv(f, index=False, header=(i == 0))
+            rows += len(frame)
+        if rows == 0:
+            f.write(','.join(_columns(df, columns)) + '\n')
+    return rows
+
+
+def write_parquet(df, mask, path, columns=None, chunk_rows=CHUNK_ROWS):
+    """Ghi Parquet, mỗi khối là một row group; trả về số dòng đã ghi."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = 0
+    writer = None
+    try:
+        for frame in iter_frames(df, mask, columns, chunk_rows):
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows += len(frame)
+        if writer is None:
+            empty = df[_columns(df, columns)].iloc[:0]
+            pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), path)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet}
+
+
+def export_path(name, fmt, directory=None):
+    """Đường dẫn file mới trong exports/ (tên an toàn + thời điểm xuất)."""
+    directory = directory or EXPORT_DIR
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_') or 'segment'
+    return os.path.join(directory, f"{slug}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}")
+
+
+def export_segment(df, mask, fmt='csv', name='segment', directory=None, columns=None):
+    """Ghi phân khúc ra file trong exports/; trả về (đường dẫn, số dòng)."""
+    path = export_path(name, fmt, directory)
+    rows = WRITERS[fmt](df, mask, path, columns)
+    return path, rows
@@ -0,0 +1,104 @@
+"""Cache ảnh PNG đã render của các biểu đồ matplotlib trong story.
+
+st.pyplot rasterize lại figure ở mỗi lần rerun, và trên máy ít CPU đây là phần
+lớn nhất của độ trễ giữa hai bước. Ở đây mỗi biểu đồ được vẽ một lần cho mỗi
+khóa (figure id, phiên bản dữ liệu, tham số), lưu dạng PNG và hiển thị bằng
+st.image. prerender() vẽ trước biểu đồ của bước kế tiếp ở một thread nền, nên
+khi bấm "Tiếp theo" ảnh đã sẵn sàng.
+
+Cache dùng chung cho cả process (mọi phiên cùng xem một dữ liệu), giới hạn
+theo tổng dung lượng và bỏ ảnh ít dùng nhất trước (LRU).
+"""
+
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+MAX_BYTES = 64 * 2**20
+# Giống mặc định của st.pyplot để ảnh trông như trước
+SAVEFIG_KWARGS = {"format": "png", "dpi": 200, "bbox_inches": "tight"}
+# st.image thu nhỏ và encode lại (~150ms) mọi ảnh rộng hơn 2 x 730px, nên giảm dpi trước khi lưu
+MAX_WIDTH_PX = 2 * 730
+
+_lock = threading.Lock()
+_images = OrderedDict()
+_size = 0
+_pending = {}
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="figure-prerender")
+
+
+def figure_to_png(fig):
+    dpi = min(SAVEFIG_KWARGS["dpi"], int(MAX_WIDTH_PX / fig.get_figwidth()))
+    buf = io.BytesIO()
+    fig.savefig(buf, **{**SAVEFIG_KWARGS, "dpi": dpi})
+    return buf.getvalue()
+
+
+def _put(key, png):
+    global _size
+    with _lock:
+        if key in _images:
+            return
+        _images[key] = png
+        _size += len(png)
+        while _size > MAX_BYTES and len(_images) > 1:
+            _, old = _images.popitem(last=False)
+            _size -= len(old)
+
+
+def _lookup(key):
+    with _lock:
+        png = _images.get(key)
+        if png is not None:
+            _images.move_to_end(key)
+        return png, _pending.get(key)
+
+
+def get_png(figure_id, data_version, draw, params=()):
+    """PNG của biểu đồ; draw() (trả về một Figure) chỉ được gọi khi chưa có trong cache."""
+    key = (figure_id, data_version, params)
+    png, pending = _lookup(key)
+    if png is not None:
+        return png
+    if pending is not None:
+        try:
+            return pending.result()
+        except Exception:
+            pass  # Vẽ nền lỗi: vẽ lại ở đây để lỗi hiện ra trên trang
+    png = figure_to_png(draw())
+    _put(key, png)
+    return png
+
+
+def show(figure_id, data_version, draw, params=()):
+    """Hiển thị biểu đồ từ cache (thay cho st.pyplot)."""
+    st.image(get_png(figure_id, data_version, draw, params), use_container_width=True)
+
+
+def _prerender_job(key, draw):
+    try:
+        png = figure_to_png(draw())
+        _put(key, png)
+        return png
+    finally:
+        with _lock:
+            _pending.pop(key, None)
+
+
+def prerender(figure_id, data_version, draw, params=()):
+    """Vẽ trước biểu đồ ở thread nền nếu chưa có trong cache hoặc đang được vẽ."""
+    key = (figure_id, data_version, params)
+    with _lock:
+        if key in _images or key in _pending:
+            return
+        _pending[key] = _executor.submit(_prerender_job, key, draw)
+
+
+def clear():
+    global _size
+    with _lock:
+        _images.clear()
+        _size = 0
@@ -0,0 +1,165 @@
+"""History & Drift - các chỉ số, ngưỡng và kết luận của câu chuyện qua từng snapshot tháng."""
+
+import pandas as pd
+import streamlit as st
+
+from . import perf
+from .churn_cube import QUADRANTS
+from .drift import ALERT, PROFILE_RANGES, WARN, drift_table, finding_checks, threshold_checks
+from .snapshots import SnapshotHistory, list_snapshots, load_aggregate, load_profile
+
+STATUS_ICONS = {'ok': '🟢', 'warn': '🟡', 'alert': '🔴', None: '-'}
+
+
+@perf.cache_resource(show_spinner=False)
+def _aggregate(snapshot, store_dir):
+    # Snapshot không bao giờ bị ghi đè, nên mỗi snapshot chỉ đọc một lần
+    return load_aggregate(snapshot, store_dir)
+
+
+@perf.cache_resource(show_spinner=False)
+def _profile(snapshot, store_dir):
+    return load_profile(snapshot, store_dir)
+
+
+def load_cached_history(store_dir=None):
+    """SnapshotHistory từ các aggregates đã cache; snapshot mới chỉ đọc thêm file của nó."""
+    return SnapshotHistory.from_aggregates([_aggregate(s, store_dir) for s in list_snapshots(store_dir)])
+
+
+def render_history(store_dir=None):
+    """Churn tổng, churn Toxic Combo (BQ1) và churn nhóm Chán/Bực (BQ2) theo từng snapshot."""
+
+    with st.expander("📅 Lịch sử theo snapshot: các phát hiện có còn đúng qua từng tháng?"):
+        history = load_cached_history(store_dir)
+        if len(history) == 0:
+            st.info("Chưa có snapshot nào. Thêm dữ liệu từng tháng bằng "
+                    "`python ingest_snapshot.py data/churn_2024-05.csv` (mỗi lần chỉ xử lý file của tháng đó).")
+            return
+
+        overall = history.overall_churn()
+        latest = history.meta.iloc[-1]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Số snapshot", f"{len(history)}",
+                    help=f"{history.meta.index[0]:%Y-%m-%d} → {history.meta.index[-1]:%Y-%m-%d}")
+        col2.metric("Khách hàng (snapshot mới nhất)", f"{int(latest['customers']):,}")
+        delta = f"{(overall.iloc[-1] - overall.iloc[-2]) * 100:+.1f} điểm %" if len(overall) > 1 else None
+        col3.metric("Tỷ lệ Churn (snapshot mới nhất)", f"{overall.iloc[-1]:.1%}", delta, delta_color="inverse")
+
+        st.markdown("**BQ1 - Tỷ lệ churn theo phân khúc Toxic Combo**")
+        st.line_chart(history.segment_churn().assign(**{'Toàn bộ': overall}), y_label="Tỷ lệ Churn", height=260)
+
+        st.markdown("**BQ2 - Tỷ lệ churn của nhóm \"Chán\" và \"Bực\"**")
+        st.line_chart(history.quadrant_churn(), y_label="Tỷ lệ Churn", height=260)
+        st.caption(f"{QUADRANTS['bored']}: giờ xem < TB của chính snapshot đó và 0 ticket; "
+                   f"{QUADRANTS['frustrated']}: giờ xem >= TB và có ticket.")
+
+        st.dataframe(
+            history.meta[['source', 'customers', 'churned', 'high_charge_threshold', 'avg_viewing']]
+            .assign(churn=overall).reset_index(),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'snapshot': st.column_config.DateColumn("Snapshot"),
+                'source': "File",
+                'customers': st.column_config.NumberColumn("Số khách", format="%d"),
+                'churned': st.column_config.NumberColumn("Số churn", format="%d"),
+                'high_charge_threshold': st.column_config.NumberColumn("Ngưỡng Phí cao (P75)", format="%.2f"),
+                'avg_viewing': st.column_config.NumberColumn("Giờ xem TB", format="%.2f"),
+                'churn': st.column_config.NumberColumn("Tỷ lệ Churn", format="percent"),
+            },
+        )
+
+
+def _with_icons(table, columns=('status',)):
+    return table.assign(**{c: table[c].map(STATUS_ICONS).fillna(STATUS_ICONS[None]) for c in columns})
+
+
+def render_drift_report(store_dir=None):
+    """PSI/KS của các cột đầu vào, ngưỡng và phát hiện của câu chuyện giữa hai snapshot (chỉ đọc aggregates)."""
+
+    with st.expander("🧭 Drift giữa các snapshot: ngưỡng và kết luận của câu chuyện còn đúng không?"):
+        snapshots = list_snapshots(store_dir)
+        if len(snapshots) < 2:
+            st.info("Cần ít nhất 2 snapshot để so sánh (xem `ingest_snapshot.py`).")
+            return
+
+        col1, col2 = st.columns(2)
+        base = col1.selectbox("Snapshot gốc", snapshots, index=0, key="drift_base")
+        current = col2.selectbox("So sánh với", snapshots, index=len(snapshots) - 1, key="drift_current")
+        base_meta, base_cube = _aggregate(base, store_dir)
+        current_meta, current_cube = _aggregate(current, store_dir)
+        base_profile, current_profile = _profile(base, store_dir), _profile(current, store_dir)
+        missing = [f"{s:%Y-%m-%d}" for s, p in ((base, base_profile), (current, current_profile)) if p is None]
+        if missing:
+            st.info(f"Không có dữ liệu drift cho snapshot {', '.join(missing)}: profile histogram chỉ được "
+                    "lưu lúc ingest.")
+            return
+
+        columns = drift_table(base_profile, current_profile)
+        thresholds = threshold_checks(base_meta, base_profile, current_meta, current_profile)
+        findings = finding_checks(base_cube, base_profile).merge(
+            finding_checks(current_cube, current_profile)[['step', 'status', 'evidence']],
+            on='step', suffixes=('_base', '_current'))
+
+        statuses = pd.concat([thresholds[['step', 'status']],
+                              findings[['step', 'status_current']].rename(columns={'status_current': 'status'})])
+        flagged = list(dict.fromkeys(statuses.loc[statuses['status'].isin([WARN, ALERT]), 'step']))
+        insufficient = list(dict.fromkeys(statuses.loc[statuses['status'].isna(), 'step']))
+        if (statuses['status'] == ALERT).any():
+            st.error(f"Cần xem lại các bước: {', '.join(flagged)}")
+        elif flagged:
+            st.warning(f"Nên kiểm tra lại các bước: {', '.join(flagged)}")
+        else:
+            checked = "kiểm tra được " if insufficient else ""
+            st.success(f"Ngưỡng và các kết luận {checked}của câu chuyện vẫn đúng trên snapshot mới.")
+        if insufficient:
+            st.info(f"Snapshot mới không đủ dữ liệu để kiểm tra các bước: {', '.join(insufficient)}")
+
+        st.markdown("**Phân phối các cột đầu vào**")
+        st.dataframe(
+            _with_icons(columns),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'column': "Cột",
+                'kind': "Loại",
+                'psi': st.column_config.NumberColumn("PSI", format="%.3f",
+                                                     help="< 0.1 ổn định, 0.1-0.25 thay đổi nhẹ, >= 0.25 thay đổi lớn"),
+                'ks': st.column_config.NumberColumn("KS", format="%.3f", help="Chỉ cho cột số"),
+                'status': "Mức",
+            },
+        )
+
+        st.markdown("**Ngưỡng của câu chuyện** (ngưỡng của snapshot gốc áp lên snapshot mới)")
+        st.dataframe(
+            _with_icons(thresholds),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'step': "Bước",
+                'threshold': st.column_config.TextColumn("Ngưỡng", width="large"),
+                'base_share': st.column_config.NumberColumn("Tỷ lệ khách (gốc)", format="percent"),
+                'current_share': st.column_config.NumberColumn("Tỷ lệ khách (mới)", format="percent"),
+                'current_threshold': "Ngưỡng tính lại",
+                'status': "Mức",
+            },
+        )
+
+        st.markdown("**Kết luận của từng bước**")
+        st.dataframe(
+            _with_icons(findings, ('status_base', 'status_current')),
+            hide_index=True,
+            use_container_width=True,
+            column_order=['step', 'claim', 'status_base', 'evidence_base', 'status_current', 'evidence_current'],
+            column_config={
+                'step': "Bước",
+                'claim': st.column_config.TextColumn("Kết luận", width="large"),
+                'status_base': "Gốc",
+                'evidence_base': "Số liệu (gốc)",
+                'status_current': "Mới",
+                'evidence_current': "Số liệu (mới)",
+            },
+        )
+        st.caption(f"🟢 còn đúng (khoảng tin cậy 95% tách biệt) · 🟡 chưa chắc chắn · 🔴 không còn đúng · - không đủ dữ liệu. "
+                   f"Histogram {len(PROFILE_RANGES)} cột số được lưu lúc ingest, không đọc lại dữ liệu gốc.")
@@ -0,0 +1,28 @@
+"""Khoảng tin cậy cho tỷ lệ churn của nhiều phân khúc cùng lúc, chỉ từ số đếm.
+
+wilson_interval nhận mảng (số churn, số khách) của mọi phân khúc và tính công
+thức đóng Wilson score trong một phép NumPy, không lặp Python theo từng phân khúc.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+
+CONFIDENCE = 0.95
+
+
+def _z(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes, n, confidence=CONFIDENCE):
+    """(cận dưới, cận trên) Wilson score cho successes / n; NaN khi n = 0."""
+    successes = np.asarray(successes, dtype=float)
+    n = np.asarray(n, dtype=float)
+    z = _z(confidence)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        p = successes / n
+        denominator = 1 + z ** 2 / n
+        center = (p + z ** 2 / (2 * n)) / denominator
+        margin = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / denominator
+    return np.clip(center - margin, 0, 1), np.clip(center + margin, 0, 1)
@@ -0,0 +1,310 @@
+"""Đo hiệu năng từng lần chạy story_app: panel cho developer và trace log JSON-lines.
+
+story_app gọi start_page() ở đầu script, end_page() ở cuối và đo từng phần
+bằng context manager section().
+
+- Mở app với ?perf=1 trên URL để hiện expander "Performance" ở sidebar: thời
+  gian từng phần, cache hit/miss, kích thước DataFrame và bộ nhớ process.
+- Với CHURN_TRACE=1, mỗi lần chạy được ghi thêm một dòng vào logs/trace.jsonl
+  (xoay vòng ở 10 MB, giữ 5 file cũ) cùng định dạng với app Walmart, để
+  benchmarks/trace_report.py tổng hợp chung. CHURN_TRACE_DIR đổi thư mục.
+
+Khi tắt cả panel lẫn log, mỗi lời gọi chỉ là một lần đọc session_state.
+Số cache hit/miss được đếm cho các hàm dùng perf.cache_data / perf.cache_resource
+(thay trực tiếp cho decorator st.*), chung cho cả process.
+"""
+import datetime as dt
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+import streamlit as st
+
+_RUN_KEY = "_perf_run"
+_WIDGETS_KEY = "_perf_widgets"
+
+APP_NAME = "churn"
+TRACE_DIR = os.environ.get("CHURN_TRACE_DIR",
+                           os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs"))
+
+
+# ------------------------------------------------------------------
+# Đếm cache hit/miss (perf.cache_data và perf.cache_resource)
+# ------------------------------------------------------------------
+_cache_lock = threading.Lock()
+_cache_calls = defaultdict(int)
+_cache_misses = defaultdict(int)
+
+
+def _count(counter, name):
+    with _cache_lock:
+        counter[name] += 1
+
+
+def _counted(cache, func, options):
+    """Bọc `func` bằng decorator cache `cache` của Streamlit, đếm số lần gọi và số lần miss.
+
+    Cache chỉ thấy `compute`, hàm này chỉ chạy khi miss; functools.wraps giữ tên,
+    chữ ký và mã nguồn mà Streamlit dùng để băm, nên tham số bắt đầu bằng `_`
+    vẫn được bỏ qua và mỗi hàm vẫn có cache riêng.
+    """
+    def decorate(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _count(_cache_misses, name)
+            return func(*args, **kwargs)
+
+        cached = cache(**options)(compute)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            _count(_cache_calls, name)
+            return cached(*args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+
+    return decorate if func is None else decorate(func)
+
+
+def cache_data(func=None, **options):
+    """st.cache_data có đếm hit/miss (dùng như st.cache_data)."""
+    return _counted(st.cache_data, func, options)
+
+
+def cache_resource(func=None, **options):
+    """st.cache_resource có đếm hit/miss (dùng như st.cache_resource)."""
+    return _counted(st.cache_resource, func, options)
+
+
+def cache_counts():
+    """{hàm: (hits, misses)} của bộ đếm toàn process."""
+    with _cache_lock:
+        return {n: (calls - _cache_misses[n], _cache_misses[n]) for n, calls in _cache_calls.items()}
+
+
+def _cache_delta(before):
+    """{hàm: (hits, misses)} kể từ lần chụp `before`, bỏ các hàm không đổi."""
+    delta = {}
+    for name, (hits, misses) in cache_counts().items():
+        h0, m0 = before.get(name, (0, 0))
+        if hits - h0 or misses - m0:
+            delta[name] = (hits - h0, misses - m0)
+    return delta
+
+
+def rss_mb():
+    """Bộ nhớ RSS của process (MB); RSS đỉnh nếu không đọc được /proc."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+# ------------------------------------------------------------------
+# Trace log
+# ------------------------------------------------------------------
+_trace_lock = threading.Lock()
+_trace_logger = None
+
+
+def trace_enabled():
+    return os.environ.get("CHURN_TRACE", "0") == "1"
+
+
+def _get_trace_logger():
+    """Logger ghi mỗi dòng một JSON vào file xoay vòng theo kích thước (tạo một lần mỗi process)."""
+    global _trace_logger
+    with _trace_lock:
+        if _trace_logger is None:
+            logger = logging.getLogger(f"{APP_NAME}.trace")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            try:
+                os.makedirs(TRACE_DIR, exist_ok=True)
+                handler = RotatingFileHandler(os.path.join(TRACE_DIR, "trace.jsonl"), maxBytes=10 * 2**20,
+                                              backupCount=5, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+            except OSError:
+                logger.addHandler(logging.NullHandler())
+            _trace_logger = logger
+    return _trace_logger
+
+
+_SIMPLE = (bool, int, float, str, type(None))
+
+
+def _widget_snapshot():
+    """Giá trị các widget có key (các mục session_state công khai, kiểu đơn giản hoặc danh sách)."""
+    snapshot = {}
+    for key, value in st.session_state.items():
+        if str(key).startswith("_"):
+            continue
+        if isinstance(value, (list, tuple)) and all(isinstance(v, _SIMPLE) for v in value):
+            snapshot[str(key)] = tuple(value)
+        elif isinstance(value, _SIMPLE):
+            snapshot[str(key)] = value
+    return snapshot
+
+
+def _detect_trigger(widgets):
+    """Nguyên nhân lần chạy: lần đầu, các key widget đã đổi, hoặc rerun thường."""
+    before = st.session_state.get(_WIDGETS_KEY)
+    if before is None:
+        return "initial"
+    changed = sorted(k for k, v in widgets.items() if k in before and before[k] != v)
+    return ",".join(changed) if changed else "rerun"
+
+
+def _write_trace(run, complete):
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    total = run.get("total", time.perf_counter() - run["start"])
+    cache = _cache_delta(run["cache_start"])
+    record = {
+        "ts": run["ts"],
+        "app": APP_NAME,
+        "page": run["page"],
+        "session": ctx.session_id if ctx is not None else None,
+        "trigger": run["trigger"],
+        "complete": complete,
+        "total_ms": round(total * 1000, 2),
+        "spans": [{"name": name, "ms": round(sec * 1000, 2)} for name, sec in run["sections"]],
+        "cache": {
+            "hits": sum(h for h, _ in cache.values()),
+            "misses": sum(m for _, m in cache.values()),
+            "functions": {name: {"hits": h, "misses": m} for name, (h, m) in sorted(cache.items())},
+        },
+        "frames": {label: rows for label, (rows, _, _) in run["frames"].items()},
+        "data_version": run["data_version"],
+        "rss_mb": round(rss_mb() or 0, 1),
+    }
+    _get_trace_logger().info(json.dumps(record, default=str, ensure_ascii=False))
+    run["traced"] = True
+
+
+# ------------------------------------------------------------------
+# Lần chạy và các phần
+# ------------------------------------------------------------------
+def is_enabled():
+    """Panel ở sidebar có được yêu cầu không (?perf=1)."""
+    return st.query_params.get("perf") == "1"
+
+
+def file_version(path):
+    """Phiên bản của file dữ liệu: tên, kích thước và thời điểm sửa (None nếu không đọc được)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def start_page(name, data_version=None):
+    """Bắt đầu đo một lần chạy script `name` (không làm gì khi tắt cả panel lẫn trace log)."""
+    previous = st.session_state.pop(_RUN_KEY, None)
+    panel, trace = is_enabled(), trace_enabled()
+    if previous is not None and previous["trace"] and not previous.get("traced"):
+        # Lần chạy trước không tới được end_page() (st.stop() hoặc exception)
+        _write_trace(previous, complete=False)
+    if not (panel or trace):
+        return
+    st.session_state[_RUN_KEY] = {
+        "page": name,
+        "start": time.perf_counter(),
+        "ts": dt.datetime.now(dt.timezone.utc).isoformat(timespec="milliseconds"),
+        "trigger": _detect_trigger(_widget_snapshot()) if trace else None,
+        "data_version": data_version,
+        "trace": trace,
+        "sections": [],
+        "frames": {},
+        "cache_start": cache_counts(),
+        "panel": st.sidebar.empty() if panel else None,
+    }
+
+
+@contextmanager
+def _timed(run, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run["sections"].append((name, time.perf_counter() - start))
+        _render(run)
+
+
+def section(name):
+    """Context manager đo thời gian khối lệnh bên trong với tên `name`."""
+    run = st.session_state.get(_RUN_KEY)
+    if run is None:
+        return nullcontext()
+    return _timed(run, name)
+
+
+def track_frame(label, df):
+    """Ghi lại kích thước và bộ nhớ của một DataFrame đang dùng."""
+    run = st.session_state.get(_RUN_KEY)
+    if run is None or df is None:
+        return
+    mb = df.memory_usage(deep=True).sum() / 2**20 if run["panel"] is not None else None
+    run["frames"][label] = (len(df), df.shape[1], mb)
+
+
+def end_page():
+    """Hiện số liệu cuối cùng và ghi bản ghi trace."""
+    run = st.session_state.get(_RUN_KEY)
+    if run is None:
+        return
+    run["total"] = time.perf_counter() - run["start"]
+    _render(run)
+    if run["trace"]:
+        _write_trace(run, complete=True)
+        # Giá trị widget khi lần chạy kết thúc, để nhận ra widget người dùng đổi ở lần sau
+        st.session_state[_WIDGETS_KEY] = _widget_snapshot()
+
+
+# ------------------------------------------------------------------
+# Panel
+# ------------------------------------------------------------------
+def _render(run):
+    """Vẽ lại panel ở sidebar; gọi sau mỗi phần để vẫn còn khi st.stop()."""
+    if run["panel"] is None:
+        return
+    elapsed = run.get("total", time.perf_counter() - run["start"])
+    cache = pd.DataFrame([{"Function": name, "Hits": h, "Misses": m}
+                          for name, (h, m) in sorted(_cache_delta(run["cache_start"]).items())])
+
+    with run["panel"].container():
+        with st.expander("⏱️ Performance", expanded=True):
+            status = "" if "total" in run else " (running)"
+            st.caption(f"{run['page']}: {elapsed * 1000:,.0f} ms{status}")
+            if run["sections"]:
+                sections = pd.DataFrame(run["sections"], columns=["Section", "Seconds"])
+                sections["ms"] = (sections.pop("Seconds") * 1000).round(1)
+                sections["%"] = (sections["ms"] / max(elapsed * 1000, 1e-9) * 100).round(1)
+                st.dataframe(sections, hide_index=True, use_container_width=True)
+            if not cache.empty:
+                st.caption(f"Cache: {cache['Hits'].sum()} hits, {cache['Misses'].sum()} misses")
+                st.dataframe(cache, hide_index=True, use_container_width=True)
+            for label, (rows, cols, mb) in run["frames"].items():
+                st.caption(f"{label}: {rows:,} rows × {cols} cols, {mb:,.1f} MB")
+            rss = rss_mb()
+            if rss is not None:
+                st.caption(f"Process RSS: {rss:,.0f} MB")
@@ -0,0 +1,63 @@
+"""Import matplotlib/seaborn ở lần vẽ đầu tiên thay vì khi khởi động app."""
+
+import threading
+
+import numpy as np
+
+_lock = threading.Lock()
+_themed = False
+
+
+def get_seaborn():
+    """Trả về seaborn, áp dụng theme biểu đồ của story một lần cho cả process.
+
+    seaborn kéo theo matplotlib và một phần scipy (~1-2s trên máy yếu); import
+    muộn giúp tiêu đề và dữ liệu hiện ra trước khi thư viện vẽ được nạp.
+    """
+    global _themed
+    import seaborn as sns
+
+    with _lock:
+        if not _themed:
+            sns.set_theme(style="whitegrid")
+            sns.set_palette("Set2")
+            _themed = True
+    return sns
+
+
+def subplots(figsize):
+    """(fig, ax, sns) với Figure tạo trực tiếp, không qua pyplot.
+
+    Không đụng tới state toàn cục của pyplot nên vẽ được ở thread nền (xem
+    figure_cache.prerender) và không cần plt.close() sau khi dùng.
+    """
+    sns = get_seaborn()
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots(), sns
+
+
+def annotate_rates(ax, rates, x, order=None):
+    """Vẽ khoảng tin cậy 95% (cột ci_low/ci_high của churn_cube.churn_rates) và nhãn tỷ lệ trên các cột.
+
+    `order` giống tham số order đã truyền cho sns.barplot (mặc định: thứ tự các dòng của `rates`).
+    Nhãn đặt phía trên thanh khoảng tin cậy để không bị che. Nhóm trong `order` không có
+    khách nào được bỏ qua (cột trống như sns.barplot).
+    """
+    rows = rates.set_index(x)[['Churn', 'ci_low', 'ci_high']]
+    rows = rows.reindex(list(order) if order is not None else list(rates[x]))
+    positions = np.arange(len(rows))
+    present = rows['Churn'].notna().to_numpy()
+    if not present.any():
+        return
+    positions, rows = positions[present], rows[present]
+    ax.errorbar(
+        positions, rows['Churn'],
+        yerr=[rows['Churn'] - rows['ci_low'], rows['ci_high'] - rows['Churn']],
+        fmt='none', ecolor='#2c3e50', elinewidth=1.2, capsize=5,
+    )
+    for position, rate, top in zip(positions, rows['Churn'], rows['ci_high']):
+        ax.annotate(f'{rate:.2f}', (position, top), xytext=(0, 3), textcoords='offset points',
+                    ha='center', va='bottom')
+    ax.set_ylim(0, max(ax.get_ylim()[1], rows['ci_high'].max() * 1.15))
@@ -0,0 +1,147 @@
+"""Mô hình dự đoán churn và chấm điểm rủi ro cho toàn bộ khách hàng.
+
+- Huấn luyện HistGradientBoostingClassifier trên các cột phân tích của
+  load_and_prepare_data (tối đa TRAIN_SAMPLE dòng; nhiều hơn không cải thiện
+  đáng kể mà chỉ chậm hơn), kèm AUC trên tập kiểm tra.
+- Mô hình và điểm được lưu trong models/ theo phiên bản dữ liệu; khởi động
+  lại app thì nạp lại mô hình đã lưu (joblib) và điểm (.npy), không huấn
+  luyện hay chấm điểm lại.
+- Chấm điểm theo từng khối SCORE_CHUNK dòng (bộ nhớ có giới hạn); predict của
+  HistGradientBoosting tự chạy song song trên mọi core (OpenMP).
+- Điểm lưu dạng uint8 (0-100 = xác suất churn theo %), 1 byte mỗi khách hàng.
+
+scikit-learn là phụ thuộc tùy chọn: has_sklearn() cho biết có dùng được không.
+"""
+
+import hashlib
+import importlib.util
+import json
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+MODEL_DIR = os.environ.get("CHURN_MODEL_DIR",
+                           os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models"))
+
+FEATURES = [
+    'Is_New_Customer', 'Is_High_Charge', 'Is_Electronic_Check', 'Is_Mailed_Check',
+    'AccountAge', 'MonthlyCharges', 'ViewingHoursPerWeek', 'UserRating', 'SupportTicketsPerMonth',
+]
+TRAIN_SAMPLE = 200_000
+SCORE_CHUNK = 500_000
+TOP_N = 20
+
+# Các cột phân khúc dùng để tổng hợp doanh thu có rủi ro
+SEGMENT_COLUMNS = ['Combined_Risk_Segment', 'Payment_Group_Detail', 'SubscriptionType']
+
+
+def has_sklearn():
+    return importlib.util.find_spec("sklearn") is not None
+
+
+def feature_matrix(df):
+    return df[FEATURES].to_numpy(dtype=np.float32)
+
+
+def train_model(df, seed=0):
+    """(model, AUC trên 20% kiểm tra) huấn luyện trên tối đa TRAIN_SAMPLE dòng."""
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    sample = df.sample(n=min(len(df), TRAIN_SAMPLE), random_state=seed)
+    X_train, X_test, y_train, y_test = train_test_split(
+        feature_matrix(sample), sample['Churn'].to_numpy(), test_size=0.2,
+        random_state=seed, stratify=sample['Churn'].to_numpy())
+    model = HistGradientBoostingClassifier(max_iter=200, learning_rate=0.1, max_leaf_nodes=31,
+                                           early_stopping=True, random_state=seed)
+    model.fit(X_train, y_train)
+    auc = roc_auc_score(y_test, model.predict_proba(X_test)[:, 1])
+    return model, float(auc)
+
+
+def score(model, df, chunk_size=SCORE_CHUNK):
+    """Điểm rủi ro uint8 (0-100) cho mọi dòng của df, chấm theo từng khối."""
+    scores = np.empty(len(df), dtype=np.uint8)
+    for start in range(0, len(df), chunk_size):
+        chunk = feature_matrix(df.iloc[start:start + chunk_size])
+        probability = model.predict_proba(chunk)[:, 1]
+        scores[start:start + len(chunk)] = np.rint(probability * 100).astype(np.uint8)
+    return scores
+
+
+@dataclass(frozen=True)
+class RiskScores:
+    """Mô hình, điểm của toàn bộ khách hàng và các bảng tổng hợp sẵn để hiển thị."""
+    model: object
+    scores: np.ndarray
+    auc: float
+    revenue_at_risk: float
+    top_customers: pd.DataFrame
+    by_segment: dict
+
+
+def _paths(data_version):
+    key = hashlib.sha1(str(data_version).encode()).hexdigest()[:12]
+    base = os.path.join(MODEL_DIR, f"churn_risk_{key}")
+    return base + ".joblib", base + ".scores.npy", base + ".json"
+
+
+def _load_or_build(df, data_version):
+    """(model, scores, auc) từ models/ nếu đã có cho phiên bản dữ liệu này, ngược lại huấn luyện và lưu lại.
+
+    Có mô hình mà thiếu (hoặc lệch) file điểm thì chỉ chấm điểm lại bằng mô hình đã lưu.
+    """
+    import joblib
+
+    model_path, scores_path, meta_path = _paths(data_version)
+    if data_version is not None and os.path.exists(model_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("features") == FEATURES:
+            model = joblib.load(model_path)
+            scores = np.load(scores_path) if os.path.exists(scores_path) else None
+            if scores is None or len(scores) != len(df):
+                scores = score(model, df)
+                np.save(scores_path, scores)
+            return model, scores, meta["auc"]
+
+    model, auc = train_model(df)
+    scores = score(model, df)
+    if data_version is not None:
+        os.makedirs(MODEL_DIR, exist_ok=True)
+        joblib.dump(model, model_path)
+        np.save(scores_path, scores)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"data_version": data_version, "auc": auc, "features": FEATURES}, f)
+    return model, scores, auc
+
+
+def build_risk_scores(df, data_version=None, top_n=TOP_N):
+    """RiskScores cho df: điểm, doanh thu có rủi ro (MonthlyCharges x xác suất) theo phân khúc, top khách hàng."""
+    model, scores, auc = _load_or_build(df, data_version)
+    probability = scores.astype(np.float32) / 100
+    at_risk = df['MonthlyCharges'].to_numpy(dtype=np.float64) * probability
+
+    by_segment = {}
+    for column in SEGMENT_COLUMNS:
+        if column not in df.columns:
+            continue
+        table = pd.DataFrame({column: df[column].to_numpy(), 'risk': probability, 'at_risk': at_risk})
+        by_segment[column] = (table.groupby(column, observed=True)
+                              .agg(customers=('risk', 'size'), avg_risk=('risk', 'mean'),
+                                   revenue_at_risk=('at_risk', 'sum'))
+                              .sort_values('revenue_at_risk', ascending=False)
+                              .reset_index())
+
+    top = np.argpartition(scores, -min(top_n, len(df)))[-top_n:] if len(df) else np.array([], dtype=int)
+    top = top[np.lexsort((-at_risk[top], -scores[top]))]
+    top_customers = df.iloc[top][[c for c in ('CustomerID', 'AccountAge', 'MonthlyCharges', 'PaymentMethod',
+                                              'SupportTicketsPerMonth') if c in df.columns]].copy()
+    top_customers['risk'] = probability[top]
+    top_customers['revenue_at_risk'] = at_risk[top]
+
+    return RiskScores(model=model, scores=scores, auc=auc, revenue_at_risk=float(at_risk.sum()),
+                      top_customers=top_customers.reset_index(drop=True), by_segment=by_segment)
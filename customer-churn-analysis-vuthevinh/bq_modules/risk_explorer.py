@@ -0,0 +1,63 @@
+"""Risk Scoring - khách hàng rủi ro cao nhất và doanh thu có rủi ro theo phân khúc."""
+
+import streamlit as st
+
+from . import perf
+from .risk import SEGMENT_COLUMNS, build_risk_scores, has_sklearn
+
+SEGMENT_LABELS = {
+    'Combined_Risk_Segment': 'Phân khúc Toxic Combo',
+    'Payment_Group_Detail': 'Nhóm thanh toán',
+    'SubscriptionType': 'Gói dịch vụ',
+}
+
+
+@perf.cache_resource(show_spinner="Đang huấn luyện mô hình và chấm điểm toàn bộ khách hàng...")
+def _risk_scores(data_version, _df):
+    return build_risk_scores(_df, data_version)
+
+
+def render_risk_panel(df, data_version):
+    """Bật để chấm điểm (một lần cho mỗi phiên bản dữ liệu, lưu trong models/) và xem kết quả."""
+
+    with st.expander("🎯 Chấm điểm rủi ro churn & doanh thu có rủi ro"):
+        if not has_sklearn():
+            st.info("Cần cài scikit-learn để dùng mô hình dự đoán churn: `pip install scikit-learn`.")
+            return
+        if not st.toggle("Chấm điểm rủi ro cho toàn bộ khách hàng", key="risk_enabled"):
+            st.caption("Lần đầu cần huấn luyện mô hình; sau đó điểm được lưu lại cho phiên bản dữ liệu này.")
+            return
+
+        risk = _risk_scores(data_version, df)
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Doanh thu/tháng có rủi ro", f"${risk.revenue_at_risk:,.0f}",
+                    help="Tổng MonthlyCharges x xác suất churn dự đoán")
+        col2.metric("Khách hàng rủi ro >= 50%", f"{int((risk.scores >= 50).sum()):,}")
+        col3.metric("AUC (tập kiểm tra)", f"{risk.auc:.3f}")
+
+        columns = [c for c in SEGMENT_COLUMNS if c in risk.by_segment]
+        segment_column = st.selectbox("Tổng hợp theo", columns, format_func=lambda c: SEGMENT_LABELS.get(c, c),
+                                      key="risk_segment")
+        st.dataframe(
+            risk.by_segment[segment_column],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                segment_column: SEGMENT_LABELS.get(segment_column, segment_column),
+                'customers': st.column_config.NumberColumn("Số khách", format="%d"),
+                'avg_risk': st.column_config.NumberColumn("Rủi ro TB", format="percent"),
+                'revenue_at_risk': st.column_config.NumberColumn("Doanh thu có rủi ro", format="dollar"),
+            },
+        )
+
+        st.markdown(f"**Top {len(risk.top_customers)} khách hàng rủi ro cao nhất**")
+        st.dataframe(
+            risk.top_customers,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'risk': st.column_config.ProgressColumn("Xác suất churn", format="percent", min_value=0, max_value=1),
+                'revenue_at_risk': st.column_config.NumberColumn("Doanh thu có rủi ro", format="dollar"),
+            },
+        )
@@ -0,0 +1,140 @@
+"""Segment Explorer - tự ghép điều kiện, hoặc để app tự tìm, các phân khúc churn cao."""
+
+import os
+from functools import partial
+
+import streamlit as st
+
+from . import perf
+from .export import export_segment, has_parquet
+from .subgroups import discover_subgroups
+
+# Nhóm "Toxic Combo" của BQ1: Mới + Phí cao + Thanh toán thủ công
+TOXIC_COMBO_SELECTION = {
+    'new': ['Mới (<= 3 tháng)'],
+    'charge': ['Phí cao (Top 25%)'],
+    'payment': ['Electronic check', 'Mailed check'],
+}
+
+# File lớn hơn mức này chỉ ghi ra exports/, không gửi qua trình duyệt (tải về phải nằm trọn trong RAM)
+DOWNLOAD_MAX_BYTES = 200 * 1024 * 1024
+
+
+def select_segment(selection):
+    """Điền sẵn các multiselect của Segment Explorer (dùng làm on_click callback)."""
+    for group_key, levels in selection.items():
+        st.session_state[f"seg_{group_key}"] = list(levels)
+
+
+def render_segment_explorer(index, df=None):
+    """Multiselect cho từng nhóm điều kiện; số liệu lấy từ BitmapIndex (AND/OR bitset + popcount).
+
+    Có df thì kèm phần xuất danh sách khách hàng của phân khúc.
+    """
+
+    with st.expander("🧩 Tự xây phân khúc: ghép các điều kiện và xem tỷ lệ churn"):
+        st.caption("Chọn nhiều mức trong một nhóm = HOẶC; giữa các nhóm = VÀ. Để trống = không lọc nhóm đó.")
+
+        selection = {}
+        columns = st.columns(3)
+        for i, (group_key, group) in enumerate(index.groups.items()):
+            with columns[i % 3]:
+                selection[group_key] = st.multiselect(group.label, options=index.levels[group_key],
+                                                      key=f"seg_{group_key}")
+
+        segment = index.stats(selection)
+        overall = index.stats({})
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Số khách hàng", f"{segment['size']:,}")
+        if segment['size']:
+            delta = (segment['churn_rate'] - overall['churn_rate']) * 100
+            col2.metric("Tỷ lệ Churn", f"{segment['churn_rate']:.1%}", f"{delta:+.1f} điểm % so với toàn bộ",
+                        delta_color="inverse")
+        else:
+            col2.metric("Tỷ lệ Churn", "-")
+        col3.metric("Tỷ trọng khách hàng", f"{segment['share']:.1%}")
+        col4.metric("Tỷ trọng tổng số Churn", f"{segment['churn_share']:.1%}")
+
+        if df is not None and segment['size']:
+            _render_export(index, df, selection, segment['size'])
+
+
+def _read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _render_export(index, df, selection, size):
+    """Ghi danh sách khách hàng của phân khúc ra exports/ theo từng khối, rồi cho tải về."""
+
+    st.markdown(f"**📤 Xuất danh sách {size:,} khách hàng của phân khúc này**")
+    formats = ['csv', 'parquet'] if has_parquet() else ['csv']
+    col1, col2 = st.columns([1, 2])
+    fmt = col1.radio("Định dạng", formats, format_func=str.upper, horizontal=True, key="seg_export_format")
+    key = (tuple((g, tuple(levels)) for g, levels in selection.items() if levels), fmt)
+    if col2.button("Ghi file", key="seg_export_write"):
+        name = 'segment_' + ('_'.join(group_key for group_key, _ in key[0]) or 'all')
+        with st.spinner("Đang ghi danh sách khách hàng..."):
+            path, rows = export_segment(df, index.mask(selection), fmt, name)
+        st.session_state.seg_export = (key, path, rows)
+
+    exported = st.session_state.get('seg_export')
+    if not exported or exported[0] != key or not os.path.exists(exported[1]):
+        return
+    _, path, rows = exported
+    file_size = os.path.getsize(path)
+    st.caption(f"Đã ghi {rows:,} dòng ({file_size / 1024 / 1024:.1f} MB) vào `{path}`.")
+    if file_size <= DOWNLOAD_MAX_BYTES:
+        # data là hàm: file chỉ được đọc khi bấm tải về, không phải ở mỗi lần rerun
+        st.download_button("Tải về", data=partial(_read_bytes, path), file_name=os.path.basename(path),
+                           mime='text/csv' if fmt == 'csv' else 'application/octet-stream',
+                           key="seg_export_download")
+    else:
+        st.info("File quá lớn để tải qua trình duyệt; lấy trực tiếp từ đường dẫn trên.")
+
+
+@perf.cache_resource(show_spinner="Đang tìm các phân khúc churn cao...", max_entries=16)
+def _discover(data_version, max_depth, min_support, _index):
+    return discover_subgroups(_index, max_depth=max_depth, min_support=min_support)
+
+
+def render_subgroup_discovery(index, data_version):
+    """Tìm tự động các tổ hợp điều kiện có lift churn cao nhất (như "Toxic Combo" của BQ1)."""
+
+    with st.expander("🔎 Tìm \"Toxic Combo\" tiếp theo: tự động dò các tổ hợp điều kiện"):
+        with st.form("sg_form", border=False):
+            col1, col2 = st.columns(2)
+            max_depth = col1.slider("Số điều kiện tối đa", 1, len(index.groups), 3, key="sg_depth")
+            min_support = col2.number_input("Độ phủ tối thiểu (%)", 0.1, 50.0, 0.5, step=0.1,
+                                            key="sg_min_support") / 100
+            submitted = st.form_submit_button("Tìm phân khúc", type="primary")
+        if submitted:
+            st.session_state.sg_params = (max_depth, min_support)
+        if 'sg_params' not in st.session_state:
+            return
+
+        max_depth, min_support = st.session_state.sg_params
+        result = _discover(data_version, max_depth, min_support, index)
+        if result.empty:
+            st.info("Không có phân khúc nào vừa đủ lớn vừa có churn cao hơn đáng kể mức chung.")
+            return
+        st.dataframe(
+            result,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'segment': st.column_config.TextColumn("Phân khúc", width="large"),
+                'depth': "Số điều kiện",
+                'size': st.column_config.NumberColumn("Số khách", format="%d"),
+                'coverage': st.column_config.NumberColumn("Độ phủ", format="percent"),
+                'churned': st.column_config.NumberColumn("Số churn", format="%d"),
+                'churn_rate': st.column_config.NumberColumn("Tỷ lệ Churn", format="percent"),
+                'lift': st.column_config.NumberColumn("Lift", format="%.2fx"),
+                'churn_share': st.column_config.NumberColumn("Tỷ trọng Churn", format="percent"),
+                'z': st.column_config.NumberColumn("z", format="%.1f"),
+                'p_value': st.column_config.NumberColumn("p-value", format="%.1e"),
+            },
+        )
+        st.caption("Lift = tỷ lệ churn của phân khúc / tỷ lệ churn chung; p-value: kiểm định z một phía, "
+                   "chưa hiệu chỉnh cho số tổ hợp đã thử.")
@@ -0,0 +1,84 @@
+"""Engine phân khúc khai báo cho bước chuẩn bị dữ liệu.
+
+Mỗi phân khúc là một danh sách luật (điều kiện, nhãn) có thứ tự: luật đầu tiên
+khớp quyết định nhãn của khách hàng, không khớp luật nào thì nhận nhãn mặc
+định. Điều kiện là biểu thức DataFrame.eval trên các cột (ví dụ
+"Is_New_Customer & Is_High_Charge"), nên toàn bộ được tính vector hóa bằng
+np.select thay vì gọi hàm Python cho từng dòng, và kết quả lưu dưới dạng
+pandas Categorical (mỗi dòng 1 byte thay vì một chuỗi).
+
+Thêm phân khúc mới = thêm một Segmentation vào SEGMENTS, không cần viết hàm mới.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Segmentation:
+    """Cột `column` được gán theo `rules` ((điều kiện, nhãn), ...) và nhãn `default`."""
+    column: str
+    rules: tuple
+    default: str
+
+    @property
+    def labels(self):
+        """Các nhãn theo thứ tự xuất hiện trong luật, nhãn mặc định ở cuối."""
+        return list(dict.fromkeys([label for _, label in self.rules] + [self.default]))
+
+    def evaluate(self, df):
+        labels = self.labels
+        code = {label: i for i, label in enumerate(labels)}
+        conditions = [np.asarray(df.eval(condition), dtype=bool) for condition, _ in self.rules]
+        choices = [code[label] for _, label in self.rules]
+        codes = np.select(conditions, choices, default=code[self.default]).astype(np.int8)
+        return pd.Categorical.from_codes(codes, categories=labels)
+
+
+# Nhóm các phương thức thanh toán (để vẽ TQ 1.3)
+PAYMENT_GROUP_DETAIL = Segmentation(
+    column='Payment_Group_Detail',
+    rules=(
+        ("Is_Electronic_Check", 'Electronic Check'),
+        ("Is_Mailed_Check", 'Mailed Check'),
+    ),
+    default='Others (Auto-pay)',
+)
+
+# Các phân khúc "Toxic Combo": Mới + Phí cao + Thanh toán thủ công (để vẽ TQ 1.4)
+COMBINED_RISK_SEGMENT = Segmentation(
+    column='Combined_Risk_Segment',
+    rules=(
+        ("Is_New_Customer & Is_High_Charge & Is_Electronic_Check", 'Toxic Combo (E-Check)'),
+        ("Is_New_Customer & Is_High_Charge & Is_Mailed_Check", 'Toxic Combo (Mailed Check)'),
+    ),
+    default='Others',
+)
+
+SEGMENTS = (PAYMENT_GROUP_DETAIL, COMBINED_RISK_SEGMENT)
+
+
+def apply_segments(df, segmentations=SEGMENTS):
+    """Thêm cột Categorical cho từng phân khúc (theo thứ tự, luật sau dùng được cột của phân khúc trước)."""
+    for segmentation in segmentations:
+        df[segmentation.column] = segmentation.evaluate(df)
+    return df
+
+
+def prepare_frame(df):
+    """Các cột phân tích của câu chuyện (cờ Mới, Phí cao, thanh toán thủ công và các phân khúc)."""
+    # 1. Flag khách hàng Mới (<= 3 tháng)
+    df['Is_New_Customer'] = df['AccountAge'] <= 3
+
+    # 2. Flag Phí cao (Top 25% toàn bộ dataset)
+    high_charge_threshold = df['MonthlyCharges'].quantile(0.75)
+    df['Is_High_Charge'] = df['MonthlyCharges'] > high_charge_threshold
+
+    # 3. Flag các phương thức thanh toán thủ công
+    df['Is_Electronic_Check'] = df['PaymentMethod'] == 'Electronic check'
+    df['Is_Mailed_Check'] = df['PaymentMethod'] == 'Mailed check'
+
+    # 4-5. Nhóm phương thức thanh toán (TQ 1.3) và các phân khúc "Toxic Combo" (TQ 1.4)
+    return apply_segments(df)
@@ -0,0 +1,171 @@
+"""Kho snapshot theo tháng (append-only) và tổng hợp churn theo từng snapshot.
+
+Mỗi tháng nhận một file khách hàng mới. ingest() chỉ đọc file của tháng đó:
+- ghi dữ liệu gốc vào raw/snapshot=<ngày>/part-0.parquet (dạng cột, không bao
+  giờ ghi đè; đọc lại được bằng pyarrow.dataset theo partition);
+- tính churn cube của snapshot (bq_modules/churn_cube.py) và lưu vào
+  aggregates/<ngày>.parquet, histogram các cột đầu vào (bq_modules/drift.py)
+  vào aggregates/<ngày>.profile.json, cùng aggregates/<ngày>.json (số khách,
+  ngưỡng phí cao, giờ xem TB...). File .json được ghi sau cùng nên đánh dấu
+  snapshot đã ingest xong.
+
+Lịch sử các chỉ số BQ và báo cáo drift chỉ đọc các file aggregates (vài trăm dòng mỗi tháng),
+không đọc lại dữ liệu gốc. Thư mục mặc định là data/snapshots (đổi bằng
+CHURN_SNAPSHOT_DIR). Ghi Parquet cần pyarrow.
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import pandas as pd
+
+from .churn_cube import QUADRANTS, ChurnCube, build_cube, churn_rates, quadrant_rates
+from .drift import SnapshotProfile, build_profile
+from .segments import COMBINED_RISK_SEGMENT, prepare_frame
+
+SNAPSHOT_DIR = os.environ.get(
+    "CHURN_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "snapshots"))
+
+
+def read_frame(path):
+    """Đọc file khách hàng (.parquet hoặc .csv)."""
+    return pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+
+
+def snapshot_date_from_name(path):
+    """Ngày snapshot suy ra từ tên file (..._2024-05.csv, churn_20240501.parquet...); None nếu không có."""
+    match = re.search(r'(20\d\d)[-_]?(0[1-9]|1[0-2])(?:[-_]?(0[1-9]|[12]\d|3[01]))?', os.path.basename(path))
+    if not match:
+        return None
+    year, month, day = match.groups()
+    return date(int(year), int(month), int(day or 1))
+
+
+def _paths(snapshot, store_dir):
+    key = snapshot.isoformat()
+    raw = os.path.join(store_dir, "raw", f"snapshot={key}", "part-0.parquet")
+    aggregates = os.path.join(store_dir, "aggregates", key)
+    return raw, aggregates + ".parquet", aggregates + ".profile.json", aggregates + ".json"
+
+
+def _write_atomic(path, write):
+    """Ghi vào file tạm rồi đổi tên, để người đọc không bao giờ thấy file ghi dở."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def list_snapshots(store_dir=None):
+    """Các ngày snapshot đã ingest xong, tăng dần."""
+    directory = os.path.join(store_dir or SNAPSHOT_DIR, "aggregates")
+    if not os.path.isdir(directory):
+        return []
+    return sorted(date.fromisoformat(name[:-5]) for name in os.listdir(directory)
+                  if name.endswith(".json") and not name.endswith(".profile.json"))
+
+
+def store_version(store_dir=None):
+    """Khóa cache của kho: danh sách snapshot (kho chỉ được ghi thêm, nên danh sách là đủ)."""
+    return tuple(s.isoformat() for s in list_snapshots(store_dir))
+
+
+def ingest(path, snapshot=None, store_dir=None):
+    """Thêm file khách hàng `path` làm snapshot ngày `snapshot`; trả về metadata của snapshot.
+
+    Chỉ xử lý file này. Snapshot đã có thì báo lỗi (kho append-only).
+    """
+    store_dir = store_dir or SNAPSHOT_DIR
+    snapshot = snapshot or snapshot_date_from_name(path)
+    if snapshot is None:
+        raise ValueError(f"Không suy ra được ngày snapshot từ tên file {path!r}; hãy truyền ngày cụ thể")
+    raw_path, cells_path, profile_path, meta_path = _paths(snapshot, store_dir)
+    if os.path.exists(meta_path):
+        raise FileExistsError(f"Snapshot {snapshot} đã có trong kho {store_dir}")
+
+    df = read_frame(path)
+    _write_atomic(raw_path, lambda tmp: df.to_parquet(tmp, index=False))
+
+    high_charge_threshold = float(df['MonthlyCharges'].quantile(0.75))
+    profile = build_profile(df)
+    cube = build_cube(prepare_frame(df))
+    meta = {
+        'snapshot': snapshot.isoformat(),
+        'source': os.path.basename(path),
+        'customers': cube.total,
+        'churned': int(cube.cells['churned'].sum()),
+        'avg_viewing': cube.avg_viewing,
+        'high_charge_threshold': high_charge_threshold,
+        'ingested_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    _write_atomic(cells_path, lambda tmp: cube.cells.to_parquet(tmp, index=False))
+    _write_atomic(profile_path, lambda tmp: _write_json(tmp, profile.to_dict()))
+    _write_atomic(meta_path, lambda tmp: _write_json(tmp, meta))
+    return meta
+
+
+def _write_json(path, payload):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def load_aggregate(snapshot, store_dir=None):
+    """(metadata, ChurnCube) của một snapshot, chỉ đọc các file aggregates."""
+    _, cells_path, _, meta_path = _paths(snapshot, store_dir or SNAPSHOT_DIR)
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    return meta, ChurnCube(cells=pd.read_parquet(cells_path), avg_viewing=meta['avg_viewing'])
+
+
+def load_profile(snapshot, store_dir=None):
+    """SnapshotProfile (histogram các cột đầu vào) của một snapshot; None nếu snapshot không có profile."""
+    _, _, profile_path, _ = _paths(snapshot, store_dir or SNAPSHOT_DIR)
+    if not os.path.exists(profile_path):
+        return None
+    with open(profile_path, encoding="utf-8") as f:
+        return SnapshotProfile.from_dict(json.load(f))
+
+
+@dataclass(frozen=True)
+class SnapshotHistory:
+    """Metadata (mỗi snapshot một dòng) và các ô churn cube của mọi snapshot (cột `snapshot`)."""
+    meta: pd.DataFrame
+    cells: pd.DataFrame
+
+    @classmethod
+    def from_aggregates(cls, aggregates):
+        """Ghép danh sách (metadata, ChurnCube) của từng snapshot."""
+        if not aggregates:
+            return cls(meta=pd.DataFrame(), cells=pd.DataFrame())
+        meta = pd.DataFrame([m for m, _ in aggregates])
+        meta['snapshot'] = pd.to_datetime(meta['snapshot'])
+        cells = pd.concat([cube.cells.assign(snapshot=pd.Timestamp(m['snapshot'])) for m, cube in aggregates],
+                          ignore_index=True)
+        return cls(meta=meta.sort_values('snapshot').set_index('snapshot'), cells=cells)
+
+    def __len__(self):
+        return len(self.meta)
+
+    def segment_churn(self):
+        """Tỷ lệ churn theo thời gian của từng phân khúc Toxic Combo (cột = nhãn phân khúc)."""
+        rates = churn_rates(self.cells, ['snapshot', 'Combined_Risk_Segment'])
+        table = rates.pivot(index='snapshot', columns='Combined_Risk_Segment', values='Churn')
+        return table.reindex(columns=[c for c in COMBINED_RISK_SEGMENT.labels if c in table.columns])
+
+    def quadrant_churn(self):
+        """Tỷ lệ churn theo thời gian của nhóm "Chán" và "Bực" (BQ2)."""
+        rates = quadrant_rates(self.cells, ['snapshot'])
+        return rates.pivot(index='snapshot', columns='Quadrant', values='Churn').reindex(
+            columns=list(QUADRANTS.values()))
+
+    def overall_churn(self):
+        return (self.meta['churned'] / self.meta['customers']).rename('Churn')
+
+
+def load_history(store_dir=None):
+    """SnapshotHistory của mọi snapshot trong kho."""
+    return SnapshotHistory.from_aggregates([load_aggregate(s, store_dir) for s in list_snapshots(store_dir)])
@@ -0,0 +1,147 @@
+"""Tự động tìm phân khúc churn cao ("Toxic Combo tiếp theo").
+
+Liệt kê các phép VÀ giữa các mức của BitmapIndex (mỗi nhóm tối đa một mức,
+vì các mức trong một nhóm loại trừ nhau) tới độ sâu `max_depth`, và xếp hạng
+theo lift (tỷ lệ churn / tỷ lệ chung), độ phủ và ý nghĩa thống kê (kiểm định
+z một phía so với tỷ lệ chung).
+
+Cây tìm kiếm được cắt tỉa bằng hai cận:
+- support: phân khúc nhỏ hơn `min_support` thì mọi phân khúc con cũng nhỏ hơn;
+- lift lạc quan: phân khúc con có ít nhất min_size khách thì tỷ lệ churn không
+  vượt quá churned / min_size, nên nhánh không thể vào top-k thì bỏ.
+
+Mỗi nút tính giao của bitset hiện tại với mọi mức ứng viên trong một phép AND
+trên mảng 2 chiều rồi popcount theo hàng. Các nhánh gốc (mức đầu tiên) chạy
+song song trên một process pool khi có nhiều CPU và dữ liệu lớn.
+"""
+
+import heapq
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .bitmap_index import popcount
+
+# Dưới mức này khởi động process con (~1-2s) tốn hơn cả lần tìm (vài chục ms ở 50k khách)
+PARALLEL_MIN_CUSTOMERS = 5_000_000
+
+RESULT_COLUMNS = ['segment', 'depth', 'size', 'coverage', 'churned', 'churn_rate',
+                  'lift', 'churn_share', 'z', 'p_value']
+
+# Bitset và tham số dùng chung trong mỗi process con (gửi một lần qua initializer)
+_worker_context = None
+
+
+def _row_popcount(words):
+    """Popcount theo từng hàng của mảng uint64 2 chiều."""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return np.array([popcount(row) for row in words], dtype=np.int64)
+
+
+def _p_value(z):
+    """P-value một phía (churn cao hơn tỷ lệ chung) theo phân phối chuẩn."""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _search(root, context):
+    """DFS các phân khúc có mức đầu tiên là `root`; trả về các phân khúc đạt ngưỡng (≤ top_k)."""
+    stack, churn, group_of, n, total_churned, max_depth, min_size, top_k, alpha = context
+    base_rate = total_churned / n
+    top = []  # min-heap (lift, size, items, churned, z, p) của top_k tốt nhất
+
+    def record(items, size, churned):
+        rate = churned / size
+        z = (rate - base_rate) / math.sqrt(base_rate * (1 - base_rate) / size)
+        p = _p_value(z)
+        if p > alpha:
+            return
+        entry = (rate / base_rate, size, items, churned, z, p)
+        if len(top) < top_k:
+            heapq.heappush(top, entry)
+        elif entry[:2] > top[0][:2]:
+            heapq.heapreplace(top, entry)
+
+    mask = stack[root]
+    size = popcount(mask)
+    if size < min_size:
+        return []
+    churned = popcount(mask & churn)
+    record((root,), size, churned)
+
+    pending = [((root,), mask, churned)]
+    while pending:
+        items, mask, churned = pending.pop()
+        if len(items) == max_depth:
+            continue
+        # Cận trên của lift cho mọi phân khúc con đủ lớn
+        if len(top) == top_k and min(1.0, churned / min_size) / base_rate <= top[0][0]:
+            continue
+        candidates = np.flatnonzero(group_of > group_of[items[-1]])
+        if len(candidates) == 0:
+            continue
+        intersections = stack[candidates] & mask
+        sizes = _row_popcount(intersections)
+        churns = _row_popcount(intersections & churn)
+        for j in np.flatnonzero(sizes >= min_size):
+            child = items + (int(candidates[j]),)
+            record(child, int(sizes[j]), int(churns[j]))
+            pending.append((child, intersections[j], int(churns[j])))
+    return top
+
+
+def _init_worker(context):
+    global _worker_context
+    _worker_context = context
+
+
+def _search_in_worker(root):
+    return _search(root, _worker_context)
+
+
+def discover_subgroups(index, max_depth=3, min_support=0.01, top_k=15, alpha=0.05, n_jobs=None):
+    """Top `top_k` phân khúc theo lift (rồi độ phủ) trong BitmapIndex.
+
+    min_support: độ phủ tối thiểu (tỷ lệ trên tổng khách hàng).
+    alpha: ngưỡng p-value (một phía, chưa hiệu chỉnh; cột p_value để tự đánh giá).
+    n_jobs: số process (mặc định số CPU khi có từ PARALLEL_MIN_CUSTOMERS khách trở lên,
+            ngược lại 1 = chạy ngay trong process hiện tại).
+    """
+    items = [(group_key, level) for group_key, levels in index.levels.items() for level in levels]
+    group_order = {group_key: i for i, group_key in enumerate(index.levels)}
+    stack = np.stack([index.bitmaps[item] for item in items])
+    group_of = np.array([group_order[group_key] for group_key, _ in items])
+    min_size = max(1, math.ceil(min_support * index.n))
+    context = (stack, index.churn, group_of, index.n, index.total_churned,
+               max_depth, min_size, top_k, alpha)
+
+    if n_jobs is None:
+        n_jobs = (os.cpu_count() or 1) if index.n >= PARALLEL_MIN_CUSTOMERS else 1
+    roots = range(len(items))
+    if n_jobs > 1 and len(items) > 1:
+        # spawn: không fork cả server Streamlit (đang chạy nhiều thread)
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(items)),
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(context,)) as pool:
+            found = [entry for part in pool.map(_search_in_worker, roots) for entry in part]
+    else:
+        found = [entry for root in roots for entry in _search(root, context)]
+
+    best = sorted(found, key=lambda entry: entry[:2], reverse=True)[:top_k]
+    rows = [{
+        'segment': ' & '.join(items[i][1] for i in members),
+        'depth': len(members),
+        'size': size,
+        'coverage': size / index.n,
+        'churned': churned,
+        'churn_rate': churned / size,
+        'lift': lift,
+        'churn_share': churned / index.total_churned,
+        'z': z,
+        'p_value': p,
+    } for lift, size, members, churned, z, p in best]
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
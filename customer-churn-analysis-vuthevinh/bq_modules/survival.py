@@ -0,0 +1,104 @@
+"""Đường cong sống còn Kaplan-Meier theo Tuổi tài khoản (AccountAge).
+
+Mỗi khách hàng là một quan sát: AccountAge là thời gian theo dõi (tháng),
+Churn = 1 là sự kiện rời đi tại tháng đó, Churn = 0 là bị kiểm duyệt (vẫn
+còn ở lại). Khi load, dữ liệu được gom một lần thành số khách (n) và số churn
+(events) theo từng tháng và từng tầng (nhóm thanh toán, mức phí); vài trăm ô
+thay cho hàng triệu dòng. Ước lượng Kaplan-Meier cho mọi tầng sau đó là các
+phép cộng dồn/nhân dồn vector hóa theo nhóm trên các ô này:
+
+    at_risk(t) = số khách có AccountAge >= t
+    S(t)       = tích các (1 - events / at_risk) tới t
+    khoảng tin cậy: phương sai Greenwood, biến đổi log(-log S)
+"""
+
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from .intervals import CONFIDENCE
+
+# Các cột có thể dùng để phân tầng -> nhãn hiển thị
+STRATA = {
+    'Payment_Group_Detail': 'Nhóm thanh toán',
+    'Is_High_Charge': 'Mức phí',
+}
+CHARGE_LABELS = {True: 'Phí cao (Top 25%)', False: 'Phí thường'}
+
+
+def stratum_labels(frame, by):
+    """Nhãn hiển thị của tầng cho từng dòng (ví dụ "Electronic Check · Phí cao (Top 25%)")."""
+    if not by:
+        return pd.Series('Toàn bộ khách hàng', index=frame.index)
+    parts = [frame[c].map(CHARGE_LABELS) if c == 'Is_High_Charge' else frame[c].astype(str) for c in by]
+    labels = parts[0]
+    for part in parts[1:]:
+        labels = labels + ' · ' + part
+    return labels
+
+
+def kaplan_meier(cells, by=(), confidence=CONFIDENCE):
+    """Kaplan-Meier cho mọi tầng của `by` cùng lúc từ các ô (by..., AccountAge, n, events).
+
+    Trả về một dòng cho mỗi (tầng, tháng): stratum, AccountAge, at_risk, events,
+    survival, ci_low, ci_high.
+    """
+    by = list(by)
+    table = (cells.groupby(by + ['AccountAge'], observed=True)[['n', 'events']].sum()
+             .reset_index().sort_values(by + ['AccountAge'], ignore_index=True))
+    table.insert(0, 'stratum', stratum_labels(table, by))
+    strata = table.groupby('stratum', sort=False)
+
+    n = table['n'].to_numpy(dtype=float)
+    events = table['events'].to_numpy(dtype=float)
+    at_risk = strata['n'].transform('sum').to_numpy() - strata['n'].cumsum().to_numpy() + n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['hazard'] = events / at_risk
+        table['greenwood'] = events / (at_risk * (at_risk - events))
+        table['log_survival'] = np.log1p(-table['hazard'])
+    survival = np.exp(strata['log_survival'].cumsum().to_numpy())
+
+    # Greenwood: Var(log S) = tổng d / (r (r - d)); khoảng tin cậy trên thang log(-log S)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_s = np.log(survival)
+        margin = z * np.sqrt(strata['greenwood'].cumsum().to_numpy()) / np.abs(log_s)
+        ci_low = np.exp(-np.exp(np.log(-log_s) + margin))
+        ci_high = np.exp(-np.exp(np.log(-log_s) - margin))
+    undefined = (survival >= 1) | (survival <= 0)
+
+    return table[['stratum', *by, 'AccountAge', 'events']].assign(
+        at_risk=at_risk.astype(np.int64),
+        survival=survival,
+        ci_low=np.where(undefined, survival, ci_low),
+        ci_high=np.where(undefined, survival, ci_high),
+    )
+
+
+def median_survival(curves):
+    """Tháng đầu tiên S(t) <= 0.5 của từng tầng (NaN nếu đường cong chưa xuống tới 50%)."""
+    strata = curves['stratum'].drop_duplicates()
+    below = curves[curves['survival'] <= 0.5]
+    return below.groupby('stratum', sort=False)['AccountAge'].first().reindex(strata)
+
+
+@dataclass(frozen=True)
+class SurvivalTable:
+    """Số khách (n) và số churn (events) theo (STRATA..., AccountAge)."""
+    cells: pd.DataFrame
+
+    def curves(self, by=()):
+        """Kaplan-Meier theo các cột phân tầng `by` (tập con của STRATA)."""
+        return kaplan_meier(self.cells, by)
+
+
+def build_survival_table(df):
+    """Quét df một lần (sau load_and_prepare_data) và trả về SurvivalTable."""
+    columns = [c for c in STRATA if c in df.columns]
+    cells = (df[columns + ['AccountAge']].assign(events=df['Churn'].to_numpy())
+             .groupby(columns + ['AccountAge'], observed=True)['events']
+             .agg(n='size', events='sum')
+             .reset_index())
+    return SurvivalTable(cells=cells)
@@ -0,0 +1,71 @@
+"""Survival View - khách hàng ở lại bao lâu, theo nhóm thanh toán và mức phí."""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from . import perf
+from .survival import STRATA, median_survival
+
+# Các cách phân tầng -> nhãn
+STRATIFICATIONS = {
+    (): 'Không phân tầng',
+    ('Payment_Group_Detail',): STRATA['Payment_Group_Detail'],
+    ('Is_High_Charge',): STRATA['Is_High_Charge'],
+    ('Payment_Group_Detail', 'Is_High_Charge'): f"{STRATA['Payment_Group_Detail']} x {STRATA['Is_High_Charge']}",
+}
+
+# Các mốc tuổi tài khoản (tháng) hiển thị trong bảng
+MILESTONES = (3, 12, 24)
+
+
+@perf.cache_resource(show_spinner=False, max_entries=16)
+def _curves(data_version, by, _table):
+    return _table.curves(by)
+
+
+def _survival_at(curves, month):
+    """S(month) của từng tầng: giá trị tại tháng lớn nhất <= month (đường bậc thang).
+
+    Mọi tầng đều có một dòng, theo thứ tự của curves; tầng chưa có dữ liệu tới month là NaN.
+    """
+    before = curves[curves['AccountAge'] <= month]
+    at = before.groupby('stratum', sort=False)[['survival', 'ci_low', 'ci_high']].last()
+    return at.reindex(curves['stratum'].drop_duplicates())
+
+
+def render_survival_view(table, data_version):
+    """Đường Kaplan-Meier theo AccountAge; mỗi cách phân tầng tính một lần rồi cache."""
+
+    with st.expander("⏳ Phân tích sống còn: khách hàng ở lại được bao lâu?"):
+        st.caption("BQ1 rút gọn tuổi tài khoản thành cờ Mới (<= 3 tháng). Đường Kaplan-Meier cho thấy tỷ lệ "
+                   "khách còn ở lại theo từng tháng; khách chưa churn được tính tới tuổi tài khoản hiện tại.")
+        by = st.radio("Phân tầng theo", list(STRATIFICATIONS), format_func=STRATIFICATIONS.get,
+                      horizontal=True, key="surv_strata")
+        curves = _curves(data_version, by, table)
+
+        chart = curves.pivot(index='AccountAge', columns='stratum', values='survival').ffill()
+        st.line_chart(chart, x_label="Tuổi tài khoản (tháng)", y_label="Tỷ lệ còn ở lại", height=320)
+
+        summary = pd.DataFrame({'median': median_survival(curves)})
+        for month in MILESTONES:
+            summary[f"S{month}"] = _survival_at(curves, month)['survival']
+        last = MILESTONES[-1]
+        at_last = _survival_at(curves, last).reindex(summary.index)
+        summary[f"ci{last}"] = [f"{low:.1%} - {high:.1%}" if not np.isnan(low) else "-"
+                                for low, high in zip(at_last['ci_low'], at_last['ci_high'])]
+        st.dataframe(
+            summary.reset_index(),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'stratum': "Tầng",
+                'median': st.column_config.NumberColumn("Trung vị (tháng)", format="%d",
+                                                        help="Tháng đầu tiên còn <= 50% khách ở lại"),
+                **{f"S{month}": st.column_config.NumberColumn(f"Còn ở lại sau {month} tháng", format="percent")
+                   for month in MILESTONES},
+                f"ci{last}": f"KTC 95% sau {last} tháng",
+            },
+        )
+        st.caption("Khoảng tin cậy: phương sai Greenwood trên thang log(-log S). "
+                   "Trung vị trống nghĩa là đường cong chưa xuống tới 50%.")
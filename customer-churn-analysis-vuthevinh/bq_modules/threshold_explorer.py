@@ -0,0 +1,44 @@
+"""Threshold Explorer - thử các ngưỡng khác với ngưỡng của câu chuyện."""
+
+import streamlit as st
+
+from .thresholds import THRESHOLDS
+
+
+def _operators(spec):
+    return ('<=', '>') if spec.equal_goes == 'below' else ('<', '>=')
+
+
+def render_threshold_explorer(curves):
+    """Slider ngưỡng cho Tuổi tài khoản, Phí và Giờ xem; mọi con số tra từ ThresholdCurve."""
+
+    with st.expander("🎚️ Khám phá ngưỡng: nếu đổi mốc 3 tháng / Top 25% phí / giờ xem TB thì sao?"):
+        column = st.selectbox(
+            "Biến",
+            options=list(THRESHOLDS),
+            format_func=lambda c: THRESHOLDS[c].label,
+            key="thr_variable",
+        )
+        spec = THRESHOLDS[column]
+        curve = curves[column]
+        default = spec.default(curve)
+
+        if spec.step == 1:
+            threshold = st.slider(spec.label, int(curve.values[0]), int(curve.values[-1]),
+                                  int(default), step=1, key=f"thr_{column}")
+        else:
+            threshold = st.slider(spec.label, float(curve.values[0]), float(curve.values[-1]),
+                                  float(round(default, 2)), step=float(spec.step), key=f"thr_{column}")
+
+        op_below, op_above = _operators(spec)
+        split = curve.split(threshold, spec.equal_goes)
+        col1, col2 = st.columns(2)
+        for col, side, name, op in ((col1, 'below', spec.below, op_below), (col2, 'above', spec.above, op_above)):
+            n, _, rate = split[side]
+            col.metric(f"{name} ({op} {threshold:.4g})", f"{rate:.1%}" if n else "-",
+                       help=f"{n:,} khách hàng ({n / curve.total:.0%})")
+        st.caption(f"Ngưỡng câu chuyện đang dùng: {default:.4g}")
+
+        chart = curve.curve(equal_goes=spec.equal_goes).set_index('threshold')[['churn_below', 'churn_above']]
+        chart.columns = [f"Churn {spec.below}", f"Churn {spec.above}"]
+        st.line_chart(chart, x_label=spec.label, y_label="Tỷ lệ Churn", height=260)
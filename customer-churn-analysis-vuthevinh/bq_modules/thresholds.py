@@ -0,0 +1,117 @@
+"""Tỷ lệ churn hai phía của một ngưỡng bất kỳ, tra bằng searchsorted.
+
+Mỗi biến được sắp xếp một lần khi load thành các giá trị phân biệt cùng số
+khách và số churn cộng dồn. Sau đó tỷ lệ churn dưới/trên ngưỡng t chỉ cần
+một searchsorted (O(log n)) trên mảng đã sắp, và cả đường cong churn theo
+ngưỡng là một searchsorted vector hóa, không sao chép hay quét lại dữ liệu.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ThresholdSpec:
+    """Cách một ngưỡng chia khách hàng trong câu chuyện.
+
+    `equal_goes` cho biết giá trị đúng bằng ngưỡng thuộc nhóm nào: 'below'
+    (ví dụ AccountAge <= 3 là khách Mới) hay 'above' (ví dụ Giờ xem >= TB).
+    `default(curve)` trả về ngưỡng mà câu chuyện đang dùng.
+    """
+    label: str
+    below: str
+    above: str
+    equal_goes: str
+    step: float
+    default: object
+
+
+# Các ngưỡng được hard-code trong câu chuyện (load_and_prepare_data và churn cube)
+THRESHOLDS = {
+    'AccountAge': ThresholdSpec(
+        label='Tuổi tài khoản (tháng)', below='Mới', above='Cũ',
+        equal_goes='below', step=1, default=lambda curve: 3),
+    'MonthlyCharges': ThresholdSpec(
+        label='Phí hàng tháng', below='Phí thường', above='Phí cao',
+        equal_goes='below', step=0.5, default=lambda curve: curve.quantile(0.75)),
+    'ViewingHoursPerWeek': ThresholdSpec(
+        label='Giờ xem mỗi tuần', below='Gắn bó Thấp', above='Gắn bó Cao',
+        equal_goes='above', step=0.5, default=lambda curve: curve.mean()),
+}
+
+
+@dataclass(frozen=True)
+class ThresholdCurve:
+    """Giá trị phân biệt đã sắp `values` và số khách/số churn cộng dồn.
+
+    cum_n[j], cum_churn[j] = số khách, số churn có giá trị thuộc j giá trị nhỏ
+    nhất (phần tử đầu là 0, nên len = len(values) + 1).
+    """
+    values: np.ndarray
+    cum_n: np.ndarray
+    cum_churn: np.ndarray
+
+    @classmethod
+    def from_series(cls, values, churn):
+        values = np.asarray(values, dtype=float)
+        churn = np.asarray(churn, dtype=np.int64)
+        valid = ~np.isnan(values)
+        values, churn = values[valid], churn[valid]
+        order = np.argsort(values, kind='stable')
+        unique, start, counts = np.unique(values[order], return_index=True, return_counts=True)
+        churn_per_value = np.add.reduceat(churn[order], start) if len(start) else np.zeros(0, np.int64)
+        return cls(unique,
+                   np.concatenate([[0], np.cumsum(counts)]),
+                   np.concatenate([[0], np.cumsum(churn_per_value)]))
+
+    @property
+    def total(self):
+        return int(self.cum_n[-1])
+
+    def _below_index(self, threshold, equal_goes='below'):
+        side = 'right' if equal_goes == 'below' else 'left'
+        return np.searchsorted(self.values, threshold, side=side)
+
+    def split(self, threshold, equal_goes='below'):
+        """(số khách, số churn, tỷ lệ churn) của nhóm dưới và nhóm trên ngưỡng."""
+        k = self._below_index(threshold, equal_goes)
+        n_below, churn_below = int(self.cum_n[k]), int(self.cum_churn[k])
+        n_above, churn_above = self.total - n_below, int(self.cum_churn[-1]) - churn_below
+        return {
+            'below': (n_below, churn_below, churn_below / n_below if n_below else np.nan),
+            'above': (n_above, churn_above, churn_above / n_above if n_above else np.nan),
+        }
+
+    def curve(self, points=200, equal_goes='below'):
+        """Tỷ lệ churn dưới/trên và tỷ trọng nhóm dưới cho từng ngưỡng trên một lưới (tối đa `points`)."""
+        if len(self.values) <= points:
+            grid = self.values
+        else:
+            grid = np.linspace(self.values[0], self.values[-1], points)
+        k = self._below_index(grid, equal_goes)
+        n_below, churn_below = self.cum_n[k], self.cum_churn[k]
+        n_above, churn_above = self.total - n_below, self.cum_churn[-1] - churn_below
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'threshold': grid,
+                'churn_below': churn_below / n_below,
+                'churn_above': churn_above / n_above,
+                'share_below': n_below / self.total,
+            })
+
+    def quantile(self, q):
+        """Quantile chính xác (nội suy tuyến tính như pandas) từ các mảng cộng dồn."""
+        position = q * (self.total - 1)
+        lo, hi = int(np.floor(position)), int(np.ceil(position))
+        value_lo, value_hi = self.values[np.searchsorted(self.cum_n, [lo, hi], side='right') - 1]
+        return float(value_lo + (position - lo) * (value_hi - value_lo))
+
+    def mean(self):
+        return float((self.values * np.diff(self.cum_n)).sum() / self.total)
+
+
+def build_threshold_curves(df, specs=THRESHOLDS):
+    """{cột: ThresholdCurve} cho mọi biến trong `specs`."""
+    return {column: ThresholdCurve.from_series(df[column], df['Churn']) for column in specs}
@@ -0,0 +1,165 @@
+"""Sinh dữ liệu churn giả lập (cùng cấu trúc với data/churn.csv) để kiểm thử ở quy mô lớn.
+
+Ví dụ:
+    python generate_data.py --rows 250000                  # -> data/churn_synthetic.csv
+    python generate_data.py --rows 50000000 --out data/churn_50m_synthetic.parquet --toxic-lift 3
+    CHURN_DATA_PATH=data/churn_50m_synthetic.parquet streamlit run story_app.py
+"""
+
+import argparse
+import os
+import time
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+PAYMENT_METHODS = np.array(['Electronic check', 'Mailed check', 'Credit card', 'Bank transfer'])
+SUBSCRIPTION_TYPES = np.array(['Basic', 'Standard', 'Premium'])
+
+
+@dataclass(frozen=True)
+class ChurnEffects:
+    """Odds ratios của các yếu tố rủi ro (1.0 = không ảnh hưởng)."""
+    new_customer: float = 1.9        # AccountAge <= 3 tháng
+    high_charge: float = 1.35        # MonthlyCharges thuộc top 25%
+    electronic_check: float = 1.45
+    mailed_check: float = 1.25
+    toxic_combo: float = 2.0         # thêm khi Mới + Phí cao + Thanh toán thủ công cùng lúc
+    viewing_per_10h: float = 0.6     # mỗi 10 giờ xem/tuần
+    support_ticket: float = 1.12     # mỗi ticket/tháng
+    user_rating: float = 1.0         # mỗi sao (mặc định vô dụng, như trong story BQ2)
+
+
+def _logit_without_intercept(cols, effects):
+    """Tổng các log-odds của từng yếu tố cho một khối khách hàng."""
+    log = {f.name: np.log(getattr(effects, f.name)) for f in fields(effects)}
+    is_new = cols['AccountAge'] <= 3
+    is_high = cols['MonthlyCharges'] > cols['_high_charge_threshold']
+    is_echeck = cols['PaymentMethod'] == 'Electronic check'
+    is_mailed = cols['PaymentMethod'] == 'Mailed check'
+    return (log['new_customer'] * is_new
+            + log['high_charge'] * is_high
+            + log['electronic_check'] * is_echeck
+            + log['mailed_check'] * is_mailed
+            + log['toxic_combo'] * (is_new & is_high & (is_echeck | is_mailed))
+            + log['viewing_per_10h'] * (cols['ViewingHoursPerWeek'] - 20.0) / 10.0
+            + log['support_ticket'] * (cols['SupportTicketsPerMonth'] - 4.5)
+            + log['user_rating'] * (cols['UserRating'] - 3.0))
+
+
+def _draw_features(rng, n):
+    """Các cột đặc trưng (phân phối gần với bộ dữ liệu gốc)."""
+    account_age = rng.integers(1, 120, n)
+    monthly = np.round(rng.uniform(4.99, 19.99, n), 2)
+    return {
+        'AccountAge': account_age,
+        'MonthlyCharges': monthly,
+        'TotalCharges': np.round(monthly * account_age, 2),
+        'SubscriptionType': SUBSCRIPTION_TYPES[rng.integers(0, 3, n)],
+        'PaymentMethod': PAYMENT_METHODS[rng.integers(0, 4, n)],
+        'ViewingHoursPerWeek': np.round(rng.uniform(1.0, 40.0, n), 4),
+        'UserRating': np.round(rng.uniform(1.0, 5.0, n), 4),
+        'SupportTicketsPerMonth': rng.integers(0, 10, n),
+    }
+
+
+class ChurnGenerator:
+    """Sinh khách hàng theo từng khối; Churn ~ Bernoulli(sigmoid(intercept + hiệu ứng))."""
+
+    def __init__(self, n_rows=250_000, churn_rate=0.18, effects=None, seed=0):
+        self.n_rows = n_rows
+        self.effects = effects or ChurnEffects()
+        self.seed = seed
+        # Ngưỡng phí cao = phân vị 75% của phân phối đều (giống cách story_app tính trên dữ liệu)
+        self.high_charge_threshold = 4.99 + 0.75 * (19.99 - 4.99)
+        self.intercept = self._calibrate(churn_rate)
+
+    def _calibrate(self, churn_rate, n=200_000):
+        """Chọn intercept để tỷ lệ churn kỳ vọng bằng churn_rate (bisection trên một mẫu)."""
+        cols = _draw_features(np.random.default_rng([self.seed, 2**31]), n)
+        cols['_high_charge_threshold'] = self.high_charge_threshold
+        z = _logit_without_intercept(cols, self.effects)
+        lo, hi = -20.0, 20.0
+        for _ in range(60):
+            mid = (lo + hi) / 2
+            if (1 / (1 + np.exp(-(z + mid)))).mean() < churn_rate:
+                lo = mid
+            else:
+                hi = mid
+        return (lo + hi) / 2
+
+    def block(self, start, stop):
+        """DataFrame cho khách hàng thứ start..stop-1."""
+        rng = np.random.default_rng([self.seed, start])
+        n = stop - start
+        cols = _draw_features(rng, n)
+        cols['_high_charge_threshold'] = self.high_charge_threshold
+        p = 1 / (1 + np.exp(-(self.intercept + _logit_without_intercept(cols, self.effects))))
+        del cols['_high_charge_threshold']
+        cols['CustomerID'] = 'CUST' + pd.Series(np.arange(start, stop)).astype(str).str.zfill(9)
+        cols['Churn'] = (rng.random(n) < p).astype(np.int8)
+        return pd.DataFrame(cols)
+
+    def blocks(self, rows_per_block=2_000_000):
+        for start in range(0, self.n_rows, rows_per_block):
+            yield self.block(start, min(start + rows_per_block, self.n_rows))
+
+
+def generate(n_rows=250_000, churn_rate=0.18, effects=None, seed=0):
+    """Toàn bộ dữ liệu trong một DataFrame (dùng cho kích thước nhỏ)."""
+    return pd.concat(ChurnGenerator(n_rows, churn_rate, effects, seed).blocks(), ignore_index=True)
+
+
+def write(path, n_rows=250_000, churn_rate=0.18, effects=None, seed=0, rows_per_block=2_000_000, verbose=False):
+    """Ghi dữ liệu ra `path` theo từng khối (.csv hoặc .parquet - cần pyarrow). Trả về số dòng."""
+    gen = ChurnGenerator(n_rows, churn_rate, effects, seed)
+    parquet = path.endswith('.parquet')
+    if parquet and pa is None:
+        raise ImportError("Ghi Parquet cần pyarrow (pip install pyarrow)")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    writer, rows, started = None, 0, time.perf_counter()
+    try:
+        for i, df in enumerate(gen.blocks(rows_per_block)):
+            if pa is not None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema) if parquet else pa_csv.CSVWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                df.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            rows += len(df)
+            if verbose:
+                elapsed = time.perf_counter() - started
+                print(f"  {rows:,}/{n_rows:,} dòng ({rows / max(elapsed, 1e-9):,.0f} dòng/s)", flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+if __name__ == "__main__":
+    defaults = ChurnEffects()
+    parser = argparse.ArgumentParser(description="Sinh dữ liệu churn giả lập cho story_app.")
+    parser.add_argument("--rows", type=int, default=250_000, help="Số khách hàng")
+    parser.add_argument("--churn-rate", type=float, default=0.18, help="Tỷ lệ churn tổng thể")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rows-per-block", type=int, default=2_000_000)
+    parser.add_argument("--out", default=os.path.join("data", "churn_synthetic.csv"), help="File đầu ra (.csv hoặc .parquet)")
+    for f in fields(ChurnEffects):
+        flag = "--toxic-lift" if f.name == "toxic_combo" else "--" + f.name.replace("_", "-")
+        parser.add_argument(flag, dest=f.name, type=float, default=getattr(defaults, f.name),
+                            help=f"Odds ratio cho {f.name} (mặc định {getattr(defaults, f.name)})")
+    args = parser.parse_args()
+    effects = ChurnEffects(**{f.name: getattr(args, f.name) for f in fields(ChurnEffects)})
+    t0 = time.perf_counter()
+    n = write(args.out, args.rows, args.churn_rate, effects, args.seed, args.rows_per_block, verbose=True)
+    print(f"Đã ghi {n:,} dòng vào {args.out} trong {time.perf_counter() - t0:.1f}s")
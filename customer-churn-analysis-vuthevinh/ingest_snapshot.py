@@ -0,0 +1,36 @@
+"""Thêm file khách hàng của một tháng vào kho snapshot (bq_modules/snapshots.py).
+
+Chỉ file được truyền vào được đọc và tổng hợp; các snapshot cũ không bị đụng tới.
+
+Ví dụ:
+    python ingest_snapshot.py data/churn_2024-05.csv
+    python ingest_snapshot.py exports/customers.parquet --date 2024-06-01
+    CHURN_SNAPSHOT_DIR=/mnt/churn python ingest_snapshot.py data/churn_2024-07.parquet
+"""
+
+import argparse
+import time
+from datetime import date
+
+from bq_modules.snapshots import SNAPSHOT_DIR, ingest, list_snapshots
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Thêm snapshot khách hàng vào kho lịch sử churn.")
+    parser.add_argument("paths", nargs="+", help="File khách hàng (.csv hoặc .parquet), mỗi file một snapshot")
+    parser.add_argument("--date", type=date.fromisoformat, default=None,
+                        help="Ngày snapshot YYYY-MM-DD (mặc định: suy ra từ tên file; chỉ dùng với một file)")
+    parser.add_argument("--store", default=SNAPSHOT_DIR, help="Thư mục kho snapshot")
+    args = parser.parse_args()
+    if args.date and len(args.paths) > 1:
+        parser.error("--date chỉ dùng được khi ingest một file")
+
+    for path in args.paths:
+        t0 = time.perf_counter()
+        try:
+            meta = ingest(path, args.date, args.store)
+        except FileExistsError as e:
+            print(f"Bỏ qua {path}: {e}")
+            continue
+        print(f"Snapshot {meta['snapshot']}: {meta['customers']:,} khách, churn "
+              f"{meta['churned'] / meta['customers']:.1%} ({time.perf_counter() - t0:.1f}s)")
+    print(f"Kho {args.store} có {len(list_snapshots(args.store))} snapshot")
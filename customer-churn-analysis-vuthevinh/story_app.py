@@ -1,9 +1,21 @@
 """Data Storytelling App - Churn Analysis với Guided Flow."""
 
+import os
+
 import pandas as pd
-import seaborn as sns
 import streamlit as st
-from bq_modules import render_bq1, render_bq2
+from bq_modules import perf, render_bq1, render_bq2
+from bq_modules.bitmap_index import BitmapIndex
+from bq_modules.churn_cube import build_cube
+from bq_modules.distributions import build_sketches
+from bq_modules.history_explorer import render_drift_report, render_history
+from bq_modules.risk_explorer import render_risk_panel
+from bq_modules.segment_explorer import render_segment_explorer, render_subgroup_discovery
+from bq_modules.survival import build_survival_table
+from bq_modules.survival_explorer import render_survival_view
+from bq_modules.threshold_explorer import render_threshold_explorer
+from bq_modules.thresholds import build_threshold_curves
+from bq_modules.segments import prepare_frame
 
 # Cấu hình trang
 st.set_page_config(
@@ -12,58 +24,71 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Áp dụng theme cho biểu đồ
-sns.set_theme(style="whitegrid")
-sns.set_palette("Set2")
+# Theme cho biểu đồ được áp dụng khi import seaborn lần đầu (bq_modules.plotting)
+
+
+# Đường dẫn dữ liệu (có thể ghi đè bằng biến môi trường CHURN_DATA_PATH, ví dụ khi benchmark)
+DATA_PATH = os.environ.get(
+    "CHURN_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "churn.csv")
+)
+# Phiên bản dữ liệu (tên, kích thước, thời điểm sửa): khóa của cache biểu đồ và trace log
+DATA_VERSION = perf.file_version(DATA_PATH)
+perf.start_page("story_app", data_version=DATA_VERSION)
 
 
 # ========== LOAD & PREPARE DATA ==========
-@st.cache_data(show_spinner=False)
-def load_and_prepare_data():
+@perf.cache_data(show_spinner=False)
+def load_and_prepare_data(data_path=DATA_PATH):
     """Load dữ liệu từ file CSV và tạo các cột phân tích."""
-    # Load data
-    df = pd.read_csv("data/churn.csv")
-    
-    # 1. Flag khách hàng Mới (<= 3 tháng)
-    df['Is_New_Customer'] = df['AccountAge'] <= 3
-    
-    # 2. Flag Phí cao (Top 25% toàn bộ dataset)
-    high_charge_threshold = df['MonthlyCharges'].quantile(0.75)
-    df['Is_High_Charge'] = df['MonthlyCharges'] > high_charge_threshold
+    # Load data (file lớn sinh bởi generate_data.py thường là Parquet)
+    df = pd.read_parquet(data_path) if data_path.endswith(".parquet") else pd.read_csv(data_path)
     
-    # 3. Flag các phương thức thanh toán thủ công
-    df['Is_Electronic_Check'] = df['PaymentMethod'] == 'Electronic check'
-    df['Is_Mailed_Check'] = df['PaymentMethod'] == 'Mailed check'
-    
-    # 4. Nhóm các phương thức thanh toán (để vẽ TQ 1.3)
-    def payment_group_detail(row):
-        if row['Is_Electronic_Check']:
-            return 'Electronic Check'
-        elif row['Is_Mailed_Check']:
-            return 'Mailed Check'
-        else:
-            return 'Others (Auto-pay)'
-    df['Payment_Group_Detail'] = df.apply(payment_group_detail, axis=1)
-    
-    # 5. Xác định các phân khúc "Toxic Combo" (để vẽ TQ 1.4)
-    def combined_risk_segment(row):
-        is_new = row['Is_New_Customer']
-        is_high_charge = row['Is_High_Charge']
-        
-        if is_new and is_high_charge and row['Is_Electronic_Check']:
-            return 'Toxic Combo (E-Check)'
-        elif is_new and is_high_charge and row['Is_Mailed_Check']:
-            return 'Toxic Combo (Mailed Check)'
-        else:
-            return 'Others'
-    
-    df['Combined_Risk_Segment'] = df.apply(combined_risk_segment, axis=1)
-    
-    return df
+    # Các cờ (Mới, Phí cao, thanh toán thủ công) và phân khúc "Toxic Combo", khai báo trong
+    # bq_modules/segments.py và tính vector hóa
+    return prepare_frame(df)
+
+
+@perf.cache_resource(show_spinner=False)
+def build_churn_cube(data_version, _df):
+    """Churn cube (số khách/số churn theo tổ hợp các cờ), tính một lần cho mỗi phiên bản dữ liệu."""
+    return build_cube(_df)
+
+
+@perf.cache_resource(show_spinner=False)
+def build_distribution_sketches(data_version, _df):
+    """Quantile sketch của giờ xem và rating theo Churn (boxplot BQ2), tính một lần cho mỗi phiên bản dữ liệu."""
+    return build_sketches(_df)
+
+
+@perf.cache_resource(show_spinner=False)
+def build_curves(data_version, _df):
+    """Mảng đã sắp + churn cộng dồn cho các biến có ngưỡng (Threshold Explorer)."""
+    return build_threshold_curves(_df)
+
+
+@perf.cache_resource(show_spinner=False)
+def build_bitmap_index(data_version, _df):
+    """Bitset cho từng cờ/nhóm của khách hàng (Segment Explorer)."""
+    return BitmapIndex.from_frame(_df)
+
+
+@perf.cache_resource(show_spinner=False)
+def build_survival(data_version, _df):
+    """Số khách/số churn theo (nhóm thanh toán, mức phí, tuổi tài khoản) cho đường Kaplan-Meier."""
+    return build_survival_table(_df)
 
 
 # Load data một lần duy nhất
-df = load_and_prepare_data()
+with perf.section("Load & chuẩn bị dữ liệu"):
+    df = load_and_prepare_data(DATA_PATH)
+    cube = build_churn_cube(DATA_VERSION, df)
+    sketches = build_distribution_sketches(DATA_VERSION, df)
+    curves = build_curves(DATA_VERSION, df)
+    bitmap_index = build_bitmap_index(DATA_VERSION, df)
+    survival_table = build_survival(DATA_VERSION, df)
+perf.track_frame("df", df)
+perf.track_frame("churn_cube", cube.cells)
 
 # Khởi tạo session state
 if 'current_bq' not in st.session_state:
@@ -101,12 +126,12 @@ col1, col2 = st.columns(2)
 with col1:
     if st.button("📊 BQ1: Cú sốc thanh toán & Phiền phức", 
                  type="primary" if st.session_state.current_bq == 1 else "secondary",
-                 use_container_width=True):
+                 use_container_width=True, key="btn_select_bq1"):
         st.session_state.current_bq = 1
 with col2:
     if st.button("🎯 BQ2: Chán nản vs Bực bội", 
                  type="primary" if st.session_state.current_bq == 2 else "secondary",
-                 use_container_width=True):
+                 use_container_width=True, key="btn_select_bq2"):
         st.session_state.current_bq = 2
 
 st.markdown("---")
@@ -151,11 +176,30 @@ def reset_story():
     st.session_state[step_key] = 1
 
 # Render nội dung theo BQ và bước hiện tại
-if st.session_state.current_bq == 1:
-    render_bq1(df, next_step)
-else:
-    render_bq2(df, next_step)
+with perf.section(f"BQ{st.session_state.current_bq} · {current_steps[st.session_state[current_step_key]]}"):
+    if st.session_state.current_bq == 1:
+        render_bq1(df, next_step, DATA_VERSION, cube)
+    else:
+        render_bq2(df, next_step, DATA_VERSION, cube, sketches)
+
+# Thử các ngưỡng khác: mỗi lần kéo slider chỉ là một searchsorted trên mảng đã sắp
+st.markdown("---")
+with perf.section("Khám phá ngưỡng"):
+    render_threshold_explorer(curves)
+with perf.section("Phân tích sống còn"):
+    render_survival_view(survival_table, DATA_VERSION)
+with perf.section("Tự xây phân khúc"):
+    render_segment_explorer(bitmap_index, df)
+with perf.section("Tìm phân khúc churn cao"):
+    render_subgroup_discovery(bitmap_index, DATA_VERSION)
+with perf.section("Chấm điểm rủi ro"):
+    render_risk_panel(df, DATA_VERSION)
+with perf.section("Lịch sử snapshot"):
+    render_history()
+    render_drift_report()
 
 # Footer
 st.markdown("---")
 st.caption("💡 Data Storytelling Dashboard | Powered by Streamlit & Seaborn")
+
+perf.end_page()
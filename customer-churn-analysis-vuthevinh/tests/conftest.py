@@ -0,0 +1,26 @@
+"""Dữ liệu chung cho các test: khách hàng tổng hợp từ generate_data.py.
+
+Các test chạy từ thư mục app, nên thư mục app được thêm vào sys.path để
+import generate_data và bq_modules như story_app.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bq_modules.segments import prepare_frame  # noqa: E402
+from generate_data import generate  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def _prepared():
+    return prepare_frame(generate(20_000, seed=1))
+
+
+@pytest.fixture
+def customers(_prepared):
+    """20.000 khách hàng tổng hợp đã qua prepare_frame (bản sao cho mỗi test)."""
+    return _prepared.copy()
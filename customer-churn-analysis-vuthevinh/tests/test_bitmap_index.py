@@ -0,0 +1,66 @@
+"""Số khách/số churn của phân khúc từ bitset so với mask boolean của pandas."""
+
+import numpy as np
+import pytest
+
+from bq_modules.bitmap_index import BitmapIndex, pack, popcount
+
+SELECTIONS = [
+    {},
+    {'new': ['Mới (<= 3 tháng)']},
+    {'new': ['Mới (<= 3 tháng)'], 'charge': ['Phí cao (Top 25%)'], 'payment': ['Electronic check']},
+    {'payment': ['Electronic check', 'Mailed check'], 'tickets': [], 'rating': ['Rating 1-2', 'Rating 4-5']},
+    {'engagement': ['Gắn bó Thấp (< TB)'], 'tickets': ['Không ticket (=0)']},
+    {'new': ['Mới (<= 3 tháng)'], 'payment': ['Credit card'], 'rating': ['Rating 2-3'],
+     'engagement': ['Gắn bó Cao (>= TB)'], 'charge': ['Phí cao (Top 25%)']},
+]
+
+
+def _mask(df, selection):
+    """Cùng truy vấn viết trực tiếp bằng pandas."""
+    conditions = {
+        'new': {'Mới (<= 3 tháng)': df['AccountAge'] <= 3},
+        'charge': {'Phí cao (Top 25%)': df['Is_High_Charge']},
+        'tickets': {'Không ticket (=0)': df['SupportTicketsPerMonth'] == 0},
+        'engagement': {'Gắn bó Thấp (< TB)': df['ViewingHoursPerWeek'] < df['ViewingHoursPerWeek'].mean(),
+                       'Gắn bó Cao (>= TB)': df['ViewingHoursPerWeek'] >= df['ViewingHoursPerWeek'].mean()},
+        'rating': {'Rating 1-2': df['UserRating'] < 2, 'Rating 2-3': df['UserRating'].between(2, 3, 'left'),
+                   'Rating 4-5': df['UserRating'] >= 4},
+    }
+    mask = np.ones(len(df), dtype=bool)
+    for group, levels in selection.items():
+        if not levels:
+            continue
+        if group == 'payment':
+            mask &= df['PaymentMethod'].isin(levels).to_numpy()
+        else:
+            mask &= np.logical_or.reduce([conditions[group][level].to_numpy() for level in levels])
+    return mask
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_stats_match_boolean_mask(customers, selection):
+    index = BitmapIndex.from_frame(customers)
+    mask = _mask(customers, selection)
+    churn = customers['Churn'].to_numpy()
+    stats = index.stats(selection)
+    assert (stats['size'], stats['churned']) == (mask.sum(), churn[mask].sum())
+    assert stats['churn_rate'] == pytest.approx(churn[mask].mean())
+    assert stats['share'] == pytest.approx(mask.mean())
+    assert stats['churn_share'] == pytest.approx(churn[mask].sum() / churn.sum())
+
+
+def test_payment_levels_come_from_column(customers):
+    index = BitmapIndex.from_frame(customers)
+    assert index.levels['payment'] == sorted(customers['PaymentMethod'].unique())
+    assert index.mask({}) is None
+
+
+@pytest.mark.parametrize('n', [0, 1, 63, 64, 65, 1000])
+def test_pack_and_popcount_keep_padding_zero(n):
+    mask = np.random.default_rng(n).random(n) < 0.5
+    words = pack(mask)
+    assert words.dtype == np.uint64 and len(words) == -(-n // 64)
+    assert popcount(words) == mask.sum() == popcount(words & ~pack(~mask))
+    bits = np.unpackbits(words.view(np.uint8), bitorder='little')
+    np.testing.assert_array_equal(bits[:n], mask)
@@ -0,0 +1,53 @@
+"""Quantile sketch so với quantile chính xác của NumPy: sai số không quá một bin."""
+
+import numpy as np
+import pytest
+from matplotlib import cbook
+
+from bq_modules.distributions import DEFAULT_BINS, SKETCH_RANGES, QuantileSketch, build_sketches, merge_sketches
+
+QS = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+
+@pytest.mark.parametrize('column', list(SKETCH_RANGES))
+def test_quantiles_within_one_bin(customers, column):
+    lo, hi = SKETCH_RANGES[column]
+    width = (hi - lo) / DEFAULT_BINS
+    sketches = build_sketches(customers)[column]
+    for churn, sketch in sketches.items():
+        values = customers.loc[customers['Churn'] == churn, column].to_numpy()
+        assert sketch.count == len(values)
+        np.testing.assert_allclose(sketch.quantile(QS), np.quantile(values, QS), atol=width)
+        assert sketch.min == values.min() and sketch.max == values.max()
+        for x in np.quantile(values, [0.1, 0.5, 0.9]):
+            # Sai số cdf không quá số khách của bin chứa x
+            i = min(int((x - lo) / width), DEFAULT_BINS - 1)
+            assert abs(sketch.cdf(x) - (values <= x).mean()) <= sketch.counts[i] / len(values) + 1e-12
+
+
+def test_merged_parts_equal_whole(customers):
+    parts = [build_sketches(customers.iloc[start:start + 7000]) for start in range(0, len(customers), 7000)]
+    merged, whole = merge_sketches(parts), build_sketches(customers)
+    for column, by_class in whole.items():
+        for churn, sketch in by_class.items():
+            other = merged[column][churn]
+            np.testing.assert_array_equal(other.counts, sketch.counts)
+            assert (other.min, other.max) == (sketch.min, sketch.max)
+    with pytest.raises(ValueError):
+        whole['UserRating'][0].merge(whole['ViewingHoursPerWeek'][0])
+
+
+def test_box_stats_close_to_matplotlib(customers):
+    lo, hi = SKETCH_RANGES['ViewingHoursPerWeek']
+    width = (hi - lo) / DEFAULT_BINS
+    values = customers['ViewingHoursPerWeek'].to_numpy()
+    stats = QuantileSketch.from_values(values, lo, hi).box_stats()
+    expected = cbook.boxplot_stats(values)[0]
+    for key in ('med', 'q1', 'q3', 'whislo', 'whishi'):
+        assert stats[key] == pytest.approx(expected[key], abs=2 * width), key
+
+
+def test_empty_sketch_has_no_quantiles():
+    sketch = QuantileSketch.from_values([], 0.0, 1.0, bins=8)
+    assert sketch.count == 0 and np.isnan(sketch.median()) and np.isnan(sketch.cdf(0.5))
+    assert np.isnan(sketch.quantile([0.25, 0.75])).all()
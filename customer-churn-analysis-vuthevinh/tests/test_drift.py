@@ -0,0 +1,110 @@
+"""PSI/KS từ profile histogram so với cách tính trực tiếp trên dữ liệu gốc (scipy.ks_2samp)."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ks_2samp
+
+from bq_modules.churn_cube import build_cube
+from bq_modules.distributions import QuantileSketch
+from bq_modules.drift import (
+    INSUFFICIENT, PROFILE_RANGES, SnapshotProfile, build_profile, drift_table, finding_checks, ks_statistic,
+    numeric_psi, psi, threshold_checks,
+)
+from bq_modules.segments import prepare_frame
+from generate_data import generate
+
+
+@pytest.fixture(scope='module')
+def shifted():
+    """Snapshot khác: phí tăng 10%, giờ xem giảm 2h, thêm khách Electronic check."""
+    df = generate(15_000, seed=2)
+    df['MonthlyCharges'] *= 1.1
+    df['ViewingHoursPerWeek'] = (df['ViewingHoursPerWeek'] - 2).clip(lower=0)
+    df.loc[df.index[:3000], 'PaymentMethod'] = 'Electronic check'
+    return prepare_frame(df)
+
+
+def _bin_mass(sketch):
+    return sketch.counts / sketch.count
+
+
+@pytest.mark.parametrize('column', list(PROFILE_RANGES))
+def test_ks_within_one_bin_of_scipy(customers, shifted, column):
+    a = build_profile(customers).overall(column)
+    b = build_profile(shifted).overall(column)
+    exact = ks_2samp(customers[column], shifted[column]).statistic
+    result = ks_statistic(a, b)
+    # Tại biên bin CDF là chính xác; giữa hai biên mỗi CDF đổi không quá khối lượng của bin đó
+    assert result <= exact + 1e-12
+    assert exact - result <= (_bin_mass(a) + _bin_mass(b)).max() + 1e-12
+
+
+@pytest.mark.parametrize('column', ['MonthlyCharges', 'ViewingHoursPerWeek', 'AccountAge'])
+def test_numeric_psi_matches_histogram_of_raw_values(customers, shifted, column):
+    a = build_profile(customers).overall(column)
+    b = build_profile(shifted).overall(column)
+    # Các nhóm mà numeric_psi ghép từ bin là các khoảng giữa những biên bin này
+    cum = np.cumsum(a.counts)
+    cuts = np.searchsorted(cum, cum[-1] * np.arange(1, 10) / 10, side='left') + 1
+    edges = a.edges[np.unique(cuts[cuts < len(cum)])]
+    lo, hi = PROFILE_RANGES[column]
+
+    def shares(values):
+        bucket = np.searchsorted(edges, np.clip(values, lo, np.nextafter(hi, lo)), side='right')
+        return np.bincount(bucket, minlength=len(edges) + 1) / len(values)
+
+    expected = psi(shares(customers[column].to_numpy()), shares(shifted[column].to_numpy()))
+    assert numeric_psi(a, b) == pytest.approx(expected, rel=1e-9)
+    assert numeric_psi(a, a) == pytest.approx(0.0)
+
+
+def test_drift_table_flags_shifted_columns(customers, shifted):
+    table = drift_table(build_profile(customers), build_profile(shifted)).set_index('column')
+    counts = [customers['PaymentMethod'].value_counts(normalize=True),
+              shifted['PaymentMethod'].value_counts(normalize=True)]
+    levels = sorted(set(counts[0].index) | set(counts[1].index))
+    expected = psi(*(c.reindex(levels, fill_value=0).to_numpy() for c in counts))
+    assert table.at['PaymentMethod', 'psi'] == pytest.approx(expected)
+    assert table.at['PaymentMethod', 'kind'] == 'phân loại'
+    assert table.at['MonthlyCharges', 'status'] in ('warn', 'alert')
+    assert table.at['UserRating', 'status'] == 'ok'
+
+
+def test_threshold_shares_within_one_bin(customers, shifted):
+    base, current = build_profile(customers), build_profile(shifted)
+    meta = [{'high_charge_threshold': df['MonthlyCharges'].quantile(0.75),
+             'avg_viewing': df['ViewingHoursPerWeek'].mean()} for df in (customers, shifted)]
+    checks = threshold_checks(meta[0], base, meta[1], current).set_index('step')
+    charge, viewing = meta[0]['high_charge_threshold'], meta[0]['avg_viewing']
+    for df, column in ((customers, 'base_share'), (shifted, 'current_share')):
+        charge_bin = _bin_mass(build_profile(df).overall('MonthlyCharges')).max()
+        viewing_bin = _bin_mass(build_profile(df).overall('ViewingHoursPerWeek')).max()
+        assert checks.at['BQ1 · TQ 1.2', column] == pytest.approx((df['MonthlyCharges'] > charge).mean(),
+                                                                 abs=charge_bin)
+        assert checks.at['BQ2 · TQ 2.4', column] == pytest.approx((df['ViewingHoursPerWeek'] < viewing).mean(),
+                                                                 abs=viewing_bin)
+
+
+def test_profile_round_trip(customers):
+    profile = build_profile(customers)
+    restored = SnapshotProfile.from_dict(profile.to_dict())
+    assert restored.categories == profile.categories
+    for column, by_class in profile.sketches.items():
+        for churn, sketch in by_class.items():
+            np.testing.assert_array_equal(restored.sketches[column][churn].counts, sketch.counts)
+
+
+def test_missing_groups_are_insufficient_not_errors(customers):
+    old_only = customers[~customers['Is_New_Customer']]
+    checks = finding_checks(build_cube(old_only), build_profile(old_only)).set_index('step')
+    for step in ('BQ1 · TQ 1.1', 'BQ1 · TQ 1.2', 'BQ1 · TQ 1.4'):
+        assert pd.isna(checks.at[step, 'status'])
+        assert checks.at[step, 'evidence'] == INSUFFICIENT
+    assert checks.at['BQ1 · TQ 1.3', 'status'] in ('ok', 'warn', 'alert')
+
+    empty = QuantileSketch.from_values([], *PROFILE_RANGES['UserRating'])
+    assert np.isnan(ks_statistic(empty, build_profile(customers).overall('UserRating')))
+    assert np.isnan(numeric_psi(empty, empty))
+    assert pd.isna(drift_table(build_profile(customers), SnapshotProfile(
+        sketches={}, categories={'PaymentMethod': {}})).set_index('column').at['PaymentMethod', 'psi'])
@@ -0,0 +1,36 @@
+"""Khoảng tin cậy Wilson vector hóa so với statsmodels, và các cột ci của churn_rates."""
+
+import numpy as np
+import pytest
+from statsmodels.stats.proportion import proportion_confint
+
+from bq_modules.churn_cube import build_cube
+from bq_modules.intervals import wilson_interval
+
+
+@pytest.mark.parametrize('confidence', [0.9, 0.95, 0.99])
+def test_wilson_matches_statsmodels(confidence):
+    successes = np.array([0, 1, 7, 50, 99, 100, 3_456])
+    n = np.array([10, 1, 40, 100, 100, 100, 20_000])
+    low, high = wilson_interval(successes, n, confidence)
+    expected_low, expected_high = proportion_confint(successes, n, alpha=1 - confidence, method='wilson')
+    np.testing.assert_allclose(low, expected_low, atol=1e-12)
+    np.testing.assert_allclose(high, expected_high, atol=1e-12)
+
+
+def test_empty_group_has_no_interval():
+    low, high = wilson_interval([0, 3], [0, 5])
+    assert np.isnan(low[0]) and np.isnan(high[0])
+    assert 0 < low[1] < 0.6 < high[1] < 1
+
+
+def test_churn_rates_intervals_match_per_group(customers):
+    by = ['Payment_Group_Detail', 'Is_High_Charge']
+    rates = build_cube(customers).rates(by)
+    expected = customers.groupby(by, observed=True)['Churn'].agg(['sum', 'count'])
+    assert rates['n'].tolist() == expected['count'].tolist()
+    assert rates['churned'].tolist() == expected['sum'].tolist()
+    expected_low, expected_high = proportion_confint(expected['sum'], expected['count'], method='wilson')
+    np.testing.assert_allclose(rates['ci_low'], expected_low)
+    np.testing.assert_allclose(rates['ci_high'], expected_high)
+    assert ((rates['ci_low'] <= rates['Churn']) & (rates['Churn'] <= rates['ci_high'])).all()
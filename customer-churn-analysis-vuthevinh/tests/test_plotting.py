@@ -0,0 +1,38 @@
+"""Khoảng tin cậy và nhãn trên biểu đồ BQ1 khi có phân khúc không có khách nào."""
+
+import numpy as np
+
+from bq_modules.bq1_renderer import combo_ci_caption, draw_payment, draw_toxic_combo
+from bq_modules.churn_cube import build_cube
+from bq_modules.plotting import annotate_rates, subplots
+
+
+def test_missing_segment_leaves_bar_empty(customers):
+    cube = build_cube(customers[customers['PaymentMethod'] != 'Mailed check'])
+    for draw in (draw_payment, draw_toxic_combo):
+        ax = draw(cube).axes[0]
+        labels = [text.get_text() for text in ax.texts]
+        assert len(labels) == 2 and all(label for label in labels)
+
+
+def test_annotate_rates_skips_rows_not_in_data(customers):
+    rates = build_cube(customers).rates(['Is_New_Customer'])
+    fig, ax, _ = subplots((4, 3))
+    annotate_rates(ax, rates, 'Is_New_Customer', [True, 'Không có', False])
+    positions = [text.xy[0] for text in ax.texts]
+    assert positions == [0, 2]
+    expected = rates.set_index('Is_New_Customer')['Churn']
+    assert [float(text.get_text()) for text in ax.texts] == [round(expected[True], 2), round(expected[False], 2)]
+    assert np.isfinite(ax.get_ylim()).all()
+
+
+def test_combo_caption_follows_intervals(customers):
+    rates = build_cube(customers).rates(['Combined_Risk_Segment'])
+    others = rates['Combined_Risk_Segment'] == 'Others'
+    separated = rates.assign(ci_low=np.where(others, 0.1, 0.5), ci_high=np.where(others, 0.2, 0.7))
+    assert 'cận dưới vẫn cao hơn' in combo_ci_caption(separated)
+    overlapping = separated.assign(ci_low=np.where(separated['Combined_Risk_Segment'] == 'Toxic Combo (E-Check)',
+                                                   0.15, separated['ci_low']))
+    caption = combo_ci_caption(overlapping)
+    assert 'Toxic Combo (E-Check) chồng lên' in caption and 'cận dưới vẫn' not in caption
+    assert combo_ci_caption(rates[others]) == "Thanh đen trên mỗi cột: khoảng tin cậy 95% (Wilson)."
@@ -0,0 +1,37 @@
+"""Luật phân khúc khai báo so với các hàm theo từng dòng (df.apply) trước đây."""
+
+from bq_modules.segments import COMBINED_RISK_SEGMENT, PAYMENT_GROUP_DETAIL, Segmentation, apply_segments
+
+
+def _payment_group_detail(row):
+    if row['Is_Electronic_Check']:
+        return 'Electronic Check'
+    elif row['Is_Mailed_Check']:
+        return 'Mailed Check'
+    return 'Others (Auto-pay)'
+
+
+def _combined_risk_segment(row):
+    if row['Is_New_Customer'] and row['Is_High_Charge'] and row['Is_Electronic_Check']:
+        return 'Toxic Combo (E-Check)'
+    elif row['Is_New_Customer'] and row['Is_High_Charge'] and row['Is_Mailed_Check']:
+        return 'Toxic Combo (Mailed Check)'
+    return 'Others'
+
+
+def test_segments_match_row_functions(customers):
+    for segmentation, row_function in ((PAYMENT_GROUP_DETAIL, _payment_group_detail),
+                                       (COMBINED_RISK_SEGMENT, _combined_risk_segment)):
+        expected = customers.apply(row_function, axis=1)
+        result = customers[segmentation.column]
+        assert list(result.cat.categories) == segmentation.labels
+        assert (result.astype(str) == expected).all()
+    assert (customers['Combined_Risk_Segment'] != 'Others').any()
+
+
+def test_first_matching_rule_wins(customers):
+    overlapping = Segmentation('Age_Band', (("AccountAge <= 12", 'Năm đầu'), ("AccountAge <= 3", 'Mới')), 'Khác')
+    result = apply_segments(customers, (overlapping,))['Age_Band']
+    assert list(result.cat.categories) == ['Năm đầu', 'Mới', 'Khác']
+    assert not (result == 'Mới').any()
+    assert ((result == 'Năm đầu') == (customers['AccountAge'] <= 12)).all()
@@ -0,0 +1,57 @@
+"""Tìm phân khúc có cắt tỉa so với duyệt hết mọi tổ hợp mức."""
+
+import itertools
+
+import numpy as np
+import pytest
+from scipy import stats
+
+from bq_modules.bitmap_index import BitmapIndex
+from bq_modules.subgroups import RESULT_COLUMNS, discover_subgroups
+
+
+def _brute_force(index, max_depth, min_support, top_k, alpha):
+    """Mọi tổ hợp (mỗi nhóm tối đa một mức) tới độ sâu max_depth, tính bằng mask bool."""
+    def unpack(words):
+        return np.unpackbits(words.view(np.uint8), bitorder='little')[:index.n].astype(bool)
+
+    churn = unpack(index.churn)
+    base_rate = churn.mean()
+    min_size = np.ceil(min_support * index.n)
+    rows = []
+    groups = list(index.levels)
+    for depth in range(1, max_depth + 1):
+        for chosen in itertools.combinations(groups, depth):
+            for levels in itertools.product(*(index.levels[g] for g in chosen)):
+                mask = np.logical_and.reduce([unpack(index.bitmaps[(g, level)]) for g, level in zip(chosen, levels)])
+                size = mask.sum()
+                if size < min_size:
+                    continue
+                rate = churn[mask].mean()
+                z = (rate - base_rate) / np.sqrt(base_rate * (1 - base_rate) / size)
+                if stats.norm.sf(z) <= alpha:
+                    rows.append((rate / base_rate, size, ' & '.join(levels), z, stats.norm.sf(z)))
+    return sorted(rows, reverse=True)[:top_k]
+
+
+@pytest.mark.parametrize('max_depth, min_support, top_k', [(1, 0.0, 50), (2, 0.02, 10), (3, 0.01, 15)])
+def test_pruned_search_matches_brute_force(customers, max_depth, min_support, top_k):
+    index = BitmapIndex.from_frame(customers)
+    result = discover_subgroups(index, max_depth=max_depth, min_support=min_support, top_k=top_k)
+    expected = _brute_force(index, max_depth, min_support, top_k, alpha=0.05)
+
+    assert list(result.columns) == RESULT_COLUMNS
+    assert len(result) == len(expected)
+    np.testing.assert_allclose(result['lift'], [row[0] for row in expected])
+    assert result['size'].tolist() == [row[1] for row in expected]
+    assert set(result['segment']) == {row[2] for row in expected}
+    np.testing.assert_allclose(result['p_value'], [row[4] for row in expected], rtol=1e-9, atol=1e-12)
+    assert (result['coverage'] >= min_support).all()
+    assert (result['depth'] == result['segment'].str.count(' & ') + 1).all()
+
+
+def test_process_pool_gives_same_result(customers):
+    index = BitmapIndex.from_frame(customers)
+    serial = discover_subgroups(index, max_depth=2, top_k=10, n_jobs=1)
+    parallel = discover_subgroups(index, max_depth=2, top_k=10, n_jobs=2)
+    assert serial.equals(parallel)
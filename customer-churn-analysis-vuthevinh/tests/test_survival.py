@@ -0,0 +1,61 @@
+"""Kaplan-Meier từ các ô (tháng, tầng) so với statsmodels SurvfuncRight trên từng khách hàng."""
+
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.duration.survfunc import SurvfuncRight
+
+from bq_modules.survival import build_survival_table, median_survival, stratum_labels
+
+
+@pytest.mark.parametrize('by', [(), ('Payment_Group_Detail',), ('Payment_Group_Detail', 'Is_High_Charge')])
+def test_curves_match_statsmodels(customers, by):
+    curves = build_survival_table(customers).curves(by)
+    labels = stratum_labels(customers, list(by))
+    assert set(curves['stratum']) == set(labels)
+    z = NormalDist().inv_cdf(0.975)
+    for stratum, rows in curves.groupby('stratum'):
+        group = customers[labels == stratum]
+        fit = SurvfuncRight(group['AccountAge'].to_numpy(), group['Churn'].to_numpy())
+        at_event = rows[rows['events'] > 0].set_index('AccountAge')
+        np.testing.assert_array_equal(at_event.index, fit.surv_times)
+        np.testing.assert_array_equal(at_event['at_risk'], fit.n_risk)
+        np.testing.assert_allclose(at_event['survival'], fit.surv_prob)
+        # Sai số Greenwood của statsmodels là cho S; trên thang log(-log S) chia thêm cho S |log S|
+        log_s = np.log(fit.surv_prob)
+        margin = z * fit.surv_prob_se / (fit.surv_prob * np.abs(log_s))
+        np.testing.assert_allclose(at_event['ci_low'], np.exp(-np.exp(np.log(-log_s) + margin)))
+        np.testing.assert_allclose(at_event['ci_high'], np.exp(-np.exp(np.log(-log_s) - margin)))
+        # Tháng không có churn giữ nguyên S của tháng trước
+        survival, no_event = rows['survival'].to_numpy(), rows['events'].to_numpy() == 0
+        np.testing.assert_array_equal(survival[no_event], np.r_[1.0, survival[:-1]][no_event])
+
+
+def test_small_example_by_hand():
+    # 6 khách: churn ở tháng 1, 3, 3; kiểm duyệt ở tháng 2, 4, 5
+    df = pd.DataFrame({'AccountAge': [1, 2, 3, 3, 4, 5], 'Churn': [1, 0, 1, 1, 0, 0]})
+    curves = build_survival_table(df).curves()
+    np.testing.assert_array_equal(curves['at_risk'], [6, 5, 4, 2, 1])
+    np.testing.assert_allclose(curves['survival'], [5 / 6, 5 / 6, 5 / 12, 5 / 12, 5 / 12])
+    assert median_survival(curves).tolist() == [3]
+
+
+def test_median_is_nan_when_curve_stays_above_half():
+    df = pd.DataFrame({'AccountAge': [1, 2, 3, 4, 1, 2], 'Churn': [1, 0, 0, 0, 1, 1],
+                       'Is_High_Charge': [False] * 4 + [True] * 2})
+    median = median_survival(build_survival_table(df).curves(('Is_High_Charge',)))
+    assert median.to_dict() == {'Phí thường': pytest.approx(np.nan, nan_ok=True), 'Phí cao (Top 25%)': 1}
+
+
+def test_milestone_keeps_strata_without_estimate():
+    from bq_modules.survival_explorer import _survival_at
+
+    df = pd.DataFrame({'AccountAge': [1, 5, 30, 40], 'Churn': [1, 0, 1, 0],
+                       'Is_High_Charge': [False, False, True, True]})
+    curves = build_survival_table(df).curves(('Is_High_Charge',))
+    at = _survival_at(curves, 24)
+    assert at.index.tolist() == ['Phí thường', 'Phí cao (Top 25%)']
+    assert at.loc['Phí thường', 'survival'] == 0.5
+    assert at.loc['Phí cao (Top 25%)'].isna().all()
@@ -0,0 +1,54 @@
+"""Tỷ lệ churn hai phía ngưỡng từ mảng cộng dồn so với lọc trực tiếp bằng pandas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bq_modules.thresholds import THRESHOLDS, ThresholdCurve, build_threshold_curves
+
+
+def _split(df, column, threshold, equal_goes):
+    below = df[column] <= threshold if equal_goes == 'below' else df[column] < threshold
+    return df.loc[below, 'Churn'], df.loc[~below, 'Churn']
+
+
+@pytest.mark.parametrize('column', list(THRESHOLDS))
+def test_split_matches_boolean_filter(customers, column):
+    spec = THRESHOLDS[column]
+    curve = build_threshold_curves(customers)[column]
+    values = customers[column]
+    # Ngưỡng trùng giá trị có trong dữ liệu, nằm giữa hai giá trị và ngoài miền
+    for threshold in [values.min() - 1, values.quantile(0.3), values.median() + 1e-6, values.iloc[0],
+                      spec.default(curve), values.max() + 1]:
+        below, above = _split(customers, column, threshold, spec.equal_goes)
+        result = curve.split(threshold, spec.equal_goes)
+        assert result['below'][:2] == (len(below), below.sum())
+        assert result['above'][:2] == (len(above), above.sum())
+        np.testing.assert_allclose(result['below'][2], below.mean() if len(below) else np.nan)
+        np.testing.assert_allclose(result['above'][2], above.mean() if len(above) else np.nan)
+
+
+def test_curve_matches_split_on_every_grid_point(customers):
+    curve = build_threshold_curves(customers)['MonthlyCharges']
+    table = curve.curve(points=50)
+    assert len(table) == 50
+    for row in table.sample(10, random_state=0).itertuples():
+        below, above = _split(customers, 'MonthlyCharges', row.threshold, 'below')
+        assert row.share_below == pytest.approx(len(below) / len(customers))
+        assert row.churn_below == pytest.approx(below.mean())
+        np.testing.assert_allclose(row.churn_above, above.mean() if len(above) else np.nan)
+
+
+def test_quantile_and_mean_match_pandas(customers):
+    curves = build_threshold_curves(customers)
+    for column in THRESHOLDS:
+        for q in (0.0, 0.25, 0.5, 0.75, 0.99, 1.0):
+            assert curves[column].quantile(q) == pytest.approx(customers[column].quantile(q))
+        assert curves[column].mean() == pytest.approx(customers[column].mean())
+
+
+def test_missing_values_are_ignored():
+    curve = ThresholdCurve.from_series(pd.Series([1.0, np.nan, 2.0, 2.0, 5.0]), [1, 1, 0, 1, 0])
+    assert curve.total == 4
+    assert curve.split(2.0) == {'below': (3, 2, 2 / 3), 'above': (1, 0, 0.0)}
+    assert curve.split(2.0, 'above') == {'below': (1, 1, 1.0), 'above': (3, 1, 1 / 3)}
@@ -3,18 +3,14 @@ import plotly.express as px
 import pandas as pd
 import numpy as np
 
-# Optional heavy libs guarded so app can start even if not installed yet
-try:
-    import seaborn as sns
-    import matplotlib.pyplot as plt
-except ModuleNotFoundError:
-    sns = None
-    plt = None
-try:
-    from scipy.stats import levene, f_oneway
-except ModuleNotFoundError:
-    levene = f_oneway = None
-from utils import get_data
+from filters import cached_aggregate, get_filtered_data, render_sidebar_filters, require_rows, resolve_stores
+from figure_cache import show_figure
+from sales_index import get_top_sales_index
+from utils import has_modules
+import perf
+
+# Optional heavy libs are imported where they are drawn, so the app starts even if not installed yet
+HAS_SEABORN = has_modules("seaborn", "matplotlib")
 
 
 st.set_page_config(
@@ -23,14 +19,14 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+perf.start_page("Home")
 
 st.title("🛒 Walmart Sales Explorer")
 st.caption("Unified landing & EDA quick access. Full analyses in dedicated pages.")
 
-# Load once and share via session_state
-if 'df' not in st.session_state:
-    st.session_state['df'] = get_data()
-df = st.session_state['df']
+# Global filters persist across pages; the filtered view is cached per predicate
+flt = render_sidebar_filters()
+df = get_filtered_data(flt)
 
 with st.sidebar:
     st.success(f"✅ Data loaded: {len(df):,} rows")
@@ -40,9 +36,11 @@ with st.sidebar:
         st.info(f"Stores: {df['Store'].nunique():,}")
     st.markdown("---")
     st.markdown("**Tabs:** Overview | EDA")
+require_rows(df)
 
 overview_tab, eda_tab = st.tabs(["Overview", "EDA"])
 
+perf.mark("Overview")
 with overview_tab:
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -60,7 +58,7 @@ with overview_tab:
 
     st.markdown("---")
     if {'Date', 'Weekly_Sales'}.issubset(df.columns):
-        daily = df.groupby('Date', as_index=False)['Weekly_Sales'].sum()
+        daily = cached_aggregate(flt, 'Date', how='sum')
         fig = px.line(
             daily, x='Date', y='Weekly_Sales',
             title="Total Weekly Sales Over Time",
@@ -84,63 +82,74 @@ with eda_tab:
     st.caption("Condensed version of full EDA (page 7) for rapid reference.")
 
     # 1 Weekly Sales Over Time
+    perf.mark("1. Weekly Sales Over Time")
     if {'Date','Weekly_Sales','Store'}.issubset(df.columns):
-        store_select = st.multiselect("Stores (empty = all)", sorted(df['Store'].unique()))
-        plot_df = df[df['Store'].isin(store_select)] if store_select else df
-        fig_ts = px.line(plot_df, x='Date', y='Weekly_Sales', color='Store', title='Weekly Sales Over Time')
+        st.caption(f"Stores, dates and week type follow the sidebar filters ({flt.describe()}).")
+        fig_ts = px.line(df, x='Date', y='Weekly_Sales', color='Store', title='Weekly Sales Over Time')
         st.plotly_chart(fig_ts, use_container_width=True)
     else:
         st.info("Missing Date/Store/Weekly_Sales for time-series plot.")
 
     # 2 Avg Weekly Sales per Store
+    perf.mark("2. Avg Weekly Sales per Store")
     if 'Store' in df.columns and 'Weekly_Sales' in df.columns:
-        store_avg = (df.groupby('Store')['Weekly_Sales'].mean().reset_index()
-                       .rename(columns={'Weekly_Sales':'Avg_Weekly_Sales'}))
+        store_avg = cached_aggregate(flt, 'Store').rename(columns={'Weekly_Sales':'Avg_Weekly_Sales'})
         fig_avg = px.bar(store_avg, x='Store', y='Avg_Weekly_Sales', color='Avg_Weekly_Sales',
                          title='Average Weekly Sales per Store')
         st.plotly_chart(fig_avg, use_container_width=True)
     # 3 Holiday vs Non-Holiday Avg & Total
+    perf.mark("3. Holiday vs Non-Holiday Avg & Total")
     if 'Holiday_Flag' in df.columns and 'Weekly_Sales' in df.columns:
-        holiday_avg = (df.groupby('Holiday_Flag')['Weekly_Sales'].mean().reset_index()
-                         .rename(columns={'Weekly_Sales':'Avg_Weekly_Sales'}))
+        holiday_avg = cached_aggregate(flt, 'Holiday_Flag').rename(columns={'Weekly_Sales':'Avg_Weekly_Sales'})
         fig_h_avg = px.bar(holiday_avg, x='Holiday_Flag', y='Avg_Weekly_Sales', title='Avg Weekly Sales (Holiday Flag)')
         st.plotly_chart(fig_h_avg, use_container_width=True)
     # 4 Top Sales Events
-    if 'Weekly_Sales' in df.columns:
-        top_df = df.nlargest(15,'Weekly_Sales')[['Date','Store','Weekly_Sales']] if 'Store' in df.columns else df.nlargest(15,'Weekly_Sales')[['Date','Weekly_Sales']]
-        fig_top = px.scatter(top_df, x='Date', y='Weekly_Sales', color='Store' if 'Store' in top_df.columns else None,
+    perf.mark("4. Top Sales Events")
+    if {'Date','Store','Weekly_Sales'}.issubset(df.columns):
+        top_df = get_top_sales_index().query(15, stores=resolve_stores(flt), start=flt.start, end=flt.end,
+                                             holiday=flt.holiday)
+        fig_top = px.scatter(top_df, x='Date', y='Weekly_Sales', color='Store',
                              size='Weekly_Sales', title='Top 15 Weekly Sales Events')
         st.plotly_chart(fig_top, use_container_width=True)
     # 5 Monthly Average
+    perf.mark("5. Monthly Average")
     if 'Date' in df.columns and 'Weekly_Sales' in df.columns:
-        mdf = df.copy(); mdf['Month'] = mdf['Date'].dt.month
-        month_avg = mdf.groupby('Month')['Weekly_Sales'].mean().reset_index().rename(columns={'Weekly_Sales':'Avg_Monthly_Sales'})
+        month_avg = cached_aggregate(flt, 'Month').rename(columns={'Weekly_Sales':'Avg_Monthly_Sales'})
         fig_month = px.bar(month_avg, x='Month', y='Avg_Monthly_Sales', color='Avg_Monthly_Sales', title='Average Monthly Sales')
         st.plotly_chart(fig_month, use_container_width=True)
     # 6 Correlation (masked)
+    perf.mark("6. Correlation (masked)")
     num_df = df.select_dtypes(include=[np.number])
     if not num_df.empty:
-        corr = num_df.corr()
-        if sns is None or plt is None:
-            fig_corr = px.imshow(corr, color_continuous_scale='viridis', aspect='auto',
+        if not HAS_SEABORN:
+            fig_corr = px.imshow(num_df.corr(), color_continuous_scale='viridis', aspect='auto',
                                  title='Correlation Matrix')
             st.plotly_chart(fig_corr, use_container_width=True)
         else:
-            mask = np.triu(np.ones_like(corr,dtype=bool))
-            fig_corr, ax = plt.subplots(figsize=(6,4))
-            sns.heatmap(corr, mask=mask, cmap='viridis', annot=False, ax=ax)
-            ax.set_title('Correlation (upper triangle)')
-            st.pyplot(fig_corr)
+            def draw_corr():
+                import seaborn as sns
+                from matplotlib.figure import Figure
+                corr = num_df.corr()
+                mask = np.triu(np.ones_like(corr,dtype=bool))
+                fig_corr = Figure(figsize=(6,4))
+                ax = fig_corr.subplots()
+                sns.heatmap(corr, mask=mask, cmap='viridis', annot=False, ax=ax)
+                ax.set_title('Correlation (upper triangle)')
+                return fig_corr
+            # Rasterized once per data version and filter
+            show_figure("home_corr", flt.key(), draw_corr)
     # 7 Climate Group Avg
+    perf.mark("7. Climate Group Avg")
     if 'Climate_Group' in df.columns and 'Weekly_Sales' in df.columns:
-        climate_avg = (df.groupby('Climate_Group')['Weekly_Sales'].mean().reset_index()
-                         .rename(columns={'Weekly_Sales':'Avg_Weekly_Sales'}))
+        climate_avg = cached_aggregate(flt, 'Climate_Group').rename(columns={'Weekly_Sales':'Avg_Weekly_Sales'})
         fig_climate = px.bar(climate_avg, x='Climate_Group', y='Avg_Weekly_Sales', color='Avg_Weekly_Sales',
                              title='Avg Weekly Sales by Climate Group')
         st.plotly_chart(fig_climate, use_container_width=True)
     # 8 Holiday Lift per Store
-    if {'Store','Holiday_Flag','Weekly_Sales'}.issubset(df.columns):
-        lift = (df.groupby(['Store','Holiday_Flag'])['Weekly_Sales'].mean().unstack(fill_value=0).reset_index())
+    perf.mark("8. Holiday Lift per Store")
+    if {'Store','Holiday_Flag','Weekly_Sales'}.issubset(df.columns) and flt.holiday is None:
+        lift = (cached_aggregate(flt, ('Store','Holiday_Flag')).set_index(['Store','Holiday_Flag'])['Weekly_Sales']
+                .unstack(fill_value=0).reindex(columns=[0, 1], fill_value=0).reset_index())
         lift.columns = ['Store','NonHoliday','Holiday']
         lift['Lift'] = lift['Holiday'] - lift['NonHoliday']
         fig_lift = px.bar(lift.sort_values('Lift', ascending=False), x='Store', y='Lift', title='Holiday Lift (Avg Weekly Sales)')
@@ -148,4 +157,4 @@ with eda_tab:
     st.markdown("---")
     st.markdown("**More detail available on dedicated 'EDA' page in sidebar (pages/7_EDA.py).**")
 
-
+perf.end_page()
@@ -0,0 +1,172 @@
+"""
+STL seasonal decomposition of every store's weekly sales.
+
+The decomposition runs as a batch job: all stores are decomposed once per data
+version across a process pool and the components are written to a cache/
+folder next to the data file (data/cache/ for the bundled dataset). Pages call
+get_decomposition(), which keeps the result in memory for the life of the
+server process, so no page ever runs STL during a rerun.
+
+Run `python decomposition.py` to precompute the cache ahead of deployment.
+"""
+import argparse
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+
+import perf
+from utils import get_data, get_data_path, get_data_version
+
+# Weekly data: one seasonal cycle per year
+SEASONAL_PERIOD = 52
+
+
+def decompose_series(values, period=SEASONAL_PERIOD):
+    """
+    Run robust STL on a single weekly series.
+    Returns (trend, seasonal, resid) arrays. Series shorter than two full
+    periods cannot be decomposed and come back as NaN.
+    """
+    from statsmodels.tsa.seasonal import STL
+
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2 * period:
+        empty = np.full(len(values), np.nan)
+        return empty, empty.copy(), empty.copy()
+    result = STL(values, period=period, robust=True).fit()
+    return np.asarray(result.trend), np.asarray(result.seasonal), np.asarray(result.resid)
+
+
+def _decompose_chunk(args):
+    """Worker: decompose a batch of store series."""
+    blocks, period = args
+    return [decompose_series(block, period) for block in blocks]
+
+
+def regular_weeks(df):
+    """
+    Weekly sales per store on a regular Friday grid (asfreq('W-FRI')), sorted by
+    (Store, Date). Weeks missing from a store's series keep NaN in Weekly_Sales
+    and are linearly interpolated in Filled_Sales, which is what STL sees.
+    """
+    # One value per (Store, Date); department-level rows are summed first
+    sales = df.groupby(['Store', 'Date'])['Weekly_Sales'].sum()
+    frames = []
+    for store, series in sales.groupby(level='Store'):
+        series = series.droplevel('Store').asfreq('W-FRI')
+        frames.append(pd.DataFrame({'Store': store, 'Date': series.index, 'Weekly_Sales': series.to_numpy(),
+                                    'Filled_Sales': series.interpolate().to_numpy()}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def decompose_all_stores(df, period=SEASONAL_PERIOD, max_workers=None):
+    """
+    Decompose every store's weekly sales series across a process pool.
+    Returns a long DataFrame with Store, Date, Weekly_Sales, Trend, Seasonal, Resid
+    on a regular weekly grid (see regular_weeks), sorted by (Store, Date).
+    """
+    data = regular_weeks(df)
+    store_col = data['Store'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, store_col[1:] != store_col[:-1]])
+    blocks = np.split(data.pop('Filled_Sales').to_numpy(dtype=float), starts[1:])
+
+    n_workers = max_workers or os.cpu_count() or 1
+    n_chunks = min(len(blocks), n_workers * 4)
+    chunks = [list(c) for c in np.array_split(np.arange(len(blocks)), max(n_chunks, 1))]
+    jobs = [([blocks[i] for i in chunk], period) for chunk in chunks if chunk]
+
+    if n_workers == 1 or len(jobs) == 1:
+        results = [_decompose_chunk(job) for job in jobs]
+    else:
+        # Spawned workers: forking the Streamlit server would copy its threads and open sockets
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=get_context("spawn")) as pool:
+            results = list(pool.map(_decompose_chunk, jobs))
+
+    parts = [part for chunk in results for part in chunk]
+    data['Trend'] = np.concatenate([p[0] for p in parts])
+    data['Seasonal'] = np.concatenate([p[1] for p in parts])
+    data['Resid'] = np.concatenate([p[2] for p in parts])
+    return data
+
+
+def seasonal_summary(components):
+    """
+    Summarise the seasonal component of each store.
+    Seasonal_Amplitude is the peak-to-trough range of the seasonal component,
+    Relative_Amplitude divides it by the store's mean trend level, and
+    Seasonal_Strength is max(0, 1 - Var(resid) / Var(seasonal + resid)).
+    """
+    detrended = components['Seasonal'] + components['Resid']
+    tmp = components[['Store', 'Trend', 'Seasonal', 'Resid']].assign(Detrended=detrended)
+    grouped = tmp.groupby('Store')
+    summary = pd.DataFrame({
+        'Mean_Trend': grouped['Trend'].mean(),
+        'Seasonal_Amplitude': grouped['Seasonal'].max() - grouped['Seasonal'].min(),
+        'Resid_Var': grouped['Resid'].var(),
+        'Detrended_Var': grouped['Detrended'].var(),
+    })
+    summary['Relative_Amplitude'] = summary['Seasonal_Amplitude'] / summary['Mean_Trend']
+    strength = 1 - summary['Resid_Var'] / summary['Detrended_Var']
+    summary['Seasonal_Strength'] = strength.clip(lower=0)
+    summary = summary.drop(columns=['Resid_Var', 'Detrended_Var']).reset_index()
+    return summary.sort_values('Seasonal_Amplitude', ascending=False, ignore_index=True)
+
+
+def _cache_dir():
+    return os.path.join(os.path.dirname(os.path.abspath(get_data_path())), "cache")
+
+
+def _cache_path(data_version, period):
+    key = hashlib.md5(f"{data_version}|{period}".encode()).hexdigest()[:16]
+    return os.path.join(_cache_dir(), f"stl_{key}.pkl")
+
+
+def precompute(period=SEASONAL_PERIOD, max_workers=None):
+    """
+    Batch job: decompose all stores for the current data version and write the cache.
+    Returns (components, summary).
+    """
+    components = decompose_all_stores(get_data(), period=period, max_workers=max_workers)
+    # Index by store so pages can pull one store's series with a sorted-index lookup
+    components = components.set_index('Store')
+    summary = seasonal_summary(components.reset_index())
+    os.makedirs(_cache_dir(), exist_ok=True)
+    pd.to_pickle((components, summary), _cache_path(get_data_version(), period))
+    return components, summary
+
+
+@perf.cache_resource(show_spinner="Decomposing store sales (STL)...")
+def _load_decomposition(data_version, period):
+    path = _cache_path(data_version, period)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+    return precompute(period=period)
+
+
+def get_decomposition(period=SEASONAL_PERIOD):
+    """
+    Cached STL components for every store.
+    Returns (components, summary): components is indexed by Store with
+    Date, Weekly_Sales, Trend, Seasonal and Resid columns; summary holds one
+    row per store ranked by seasonal amplitude.
+    """
+    return _load_decomposition(get_data_version(), period)
+
+
+def get_store_components(store, period=SEASONAL_PERIOD):
+    """Return the decomposition of a single store's weekly sales."""
+    components, _ = get_decomposition(period)
+    return components.loc[[store]].reset_index()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute STL decompositions for every store.")
+    parser.add_argument("--period", type=int, default=SEASONAL_PERIOD, help="Seasonal period in weeks")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+    _, summary = precompute(period=args.period, max_workers=args.workers)
+    print(f"Decomposed {len(summary)} stores -> {_cache_path(get_data_version(), args.period)}")
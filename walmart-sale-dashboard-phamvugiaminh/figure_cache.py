@@ -0,0 +1,41 @@
+"""
+Matplotlib figures rendered once and served as PNG bytes.
+
+st.pyplot rasterizes its figure again on every rerun, which for the seaborn
+heatmaps costs more than the rest of the section. Pages pass a draw() callable
+returning a matplotlib Figure instead; it only runs on a cache miss, and the
+PNG is keyed on (figure id, data version, params) - params being whatever the
+figure depends on, usually the global filter key.
+"""
+import io
+
+import streamlit as st
+
+import perf
+from utils import get_data_version
+
+# Same output as st.pyplot's defaults
+SAVEFIG_KWARGS = {"format": "png", "dpi": 200, "bbox_inches": "tight"}
+# st.image downsizes (and re-encodes) images wider than 2 x 730 px, so render at most that wide
+MAX_WIDTH_PX = 2 * 730
+
+
+def figure_to_png(fig):
+    dpi = min(SAVEFIG_KWARGS["dpi"], int(MAX_WIDTH_PX / fig.get_figwidth()))
+    buf = io.BytesIO()
+    fig.savefig(buf, **{**SAVEFIG_KWARGS, "dpi": dpi})
+    return buf.getvalue()
+
+
+@perf.cache_resource(show_spinner=False, max_entries=64)
+def _render_png(data_version, figure_id, params, _draw):
+    return figure_to_png(_draw())
+
+
+def show_figure(figure_id, params, draw):
+    """
+    Display the Figure returned by draw(), rendered once per data version and params.
+    draw() should build a matplotlib.figure.Figure directly (not through pyplot),
+    so nothing has to be closed afterwards.
+    """
+    st.image(_render_png(get_data_version(), figure_id, params, draw), use_container_width=True)
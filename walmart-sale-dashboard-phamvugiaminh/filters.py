@@ -0,0 +1,225 @@
+"""
+Global sidebar filters shared by every Walmart page.
+
+The filter (date range, stores, climate groups, holiday / non-holiday weeks)
+lives in st.session_state, so it carries over when the user switches pages.
+Applying it is a single cached step keyed by the predicate: pages asking for
+the same filter get the same filtered view, panel and aggregates back without
+recomputing them.
+"""
+from dataclasses import dataclass, replace
+
+import pandas as pd
+import streamlit as st
+
+import perf
+from panel import get_panel
+from sales_index import get_store_date_index
+from utils import get_data_version
+
+HOLIDAY_OPTIONS = {
+    "All weeks": None,
+    "Holiday weeks only": 1,
+    "Non-holiday weeks only": 0,
+}
+
+
+@dataclass(frozen=True)
+class SalesFilter:
+    """Immutable, hashable description of the global filter."""
+    start: object = None
+    end: object = None
+    stores: tuple = ()
+    climate_groups: tuple = ()
+    holiday: object = None  # None = all weeks, 1 = holiday only, 0 = non-holiday only
+
+    @property
+    def is_empty(self):
+        return (self.start is None and self.end is None and not self.stores
+                and not self.climate_groups and self.holiday is None)
+
+    def key(self):
+        return (self.start, self.end, self.stores, self.climate_groups, self.holiday)
+
+    def describe(self):
+        """Short human-readable summary for captions."""
+        parts = []
+        if self.start is not None or self.end is not None:
+            parts.append(f"{self.start or '…'} → {self.end or '…'}")
+        if self.stores:
+            parts.append(f"{len(self.stores)} store(s)")
+        if self.climate_groups:
+            parts.append("climate " + ", ".join(str(g) for g in self.climate_groups))
+        if self.holiday is not None:
+            parts.append("holiday weeks" if self.holiday == 1 else "non-holiday weeks")
+        return "; ".join(parts) if parts else "no filters"
+
+
+# ------------------------------------------------------------------
+# Sidebar widgets with state that survives page switches
+# ------------------------------------------------------------------
+def _persist(name):
+    st.session_state[f"_flt_{name}"] = st.session_state[f"flt_{name}"]
+
+
+def _restore(name, value):
+    """Seed a widget's state from the persisted value (widgets are cleared when a page has none)."""
+    st.session_state[f"flt_{name}"] = value
+
+
+def _reset_filters():
+    for name in ("dates", "stores", "climate", "holiday"):
+        st.session_state.pop(f"_flt_{name}", None)
+        st.session_state.pop(f"flt_{name}", None)
+
+
+def render_sidebar_filters():
+    """Render the global filter widgets in the sidebar and return the current SalesFilter."""
+    index = get_store_date_index()
+    frame = index.frame
+    min_d = pd.Timestamp(frame['Date'].min()).date()
+    max_d = pd.Timestamp(frame['Date'].max()).date()
+
+    with st.sidebar:
+        st.markdown("### 🔎 Global Filters")
+
+        start, end = st.session_state.get("_flt_dates", (min_d, max_d))
+        _restore("dates", (max(min_d, min(start, max_d)), min(max_d, max(end, min_d))))
+        start, end = st.slider("Date range", min_value=min_d, max_value=max_d, format="YYYY-MM-DD",
+                               key="flt_dates", on_change=_persist, args=("dates",))
+
+        valid_stores = set(index.stores.tolist())
+        _restore("stores", [s for s in st.session_state.get("_flt_stores", []) if s in valid_stores])
+        stores = st.multiselect("Stores (empty = all)", index.stores.tolist(),
+                                key="flt_stores", on_change=_persist, args=("stores",))
+
+        climate_groups = []
+        if 'Climate_Group' in frame.columns:
+            groups = sorted(frame['Climate_Group'].dropna().unique().tolist())
+            _restore("climate", [g for g in st.session_state.get("_flt_climate", []) if g in groups])
+            climate_groups = st.multiselect("Climate groups (empty = all)", groups,
+                                            key="flt_climate", on_change=_persist, args=("climate",))
+
+        holiday_label = "All weeks"
+        if 'Holiday_Flag' in frame.columns:
+            _restore("holiday", st.session_state.get("_flt_holiday", "All weeks"))
+            holiday_label = st.radio("Week type", list(HOLIDAY_OPTIONS), key="flt_holiday",
+                                     on_change=_persist, args=("holiday",))
+
+        st.button("Reset filters", key="flt_reset", on_click=_reset_filters)
+        st.markdown("---")
+
+    return SalesFilter(
+        start=None if start == min_d else start,
+        end=None if end == max_d else end,
+        stores=tuple(sorted(stores)),
+        climate_groups=tuple(sorted(climate_groups)),
+        holiday=HOLIDAY_OPTIONS[holiday_label],
+    )
+
+
+# ------------------------------------------------------------------
+# Cached filter application (keyed by data version + predicate)
+# ------------------------------------------------------------------
+@perf.cache_resource(show_spinner=False)
+def _store_climate(data_version):
+    frame = get_store_date_index().frame
+    return frame.groupby('Store')['Climate_Group'].first()
+
+
+def resolve_stores(flt):
+    """
+    Stores selected by the store and climate-group filters.
+    Returns None when every store is selected, otherwise a (possibly empty) tuple.
+    """
+    if not flt.stores and not flt.climate_groups:
+        return None
+    stores = set(flt.stores)
+    if flt.climate_groups:
+        climate = _store_climate(get_data_version())
+        in_groups = set(climate.index[climate.isin(flt.climate_groups)].tolist())
+        stores = stores & in_groups if stores else in_groups
+    return tuple(sorted(stores))
+
+
+@perf.cache_resource(show_spinner=False, max_entries=32)
+def _filtered_data(data_version, key, dropna):
+    flt = SalesFilter(*key)
+    index = get_store_date_index()
+    stores = resolve_stores(flt)
+    if stores == ():
+        view = index.frame.iloc[0:0]
+    else:
+        view = index.view(stores=stores, start=flt.start, end=flt.end)
+    if flt.holiday is not None:
+        view = view[view['Holiday_Flag'].to_numpy() == flt.holiday]
+    if dropna:
+        mask = view[list(dropna)].notna().all(axis=1).to_numpy()
+        if not mask.all():
+            view = view[mask]
+    return view
+
+
+def get_filtered_data(flt, dropna=()):
+    """
+    Rows matching the filter, sorted by (Store, Date). The result is shared
+    between pages and reruns: treat it as read-only.
+    """
+    view = _filtered_data(get_data_version(), flt.key(), tuple(dropna))
+    perf.track_frame("Filtered data" if not dropna else f"Filtered data (no NaN in {', '.join(dropna)})", view)
+    return view
+
+
+@perf.cache_resource(show_spinner=False, max_entries=32)
+def _filtered_panel(data_version, key):
+    flt = SalesFilter(*key)
+    return get_panel().subset(stores=resolve_stores(flt), start=flt.start, end=flt.end,
+                              holiday=flt.holiday)
+
+
+def get_filtered_panel(flt):
+    """SalesPanel restricted to the filter (the full panel when no filter is set)."""
+    if flt.is_empty:
+        return get_panel()
+    return _filtered_panel(get_data_version(), flt.key())
+
+
+# Group keys that are derived from other columns rather than stored
+_DERIVED_KEYS = {
+    'Month': lambda df: df['Date'].dt.month.rename('Month'),
+    'Year': lambda df: df['Date'].dt.year.rename('Year'),
+}
+
+
+@perf.cache_resource(show_spinner=False, max_entries=128)
+def _aggregate(data_version, key, by, value, how, dropna):
+    df = get_filtered_data(SalesFilter(*key), dropna=dropna)
+    keys = [_DERIVED_KEYS[k](df) if k in _DERIVED_KEYS else k
+            for k in (by if isinstance(by, tuple) else (by,))]
+    return df.groupby(keys)[value].agg(how).reset_index()
+
+
+def cached_aggregate(flt, by, value='Weekly_Sales', how='mean', dropna=()):
+    """
+    groupby(by)[value].agg(how) over the filtered rows, cached per filter.
+    `by` may be a column name or a tuple of column names; 'Month' and 'Year'
+    are derived from Date. Returns a DataFrame.
+    """
+    return _aggregate(get_data_version(), flt.key(), by, value, how, tuple(dropna))
+
+
+def require_rows(df):
+    """Stop the page with a notice when the filter leaves no rows."""
+    if df.empty:
+        st.warning("No rows match the current filters. Adjust or reset them in the sidebar.")
+        st.stop()
+
+
+def with_holiday(flt, holiday):
+    """Copy of the filter with a different week-type restriction."""
+    return replace(flt, holiday=holiday)
+
+
+def with_climate_groups(flt, groups):
+    """Copy of the filter restricted to the given climate groups."""
+    return replace(flt, climate_groups=tuple(sorted(groups)))
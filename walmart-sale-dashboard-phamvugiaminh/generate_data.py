@@ -0,0 +1,237 @@
+"""
+Synthetic Walmart sales data for scale testing.
+
+Writes data with the same schema as data/Walmart_Sales_processed_with_climate.csv
+(Store, Date, Weekly_Sales, Holiday_Flag, Temperature, Fuel_Price, CPI,
+Unemployment, Climate_Group) for any number of stores and years. With
+--depts > 1 every store-week is split into departments and a Dept column is
+added; the dashboard sums Weekly_Sales back to store level.
+
+The generated sales have yearly seasonality with a November-December ramp,
+spikes in the four holiday weeks (Super Bowl, Labor Day, Thanksgiving,
+Christmas) and a mild temperature effect; temperature follows the climate
+group of the store. Rows are produced per block of stores with NumPy, so
+memory stays bounded and 100M rows take minutes (use Parquet at that size):
+
+    python generate_data.py --stores 4500 --years 3 --depts 10 --out data/synthetic.parquet
+    WALMART_DATA_PATH=data/synthetic.parquet streamlit run Home.py
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# (mean temperature °F, yearly amplitude, weekly noise) per climate group, see README "Climate Groups"
+CLIMATE_PROFILES = {
+    1: (49.0, 26.0, 6.0),   # Cold, high variation
+    2: (69.0, 15.0, 3.0),   # Warm, stable
+    3: (71.0, 11.0, 2.5),   # Hot, very stable
+    4: (57.0, 18.0, 4.0),   # Mild, relatively stable
+    5: (68.0, 22.0, 6.0),   # Hot, high variation
+}
+# Share of stores per climate group in the bundled data
+CLIMATE_SHARES = np.array([14, 8, 8, 9, 6]) / 45
+
+# Sales multiplier in the holiday week, keyed by holiday
+HOLIDAY_LIFT = {'super_bowl': 1.06, 'labor_day': 1.03, 'thanksgiving': 1.45, 'christmas': 0.90}
+
+
+def week_dates(start='2010-02-05', n_years=3, n_weeks=None):
+    """Friday week-ending dates, `n_weeks` of them (default: 52 per year)."""
+    n_weeks = n_weeks or int(round(n_years * 52))
+    return pd.date_range(pd.Timestamp(start), periods=n_weeks, freq='7D').to_numpy()
+
+
+def _nth_weekday(years, month, weekday, n):
+    """Date of the n-th `weekday` (Mon=0) of `month` in each year."""
+    first = pd.to_datetime(pd.DataFrame({'year': years, 'month': month, 'day': 1}))
+    offset = (weekday - first.dt.weekday) % 7 + 7 * (n - 1)
+    return (first + pd.to_timedelta(offset, unit='D')).to_numpy()
+
+
+def holiday_weeks(dates):
+    """
+    Holiday label per week (empty string for normal weeks). A week ending on
+    Friday d is a holiday week when the holiday falls in (d - 7 days, d].
+    """
+    years = np.arange(pd.Timestamp(dates[0]).year, pd.Timestamp(dates[-1]).year + 1)
+    holidays = {
+        'super_bowl': _nth_weekday(years, 2, 6, 1),     # first Sunday of February
+        'labor_day': _nth_weekday(years, 9, 0, 1),      # first Monday of September
+        'thanksgiving': _nth_weekday(years, 11, 3, 4),  # fourth Thursday of November
+        'christmas': pd.to_datetime(pd.DataFrame({'year': years, 'month': 12, 'day': 25})).to_numpy(),
+    }
+    labels = np.full(len(dates), '', dtype=object)
+    for name, days in holidays.items():
+        pos = np.searchsorted(dates, days, side='left')
+        ok = pos < len(dates)
+        pos = pos[ok]
+        labels[pos[(dates[pos] - days[ok]) < np.timedelta64(7, 'D')]] = name
+    return labels
+
+
+def _seasonality(dates):
+    """Multiplicative yearly sales profile: mild summer bump and a Nov-Dec ramp."""
+    doy = pd.DatetimeIndex(dates).dayofyear.to_numpy()
+    summer = 0.04 * np.cos(2 * np.pi * (doy - 190) / 365.25)
+    ramp = 0.22 * np.exp(-0.5 * ((doy - 352) / 12.0) ** 2)
+    return 1.0 + summer + ramp
+
+
+class WalmartGenerator:
+    """Draws store-level parameters once and generates weekly rows per block of stores."""
+
+    def __init__(self, n_stores=45, n_years=3, n_depts=1, start='2010-02-05', seed=0, n_weeks=None):
+        self.n_stores = n_stores
+        self.n_depts = n_depts
+        self.seed = seed
+        self.dates = week_dates(start, n_years, n_weeks)
+        self.labels = holiday_weeks(self.dates)
+        self.holiday_flag = (self.labels != '').astype(np.int64)
+        self.holiday_mult = np.array([HOLIDAY_LIFT.get(lbl, 1.0) for lbl in self.labels])
+        self.seasonal = _seasonality(self.dates)
+        doy = pd.DatetimeIndex(self.dates).dayofyear.to_numpy()
+        self.temp_wave = -np.cos(2 * np.pi * (doy - 20) / 365.25)
+        self.t_years = np.arange(len(self.dates)) / 52.0
+
+        rng = np.random.default_rng(seed)
+        n = n_stores
+        self.climate = rng.choice(np.arange(1, 6), size=n, p=CLIMATE_SHARES)
+        profile = np.array([CLIMATE_PROFILES[g] for g in self.climate])
+        self.temp_mean = profile[:, 0] + rng.normal(0, 3, n)
+        self.temp_amp = profile[:, 1] * rng.uniform(0.85, 1.15, n)
+        self.temp_noise = profile[:, 2]
+        self.base_sales = rng.lognormal(np.log(9.5e5), 0.55, n)
+        self.growth = rng.normal(0.0, 0.03, n)
+        self.cpi_base = np.where(rng.random(n) < 0.6, rng.normal(212, 4, n), rng.normal(130, 2, n))
+        self.unemp_base = rng.uniform(4.0, 12.5, n)
+        self.fuel_offset = rng.normal(0, 0.12, n)
+        # National fuel price path shared by every store
+        steps = rng.normal(0.006, 0.04, len(self.dates))
+        self.fuel_path = 2.6 + np.cumsum(steps)
+        # Department shares of store sales
+        if n_depts > 1:
+            self.dept_shares = rng.dirichlet(np.full(n_depts, 2.0), size=n)
+
+    @property
+    def n_rows(self):
+        return self.n_stores * len(self.dates) * self.n_depts
+
+    def block(self, first, last):
+        """DataFrame for stores first..last-1 (0-based), sorted by Store, (Dept,) Date."""
+        rng = np.random.default_rng([self.seed, first])
+        idx = np.arange(first, last)
+        s, w = len(idx), len(self.dates)
+
+        temp = (self.temp_mean[idx, None] + self.temp_amp[idx, None] * self.temp_wave[None, :]
+                + rng.normal(0, 1, (s, w)) * self.temp_noise[idx, None])
+        # Sales dip slightly in extreme heat and cold
+        temp_effect = 1.0 - 0.0004 * np.abs(temp - 65.0)
+        trend = 1.0 + self.growth[idx, None] * self.t_years[None, :]
+        sales = (self.base_sales[idx, None] * trend * self.seasonal[None, :] * self.holiday_mult[None, :]
+                 * temp_effect * rng.lognormal(0, 0.05, (s, w)))
+        fuel = self.fuel_path[None, :] + self.fuel_offset[idx, None] + rng.normal(0, 0.02, (s, w))
+        cpi = self.cpi_base[idx, None] * (1.0 + 0.021 * self.t_years[None, :])
+        unemp = (self.unemp_base[idx, None] - 0.35 * self.t_years[None, :]
+                 + np.repeat(rng.normal(0, 0.15, (s, (w + 12) // 13)), 13, axis=1)[:, :w])
+
+        d = self.n_depts
+        if d > 1:
+            # (stores, depts, weeks): each department takes its share of the store's weekly sales
+            shares = self.dept_shares[idx][:, :, None] * rng.lognormal(0, 0.08, (s, d, w))
+            sales = sales[:, None, :] * shares
+            expand = lambda a: np.broadcast_to(a[:, None, :], (s, d, w))  # noqa: E731
+            temp, fuel, cpi, unemp = expand(temp), expand(fuel), expand(cpi), expand(unemp)
+
+        data = {
+            'Store': np.repeat(idx + 1, w * d),
+            'Dept': np.tile(np.repeat(np.arange(1, d + 1), w), s) if d > 1 else None,
+            'Date': np.tile(self.dates, s * d),
+            'Weekly_Sales': np.round(sales.reshape(-1), 2),
+            'Holiday_Flag': np.tile(self.holiday_flag, s * d),
+            'Temperature': np.round(temp.reshape(-1), 2),
+            'Fuel_Price': np.round(fuel.reshape(-1), 3),
+            'CPI': np.round(cpi.reshape(-1), 4),
+            'Unemployment': np.round(unemp.reshape(-1), 3),
+            'Climate_Group': np.repeat(self.climate[idx], w * d),
+        }
+        return pd.DataFrame({k: v for k, v in data.items() if v is not None})
+
+    def blocks(self, rows_per_block=2_000_000):
+        """Yield DataFrames covering every store, about `rows_per_block` rows each."""
+        stores_per_block = max(1, rows_per_block // (len(self.dates) * self.n_depts))
+        for first in range(0, self.n_stores, stores_per_block):
+            yield self.block(first, min(first + stores_per_block, self.n_stores))
+
+
+def generate(n_stores=45, n_years=3, n_depts=1, start='2010-02-05', seed=0, climate=True, n_weeks=None):
+    """Return the whole synthetic dataset as one DataFrame (for small sizes)."""
+    gen = WalmartGenerator(n_stores, n_years, n_depts, start, seed, n_weeks)
+    df = pd.concat(gen.blocks(), ignore_index=True)
+    return df if climate else df.drop(columns='Climate_Group')
+
+
+def write(path, n_stores=45, n_years=3, n_depts=1, start='2010-02-05', seed=0, climate=True,
+          n_weeks=None, rows_per_block=2_000_000, verbose=False):
+    """
+    Stream the synthetic dataset to `path` block by block. The format follows
+    the extension: .parquet (needs pyarrow) or .csv. Returns the row count.
+    """
+    gen = WalmartGenerator(n_stores, n_years, n_depts, start, seed, n_weeks)
+    parquet = path.endswith('.parquet')
+    if parquet and pa is None:
+        raise ImportError("Writing Parquet requires pyarrow (pip install pyarrow)")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    writer, rows, started = None, 0, time.perf_counter()
+    try:
+        for i, df in enumerate(gen.blocks(rows_per_block)):
+            if not climate:
+                df = df.drop(columns='Climate_Group')
+            if pa is not None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                # Store dates without a time part, as in the bundled CSV
+                table = table.set_column(table.schema.get_field_index('Date'), 'Date',
+                                         table['Date'].cast(pa.date32()))
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema) if parquet else pa_csv.CSVWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                df.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False,
+                          date_format='%Y-%m-%d')
+            rows += len(df)
+            if verbose:
+                elapsed = time.perf_counter() - started
+                print(f"  {rows:,}/{gen.n_rows:,} rows ({rows / max(elapsed, 1e-9):,.0f} rows/s)", flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Walmart sales data for scale testing.")
+    parser.add_argument("--stores", type=int, default=45, help="Number of stores")
+    parser.add_argument("--years", type=float, default=3, help="Years of weekly data")
+    parser.add_argument("--weeks", type=int, default=None, help="Number of weeks (overrides --years)")
+    parser.add_argument("--depts", type=int, default=1, help="Departments per store (>1 adds a Dept column)")
+    parser.add_argument("--start", default="2010-02-05", help="First week-ending date")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-climate", action="store_true", help="Omit the Climate_Group column")
+    parser.add_argument("--rows-per-block", type=int, default=2_000_000)
+    parser.add_argument("--out", default=os.path.join("data", "Walmart_Sales_synthetic.csv"),
+                        help="Output file (.csv or .parquet)")
+    args = parser.parse_args()
+    t0 = time.perf_counter()
+    n = write(args.out, args.stores, args.years, args.depts, args.start, args.seed,
+              climate=not args.no_climate, n_weeks=args.weeks, rows_per_block=args.rows_per_block, verbose=True)
+    print(f"Wrote {n:,} rows to {args.out} in {time.perf_counter() - t0:.1f}s")
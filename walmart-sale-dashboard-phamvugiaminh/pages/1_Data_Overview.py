@@ -2,10 +2,13 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from utils import get_raw_data
+import perf
 
 
+perf.start_page("1_Data_Overview")
 st.title("Data Overview")
 df = get_raw_data()
+perf.track_frame("Data", df)
 
 # ============================
 # Dataset Info
@@ -99,10 +102,11 @@ else:
 # Preview Data
 # ============================
 st.subheader("Preview Data")
-head_n = st.slider("Rows to preview (head)", 5, 10, 5, step=1)
+head_n = st.slider("Rows to preview (head)", 5, 10, 5, step=1, key="overview_head_n")
 st.dataframe(df.head(head_n), use_container_width=True)
 
-if st.checkbox("Show random sample"):
-    sample_n = st.slider("Sample size", 5, 50, 10, step=5)
+if st.checkbox("Show random sample", key="overview_sample"):
+    sample_n = st.slider("Sample size", 5, 50, 10, step=5, key="overview_sample_n")
     st.dataframe(df.sample(min(sample_n, len(df)), random_state=42), use_container_width=True)
 
+perf.end_page()
@@ -1,19 +1,23 @@
 import streamlit as st
+import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import pandas as pd
-from utils import get_data
+import numpy as np
+from filters import get_filtered_data, get_filtered_panel, render_sidebar_filters, require_rows
+import perf
 
 
+perf.start_page("2_Sales_Trend")
 st.title("Sales Trend")
-df = get_data()
+flt = render_sidebar_filters()
+df = get_filtered_data(flt)
+require_rows(df)
 
-if {'Date', 'Weekly_Sales'}.issubset(df.columns):
-    agg = (
-        df.groupby('Date', as_index=False)['Weekly_Sales']
-        .sum()
-        .sort_values('Date')
-    )
-    window = st.slider("Smoothing window (weeks)", 2, 12, 4, step=1)
+if {'Store', 'Date', 'Weekly_Sales'}.issubset(df.columns):
+    panel = get_filtered_panel(flt)
+    agg = pd.DataFrame({'Date': panel.dates, 'Weekly_Sales': panel.total_by_week('Weekly_Sales')}).dropna()
+    window = st.slider("Smoothing window (weeks)", 2, 12, 4, step=1, key="trend_window")
     agg['SMA'] = agg['Weekly_Sales'].rolling(window=window, min_periods=1).mean()
 
     fig = go.Figure()
@@ -36,17 +40,66 @@ if {'Date', 'Weekly_Sales'}.issubset(df.columns):
     )
     st.plotly_chart(fig, use_container_width=True)
 
+# Seasonal decomposition (precomputed STL per store)
+st.subheader("Seasonal Decomposition (STL)")
+try:
+    from decomposition import get_decomposition, get_store_components
+    components, seasonal_rank = get_decomposition()
+except ModuleNotFoundError:
+    components = seasonal_rank = None
+    st.info("Install statsmodels to enable the STL decomposition.")
+
+if seasonal_rank is not None:
+    # Decomposition is precomputed for every store; the filters pick which ones to show
+    seasonal_rank = seasonal_rank[seasonal_rank['Store'].isin(df['Store'].unique())]
+
+if seasonal_rank is not None and seasonal_rank['Seasonal_Amplitude'].notna().any():
+    store = st.selectbox("Store", seasonal_rank['Store'].sort_values().tolist(), key="trend_store")
+    comp = get_store_components(store)
+    fig_stl = make_subplots(rows=4, cols=1, shared_xaxes=True, vertical_spacing=0.04,
+                            subplot_titles=("Observed", "Trend", "Seasonal", "Residual"))
+    for row, col in enumerate(['Weekly_Sales', 'Trend', 'Seasonal', 'Resid'], start=1):
+        fig_stl.add_trace(go.Scatter(x=comp['Date'], y=comp[col], mode='lines', name=col,
+                                     line=dict(width=2)), row=row, col=1)
+    fig_stl.update_layout(template='plotly_white', height=700, showlegend=False,
+                          title=f"Store {store}: Trend / Seasonal / Residual")
+    st.plotly_chart(fig_stl, use_container_width=True)
+
+    top_n = len(seasonal_rank)
+    if top_n > 1:
+        top_n = st.slider("Stores ranked by seasonal amplitude", 1, top_n, min(15, top_n), step=1,
+                          key="trend_top_n")
+    top_seasonal = seasonal_rank.head(top_n)
+    fig_amp = px.bar(
+        top_seasonal, x=top_seasonal['Store'].astype(str), y='Seasonal_Amplitude',
+        color='Seasonal_Strength', template='plotly_white',
+        title=f"Top {top_n} Stores by Seasonal Amplitude",
+        labels={'x': 'Store', 'Seasonal_Amplitude': 'Seasonal Amplitude ($)', 'Seasonal_Strength': 'Strength'}
+    )
+    st.plotly_chart(fig_amp, use_container_width=True)
+elif seasonal_rank is not None:
+    st.info("Not enough weeks per store (two full years needed) for STL decomposition.")
+
 # Insights
 st.markdown("**Insights**")
 insights = []
-if {'Date', 'Weekly_Sales'}.issubset(df.columns):
-    s = df.groupby('Date')['Weekly_Sales'].sum().sort_index()
+if {'Store', 'Date', 'Weekly_Sales'}.issubset(df.columns):
+    s = agg.set_index('Date')['Weekly_Sales']
     recent = float(s.tail(4).mean())
     prior = float(s.tail(8).head(4).mean()) if len(s) >= 8 else float(s.head(4).mean())
     momentum = "accelerating" if recent > prior else "softening" if recent < prior else "stable"
     insights.append(f"Recent 4-week average is ${recent:,.0f} vs prior ${prior:,.0f}.")
     insights.append(f"Sales momentum appears {momentum}.")
-for i in insights[:2]:
+    # Year-over-year change of the latest week, per store, from the panel tensor
+    yoy = panel.yoy_delta('Weekly_Sales', pct=True)[:, -1]
+    if np.isfinite(yoy).any():
+        growing = int((yoy > 0).sum())
+        insights.append(f"{growing} of {len(panel.stores)} stores sold more in the latest week than a year earlier.")
+if seasonal_rank is not None and seasonal_rank['Seasonal_Amplitude'].notna().any():
+    lead = seasonal_rank.iloc[0]
+    insights.append(f"Store {int(lead['Store'])} has the strongest seasonal swing "
+                    f"(${lead['Seasonal_Amplitude']:,.0f} peak-to-trough, {lead['Relative_Amplitude']:.0%} of its level).")
+for i in insights[:4]:
     st.markdown(f"- {i}")
 
 # Strategy Recommendation
@@ -54,4 +107,4 @@ st.markdown("**Strategy Recommendation**")
 st.markdown("- Align promotions with periods of rising momentum to maximize lift.")
 st.markdown("- In softening phases, tighten inventory and focus on high-velocity SKUs.")
 
-
+perf.end_page()
@@ -2,16 +2,20 @@ import streamlit as st
 import plotly.express as px
 import numpy as np
 import pandas as pd
-from utils import get_data
+from filters import get_filtered_data, render_sidebar_filters, require_rows
+import perf
 
 
+perf.start_page("3_Climate_Impact")
 st.title("Climate Impact")
-df = get_data()
+flt = render_sidebar_filters()
+df = get_filtered_data(flt)
+require_rows(df)
 
 if {'Temperature', 'Weekly_Sales'}.issubset(df.columns):
     color_col = 'Climate_Group' if 'Climate_Group' in df.columns else None
-    sample_n = st.slider("Sample points (for speed)", 2000, 15000, 6000, step=1000)
-    plot_df = df[['Temperature', 'Weekly_Sales', 'Climate_Group']].dropna().copy() if color_col else df[['Temperature', 'Weekly_Sales']].dropna().copy()
+    sample_n = st.slider("Sample points (for speed)", 2000, 15000, 6000, step=1000, key="climate_sample_n")
+    plot_df = df[['Temperature', 'Weekly_Sales', 'Climate_Group']].dropna() if color_col else df[['Temperature', 'Weekly_Sales']].dropna()
     if len(plot_df) > sample_n:
         plot_df = plot_df.sample(sample_n, random_state=42)
 
@@ -30,12 +34,12 @@ if {'Temperature', 'Weekly_Sales'}.issubset(df.columns):
 st.markdown("**Insights**")
 points = []
 if {'Temperature', 'Weekly_Sales'}.issubset(df.columns):
-    tmp = df[['Temperature', 'Weekly_Sales']].dropna().copy()
+    tmp = df[['Temperature', 'Weekly_Sales']].dropna()
     corr = float(tmp['Temperature'].corr(tmp['Weekly_Sales']))
     direction = "positive" if corr > 0 else "negative" if corr < 0 else "neutral"
     points.append(f"Overall {direction} relationship between temperature and sales (corr {corr:.2f}).")
     if 'Climate_Group' in df.columns and df['Climate_Group'].notna().any():
-        grp = df.dropna(subset=['Climate_Group'])[['Temperature', 'Weekly_Sales', 'Climate_Group']].copy()
+        grp = df.dropna(subset=['Climate_Group'])[['Temperature', 'Weekly_Sales', 'Climate_Group']]
         grp_corr = grp.groupby('Climate_Group').apply(lambda x: x['Temperature'].corr(x['Weekly_Sales'])).dropna()
         if not grp_corr.empty:
             strongest = grp_corr.abs().idxmax()
@@ -48,3 +52,4 @@ st.markdown("**Strategy Recommendation**")
 st.markdown("- Scale seasonal assortments in regions where warmth lifts demand.")
 st.markdown("- Adjust staffing and replenishment when temperature deviates from seasonal norms.")
 
+perf.end_page()
@@ -1,43 +1,91 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from utils import get_data
+from filters import get_filtered_data, get_filtered_panel, render_sidebar_filters, require_rows
+import perf
 
 
+perf.start_page("4_Store_Comparison")
 st.title("Store Comparison")
-df = get_data()
-
-if {'Store', 'Weekly_Sales'}.issubset(df.columns):
-    top_n = st.slider("Top N stores by average weekly sales", 5, 50, 15, step=5)
-    store_avg = (
-        df.groupby('Store', as_index=False)['Weekly_Sales']
-        .mean()
-        .sort_values('Weekly_Sales', ascending=False)
-        .head(top_n)
-    )
-    fig = px.bar(
-        store_avg,
-        x='Store', y='Weekly_Sales',
-        template='plotly_white',
-        title=f"Top {top_n} Stores by Avg Weekly Sales",
-        labels={'Weekly_Sales': 'Avg Weekly Sales ($)', 'Store': 'Store'}
-    )
+flt = render_sidebar_filters()
+df = get_filtered_data(flt)
+require_rows(df)
+
+if {'Store', 'Date', 'Weekly_Sales'}.issubset(df.columns):
+    panel = get_filtered_panel(flt)
+    first_week = pd.Timestamp(panel.dates[0]).date()
+    last_week = pd.Timestamp(panel.dates[-1]).date()
+
+    # Date window for the leaderboard; every window is answered from per-store prefix sums
+    window_choice = st.selectbox("Date window", ["All weeks", "Last 13 weeks", "Last 26 weeks", "Last 52 weeks", "Custom range"],
+                                 key="cmp_window")
+    if window_choice == "Custom range" and first_week < last_week:
+        start, end = st.slider("Weeks to include", min_value=first_week, max_value=last_week,
+                               value=(first_week, last_week), format="YYYY-MM-DD", key="cmp_weeks")
+    elif window_choice in ("All weeks", "Custom range"):
+        start, end = first_week, last_week
+    else:
+        n_weeks = int(window_choice.split()[1])
+        start = pd.Timestamp(panel.dates[max(0, len(panel.dates) - n_weeks)]).date()
+        end = last_week
+
+    store_means = pd.DataFrame({
+        'Store': panel.stores,
+        'Weekly_Sales': panel.window_mean('Weekly_Sales', start, end),
+        'Total_Sales': panel.window_sum('Weekly_Sales', start, end),
+    }).dropna(subset=['Weekly_Sales'])
+    compare_ly = st.checkbox("Compare with the same window last year", key="cmp_last_year")
+    if compare_ly:
+        year = pd.Timedelta(weeks=52)
+        store_means['Last_Year'] = panel.window_mean(
+            'Weekly_Sales', pd.Timestamp(start) - year, pd.Timestamp(end) - year
+        )[panel.stores.searchsorted(store_means['Store'].to_numpy())]
+        store_means['YoY_%'] = (store_means['Weekly_Sales'] / store_means['Last_Year'] - 1) * 100
+
+    top_n = st.slider("Top N stores by average weekly sales", 5, 50, 15, step=5, key="cmp_top_n")
+    store_avg = store_means.sort_values('Weekly_Sales', ascending=False).head(top_n)
+    if compare_ly:
+        fig = px.bar(
+            store_avg.melt(id_vars='Store', value_vars=['Weekly_Sales', 'Last_Year'],
+                           var_name='Window', value_name='Avg_Weekly_Sales').replace(
+                {'Window': {'Weekly_Sales': f'{start} → {end}', 'Last_Year': 'Same window last year'}}),
+            x='Store', y='Avg_Weekly_Sales', color='Window', barmode='group',
+            template='plotly_white',
+            title=f"Top {top_n} Stores by Avg Weekly Sales vs Last Year",
+            labels={'Avg_Weekly_Sales': 'Avg Weekly Sales ($)', 'Store': 'Store'}
+        )
+        fig.update_xaxes(type='category', categoryorder='array', categoryarray=store_avg['Store'].tolist())
+    else:
+        fig = px.bar(
+            store_avg,
+            x='Store', y='Weekly_Sales',
+            template='plotly_white',
+            title=f"Top {top_n} Stores by Avg Weekly Sales ({start} → {end})",
+            labels={'Weekly_Sales': 'Avg Weekly Sales ($)', 'Store': 'Store'}
+        )
     st.plotly_chart(fig, use_container_width=True)
+    if compare_ly:
+        st.dataframe(store_avg.round(1), use_container_width=True, hide_index=True)
 
 # Insights
 st.markdown("**Insights**")
 bullets = []
-if {'Store', 'Weekly_Sales'}.issubset(df.columns):
-    s = df.groupby('Store')['Weekly_Sales'].mean().sort_values(ascending=False)
+if {'Store', 'Date', 'Weekly_Sales'}.issubset(df.columns):
+    s = store_means.set_index('Store')['Weekly_Sales'].sort_values(ascending=False)
     lead = s.iloc[0]
     median = s.median()
     bullets.append(f"Top store averages ${lead:,.0f} per week; median store ${median:,.0f}.")
     spread = s.quantile(0.9) - s.quantile(0.1)
     bullets.append(f"Performance spread (90th–10th pct) is ${spread:,.0f}.")
-for b in bullets[:2]:
+    if compare_ly and store_means['YoY_%'].notna().any():
+        growing = int((store_means['YoY_%'] > 0).sum())
+        bullets.append(f"{growing} of {store_means['YoY_%'].notna().sum()} stores grew versus the same window last year.")
+for b in bullets[:3]:
     st.markdown(f"- {b}")
 
 # Strategy Recommendation
 st.markdown("**Strategy Recommendation**")
 st.markdown("- Replicate winning playbooks from top stores (assortment, staffing, promos).")
 st.markdown("- Support trailing stores with targeted local assortment and demand shaping.")
+
+perf.end_page()
@@ -1,19 +1,22 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from utils import get_data
+from filters import get_filtered_data, get_filtered_panel, render_sidebar_filters, require_rows
+import perf
 
 
+perf.start_page("5_Holiday_Impact")
 st.title("Holiday Impact")
-df = get_data()
+flt = render_sidebar_filters()
+df = get_filtered_data(flt)
+require_rows(df)
 
-if {'Holiday_Flag', 'Weekly_Sales'}.issubset(df.columns):
-    agg = (
-        df.groupby('Holiday_Flag', as_index=False)['Weekly_Sales']
-        .mean()
-        .rename(columns={'Weekly_Sales': 'Avg_Weekly_Sales'})
-    )
-    agg['Week_Type'] = agg['Holiday_Flag'].map({1: 'Holiday', 0: 'Non-Holiday'})
+if {'Store', 'Date', 'Holiday_Flag', 'Weekly_Sales'}.issubset(df.columns):
+    panel = get_filtered_panel(flt)
+    is_holiday = panel.holiday_mask()
+    hol = panel.mean_where('Weekly_Sales', is_holiday)
+    non = panel.mean_where('Weekly_Sales', ~is_holiday)
+    agg = pd.DataFrame({'Week_Type': ['Non-Holiday', 'Holiday'], 'Avg_Weekly_Sales': [non, hol]}).dropna()
     fig = px.bar(
         agg, x='Week_Type', y='Avg_Weekly_Sales',
         template='plotly_white',
@@ -24,10 +27,7 @@ if {'Holiday_Flag', 'Weekly_Sales'}.issubset(df.columns):
 
 # Insights
 st.markdown("**Insights**")
-if {'Holiday_Flag', 'Weekly_Sales'}.issubset(df.columns):
-    pivot = df.groupby('Holiday_Flag')['Weekly_Sales'].mean()
-    hol = float(pivot.get(1, float('nan')))
-    non = float(pivot.get(0, float('nan')))
+if {'Store', 'Date', 'Holiday_Flag', 'Weekly_Sales'}.issubset(df.columns):
     if pd.notna(hol) and pd.notna(non) and non != 0:
         lift = (hol - non) / non * 100
         st.markdown(f"- Holiday weeks average ${hol:,.0f} vs ${non:,.0f} non-holiday.")
@@ -41,3 +41,5 @@ else:
 st.markdown("**Strategy Recommendation**")
 st.markdown("- Increase inventory, staffing, and checkout capacity during holiday periods.")
 st.markdown("- Launch targeted promotions 2–3 weeks pre-holiday to capture early demand.")
+
+perf.end_page()
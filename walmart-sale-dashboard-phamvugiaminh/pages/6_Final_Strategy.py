@@ -1,18 +1,20 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from utils import get_data
+from filters import cached_aggregate, get_filtered_data, render_sidebar_filters, require_rows
+import perf
 
 
+perf.start_page("6_Final_Strategy")
 st.title("Final Strategy")
-df = get_data()
+flt = render_sidebar_filters()
+df = get_filtered_data(flt)
+require_rows(df)
 
 # Plot: Opportunity view by Climate Group (if available), else by Store top-10
 if 'Climate_Group' in df.columns and df['Climate_Group'].notna().any():
     grp = (
-        df.dropna(subset=['Climate_Group'])
-        .groupby('Climate_Group', as_index=False)['Weekly_Sales']
-        .mean()
+        cached_aggregate(flt, 'Climate_Group', dropna=['Climate_Group'])
         .sort_values('Weekly_Sales', ascending=False)
     )
     fig = px.bar(
@@ -24,8 +26,7 @@ if 'Climate_Group' in df.columns and df['Climate_Group'].notna().any():
     st.plotly_chart(fig, use_container_width=True)
 elif {'Store', 'Weekly_Sales'}.issubset(df.columns):
     top = (
-        df.groupby('Store', as_index=False)['Weekly_Sales']
-        .mean()
+        cached_aggregate(flt, 'Store')
         .sort_values('Weekly_Sales', ascending=False)
         .head(10)
     )
@@ -41,18 +42,18 @@ elif {'Store', 'Weekly_Sales'}.issubset(df.columns):
 st.markdown("**Insights**")
 insights = []
 if {'Date', 'Weekly_Sales'}.issubset(df.columns):
-    s = df.groupby('Date')['Weekly_Sales'].sum()
+    s = cached_aggregate(flt, 'Date', how='sum').set_index('Date')['Weekly_Sales']
     head_avg = float(s.head(4).mean())
     tail_avg = float(s.tail(4).mean())
     trend = "rising" if tail_avg > head_avg else "declining" if tail_avg < head_avg else "stable"
     insights.append(f"Overall demand is {trend} into recent periods.")
 if 'Holiday_Flag' in df.columns:
-    hol = df.groupby('Holiday_Flag')['Weekly_Sales'].mean()
+    hol = cached_aggregate(flt, 'Holiday_Flag').set_index('Holiday_Flag')['Weekly_Sales']
     if 0 in hol and 1 in hol and hol[0]:
         lift = (hol[1] - hol[0]) / hol[0] * 100
         insights.append(f"Holiday lift ≈ {lift:.1f}%.")
 if 'Climate_Group' in df.columns and df['Climate_Group'].notna().any():
-    grp_avg = df.dropna(subset=['Climate_Group']).groupby('Climate_Group')['Weekly_Sales'].mean()
+    grp_avg = cached_aggregate(flt, 'Climate_Group', dropna=['Climate_Group']).set_index('Climate_Group')['Weekly_Sales']
     if len(grp_avg) >= 2:
         uplift = (grp_avg.max() - grp_avg.min()) / grp_avg.min() * 100 if grp_avg.min() else 0
         insights.append(f"Climate segments differ by ≈ {uplift:.1f}% in avg sales.")
@@ -66,5 +67,4 @@ st.markdown("- Localize seasonal assortments by climate segment; emphasize warm-
 st.markdown("- Replicate top-store playbooks (assortment, ops cadence, promo timing) across similar markets.")
 st.markdown("- Use trend momentum to time promotions; shift budgets when momentum softens.")
 
-
-
+perf.end_page()
@@ -3,36 +3,44 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-import seaborn as sns
-from utils import get_data
+from filters import get_filtered_data, render_sidebar_filters, require_rows, with_climate_groups, with_holiday
+from utils import has_modules
+import perf
 import warnings
 warnings.filterwarnings('ignore')
 
-# Import statistical libraries with error handling
-try:
-    from scipy.stats import shapiro, levene, kruskal
-    STATS_AVAILABLE = True
-except ImportError as e:
-    st.error(f"Statistical libraries not available: {e}")
+# Statistical libraries are imported inside the cached tests; only check they are installed here
+STATS_AVAILABLE = has_modules("scipy")
+if not STATS_AVAILABLE:
+    st.error("Statistical libraries not available: No module named 'scipy'")
     st.info("Please install required packages: `pip install scipy`")
-    STATS_AVAILABLE = False
 
 st.set_page_config(page_title="BQ1: Climate Impact Analysis", layout="wide")
+perf.start_page("8_Business_Question_1")
+
+def group_key(g):
+    """Climate group as used by the label and colour maps: an int for numeric groups, else the label itself."""
+    try:
+        number = float(g)
+    except (TypeError, ValueError):
+        return g
+    return int(number) if number.is_integer() else g
 
 # ------------------------------------------------------------------
 # CACHED FUNCTIONS - Avoid recomputation
 # ------------------------------------------------------------------
-@st.cache_data
+@perf.cache_data
 def compute_overall_stats(df_clean):
     """Cache overall statistics by climate group"""
     stats = df_clean.groupby('Climate_Group')['Weekly_Sales'].agg(['mean', 'median', 'std', 'count']).reset_index()
     stats.columns = ['Climate_Group', 'Mean', 'Median', 'Std', 'Count']
     return stats
 
-@st.cache_data
+@perf.cache_data
 def compute_normality_tests(df_non, groups_list):
     """Cache Shapiro-Wilk normality test results"""
+    from scipy.stats import shapiro
+
     normality = {}
     normality_results = []
     
@@ -44,7 +52,7 @@ def compute_normality_tests(df_non, groups_list):
         
         result = "Normal" if p >= 0.05 else "NOT Normal"
         normality_results.append({
-            'Climate_Group': int(g),
+            'Climate_Group': group_key(g),
             'W-statistic': w,
             'p-value': p,
             'Result': result
@@ -52,16 +60,20 @@ def compute_normality_tests(df_non, groups_list):
     
     return normality, normality_results
 
-@st.cache_data
+@perf.cache_data
 def compute_levene_test(df_non, groups_list):
     """Cache Levene test results"""
+    from scipy.stats import levene
+
     group_data = [df_non[df_non['Climate_Group']==g]['Weekly_Sales'].values for g in groups_list]
     lev_stat, lev_p = levene(*group_data)
     return lev_stat, lev_p
 
-@st.cache_data
+@perf.cache_data
 def compute_kruskal_test(df_non, groups_list):
     """Cache Kruskal-Wallis test results"""
+    from scipy.stats import kruskal
+
     group_data = [df_non[df_non['Climate_Group']==g]['Weekly_Sales'].values for g in groups_list]
     H, p_kw = kruskal(*group_data)
     return H, p_kw
@@ -78,8 +90,14 @@ experience statistically significant differences in their weekly sales performan
 # ------------------------------------------------------------------
 # PART 1: Load and Prepare Data
 # ------------------------------------------------------------------
+perf.mark("PART 1: Load and Prepare Data")
+flt = render_sidebar_filters()
+CLEAN_COLS = ('Climate_Group', 'Weekly_Sales')
+
 with st.spinner("Loading and preparing data..."):
-    df = get_data()
+    # Filtered (Store, Date)-sorted view shared across pages and reruns; Date is
+    # datetime once loaded, Climate_Group keeps the file's labels (see group_key)
+    df = get_filtered_data(flt)
     
     # Validate required columns
     required_cols = ['Date', 'Climate_Group', 'Weekly_Sales', 'Store', 'Holiday_Flag']
@@ -89,15 +107,9 @@ with st.spinner("Loading and preparing data..."):
         st.error(f"❌ Missing required columns: {', '.join(missing_cols)}")
         st.stop()
     
-    # Ensure Date is datetime
-    if not pd.api.types.is_datetime64_any_dtype(df['Date']):
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-    
-    # Ensure Climate_Group is numeric
-    df['Climate_Group'] = pd.to_numeric(df['Climate_Group'], errors='coerce')
-    
-    # Remove any rows with missing climate groups
-    df_clean = df.dropna(subset=['Climate_Group', 'Weekly_Sales']).copy()
+    # Remove any rows with missing climate groups (cached per filter)
+    df_clean = get_filtered_data(flt, dropna=CLEAN_COLS)
+    require_rows(df_clean)
     
     st.success(f"✅ Data loaded successfully: {len(df_clean):,} records across {df_clean['Store'].nunique()} stores")
 
@@ -106,6 +118,7 @@ st.markdown("---")
 # ------------------------------------------------------------------
 # PART 2: Q1.1 - Overall Average Weekly Sales by Climate Group
 # ------------------------------------------------------------------
+perf.mark("PART 2: Q1.1 - Overall Average Weekly Sales by Climate Group")
 st.header("📊 Q1.1: Which Climate Group Has the Highest Average Weekly Sales?")
 
 with st.expander("ℹ️ About Climate Groups", expanded=False):
@@ -122,7 +135,7 @@ with st.expander("ℹ️ About Climate Groups", expanded=False):
 stats = compute_overall_stats(df_clean)
 
 # Identify highest group
-highest_group = int(stats.loc[stats['Mean'].idxmax(), 'Climate_Group'])
+highest_group = group_key(stats.loc[stats['Mean'].idxmax(), 'Climate_Group'])
 highest_value = stats.loc[stats['Mean'].idxmax(), 'Mean']
 
 # Display key metrics
@@ -144,7 +157,7 @@ climate_labels = {
 }
 
 # Safely map labels with fallback for missing groups
-stats['Label'] = stats['Climate_Group'].apply(lambda x: climate_labels.get(int(x), f"Group {int(x)}"))
+stats['Label'] = stats['Climate_Group'].apply(lambda x: climate_labels.get(group_key(x), f"Group {group_key(x)}"))
 stats['Color'] = stats['Climate_Group'].apply(lambda x: '#E74C3C' if x == highest_group else '#3498DB')
 
 fig_overall = go.Figure()
@@ -187,6 +200,7 @@ st.markdown("---")
 # ------------------------------------------------------------------
 # PART 3: Q1.2 - Distribution and Outliers Analysis
 # ------------------------------------------------------------------
+perf.mark("PART 3: Q1.2 - Distribution and Outliers Analysis")
 st.header("📈 Q1.2: Sales Distribution and Outliers by Climate Group")
 
 st.markdown("""
@@ -205,9 +219,9 @@ colors_map = {
 }
 
 for g in groups:
-    subset = df_clean[df_clean['Climate_Group'] == g]['Weekly_Sales']
+    subset = get_filtered_data(with_climate_groups(flt, [g]), dropna=CLEAN_COLS)['Weekly_Sales']
     
-    st.subheader(f"Climate Group {int(g)}: {climate_labels.get(int(g), f'Group {int(g)}')}")
+    st.subheader(f"Climate Group {group_key(g)}: {climate_labels.get(group_key(g), f'Group {group_key(g)}')}")
     
     col1, col2 = st.columns(2)
     
@@ -217,12 +231,12 @@ for g in groups:
         fig_hist.add_trace(go.Histogram(
             x=subset,
             nbinsx=30,
-            marker_color=colors_map.get(int(g), '#3498DB'),
+            marker_color=colors_map.get(group_key(g), '#3498DB'),
             opacity=0.8,
-            name=f'Group {int(g)}'
+            name=f'Group {group_key(g)}'
         ))
         fig_hist.update_layout(
-            title=f"Distribution - Group {int(g)}",
+            title=f"Distribution - Group {group_key(g)}",
             xaxis_title="Weekly Sales ($)",
             yaxis_title="Frequency",
             template="plotly_white",
@@ -236,12 +250,12 @@ for g in groups:
         fig_box = go.Figure()
         fig_box.add_trace(go.Box(
             y=subset,
-            marker_color=colors_map.get(int(g), '#3498DB'),
-            name=f'Group {int(g)}',
+            marker_color=colors_map.get(group_key(g), '#3498DB'),
+            name=f'Group {group_key(g)}',
             boxmean='sd'
         ))
         fig_box.update_layout(
-            title=f"Boxplot - Group {int(g)}",
+            title=f"Boxplot - Group {group_key(g)}",
             yaxis_title="Weekly Sales ($)",
             template="plotly_white",
             height=400,
@@ -283,6 +297,7 @@ st.markdown("---")
 # ------------------------------------------------------------------
 # PART 4: Q1.3 - Statistical Analysis (Non-Holiday Data)
 # ------------------------------------------------------------------
+perf.mark("PART 4: Q1.3 - Statistical Analysis (Non-Holiday Data)")
 if not STATS_AVAILABLE:
     st.error("⚠️ Statistical analysis features are not available. Please install scipy.")
     st.stop()
@@ -295,7 +310,10 @@ we analyze only non-holiday weeks using statistical hypothesis testing.
 """)
 
 # Filter non-holiday data
-df_non = df_clean[df_clean['Holiday_Flag'] == 0].copy()
+df_non = get_filtered_data(with_holiday(flt, 0), dropna=CLEAN_COLS)
+if flt.holiday == 1:
+    st.caption("The sidebar is set to holiday weeks; this section always uses the non-holiday weeks of the selection.")
+require_rows(df_non)
 
 st.info(f"📊 Analyzing {len(df_non):,} non-holiday records across {df_non['Store'].nunique()} stores")
 
@@ -317,6 +335,10 @@ st.markdown("---")
 # Prepare data for tests
 groups_list = sorted(df_non['Climate_Group'].unique())
 group_data = [df_non[df_non['Climate_Group']==g]['Weekly_Sales'] for g in groups_list]
+if len(groups_list) < 2 or min(len(g) for g in group_data) < 3:
+    st.warning("The tests below need at least two climate groups with three or more non-holiday weeks each. "
+               "Widen the filters in the sidebar.")
+    st.stop()
 
 # ------------------------------------------------------------------
 # Q1.3.1: Normality Test (Shapiro-Wilk)
@@ -477,6 +499,7 @@ st.markdown("---")
 # ------------------------------------------------------------------
 # PART 5: Visualization of Non-Holiday Sales
 # ------------------------------------------------------------------
+perf.mark("PART 5: Visualization of Non-Holiday Sales")
 st.header("📊 Non-Holiday Average Weekly Sales by Climate Group")
 
 st.markdown("""
@@ -492,14 +515,14 @@ mean_stats_non = (
     .sort_values('Climate_Group')
 )
 
-mean_stats_non['Label'] = mean_stats_non['Climate_Group'].apply(lambda x: climate_labels.get(int(x), f'Group {int(x)}'))
-mean_stats_non['Color'] = mean_stats_non['Climate_Group'].apply(lambda x: colors_map.get(int(x), '#3498DB'))
+mean_stats_non['Label'] = mean_stats_non['Climate_Group'].apply(lambda x: climate_labels.get(group_key(x), f'Group {group_key(x)}'))
+mean_stats_non['Color'] = mean_stats_non['Climate_Group'].apply(lambda x: colors_map.get(group_key(x), '#3498DB'))
 
 fig_non_holiday = go.Figure()
 fig_non_holiday.add_trace(go.Bar(
     x=mean_stats_non['Climate_Group'].astype(str),
     y=mean_stats_non['Weekly_Sales'],
-    marker_color=[colors_map.get(int(g), '#3498DB') for g in mean_stats_non['Climate_Group']],
+    marker_color=[colors_map.get(group_key(g), '#3498DB') for g in mean_stats_non['Climate_Group']],
     text=mean_stats_non['Weekly_Sales'].apply(lambda x: f"${x:,.0f}"),
     textposition='outside',
     hovertemplate='<b>Climate Group %{x}</b><br>' +
@@ -530,6 +553,7 @@ st.markdown("---")
 # ------------------------------------------------------------------
 # PART 6: Final Conclusion
 # ------------------------------------------------------------------
+perf.mark("PART 6: Final Conclusion")
 st.header("📝 Conclusion: Business Question 1")
 
 # Get the label for highest group
@@ -587,3 +611,5 @@ st.info("📚 **Source Analysis**: This dashboard is based on the comprehensive
 # Footer
 st.markdown("---")
 st.caption("Walmart Sales Analysis Dashboard | Business Intelligence Project")
+
+perf.end_page()
@@ -3,29 +3,25 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-from utils import get_data
+from utils import get_data, has_modules
+import perf
 import warnings
 warnings.filterwarnings('ignore')
 
-# Import ML libraries with error handling
-try:
-    import shap
-    from sklearn.ensemble import RandomForestRegressor
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import mean_squared_error
-    ML_AVAILABLE = True
-except ImportError as e:
-    st.error(f"Machine Learning libraries not available: {e}")
+# ML libraries (several seconds to import, shap alone most of it) are imported where they are
+# first used, so the holiday lift part renders before they load; only check they are installed here
+ML_AVAILABLE = has_modules("shap", "sklearn", "matplotlib")
+if not ML_AVAILABLE:
+    st.error("Machine Learning libraries not available")
     st.info("Please install required packages: `pip install shap scikit-learn`")
-    ML_AVAILABLE = False
 
 st.set_page_config(page_title="BQ2: Holiday Effect Analysis", layout="wide")
+perf.start_page("9_Business_Question_2")
 
 # ------------------------------------------------------------------
 # CACHED FUNCTIONS - Avoid recomputation
 # ------------------------------------------------------------------
-@st.cache_data
+@perf.cache_data
 def compute_holiday_lift(_df):
     """Cache holiday lift calculations"""
     holiday_lift = (
@@ -38,23 +34,29 @@ def compute_holiday_lift(_df):
     holiday_lift['Holiday_Lift'] = holiday_lift['Holiday_Sales'] - holiday_lift['NonHoliday_Sales']
     return holiday_lift
 
-@st.cache_resource
+@perf.cache_resource
 def train_model(X_train, y_train):
     """Cache trained Random Forest model"""
+    from sklearn.ensemble import RandomForestRegressor
+
     model = RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=-1)
     model.fit(X_train, y_train)
     return model
 
-@st.cache_data
+@perf.cache_data
 def compute_shap_values(_model, _X_test):
     """Cache SHAP values computation"""
+    import shap
+
     explainer = shap.TreeExplainer(_model)
     shap_values = explainer.shap_values(_X_test)
     return shap_values
 
-@st.cache_data
+@perf.cache_data
 def prepare_model_data(_df, _holiday_lift):
     """Cache data preparation for model training"""
+    from sklearn.model_selection import train_test_split
+
     # Merge NonHoliday_Sales back to full df
     df_all = _df.merge(_holiday_lift[['Store', 'NonHoliday_Sales']], on='Store', how='left')
     
@@ -84,6 +86,7 @@ or if certain stores benefit more (or less) from holiday shopping patterns.
 
 # Load data
 df = get_data()
+perf.track_frame("Data", df)
 
 # Add a loading message
 with st.spinner("Loading and preparing data..."):
@@ -91,6 +94,7 @@ with st.spinner("Loading and preparing data..."):
     # ------------------------------------------------------------------
     # PART 1: Compute Holiday Lift for ALL stores
     # ------------------------------------------------------------------
+    perf.mark("PART 1: Compute Holiday Lift for ALL stores")
     st.header("📊 1. Holiday Lift Analysis")
     
     with st.expander("ℹ️ What is Holiday Lift?", expanded=False):
@@ -172,6 +176,7 @@ with st.spinner("Loading and preparing data..."):
 # ------------------------------------------------------------------
 # PART 2: Prepare features and train model
 # ------------------------------------------------------------------
+perf.mark("PART 2: Prepare features and train model")
 if not ML_AVAILABLE:
     st.error("⚠️ Machine Learning features are not available. Please install required packages.")
     st.stop()
@@ -192,6 +197,8 @@ with st.expander("ℹ️ Methodology", expanded=False):
     """)
 
 with st.spinner("Training predictive model..."):
+    from sklearn.metrics import mean_squared_error
+
     # Use cached data preparation
     df_all, X_train, X_test, y_train, y_test = prepare_model_data(df, holiday_lift)
     
@@ -215,6 +222,7 @@ st.markdown("---")
 # ------------------------------------------------------------------
 # PART 3: SHAP Analysis
 # ------------------------------------------------------------------
+perf.mark("PART 3: SHAP Analysis")
 st.subheader("🔍 SHAP Analysis: Feature Impact on Holiday Uplift")
 
 st.markdown("""
@@ -225,6 +233,9 @@ The SHAP summary plot below shows which features most strongly influence holiday
 """)
 
 with st.spinner("Generating SHAP analysis..."):
+    import shap
+    import matplotlib.pyplot as plt
+
     # Use cached SHAP values
     shap_values = compute_shap_values(model, X_test)
     
@@ -239,6 +250,7 @@ st.markdown("---")
 # ------------------------------------------------------------------
 # PART 4: Key Findings
 # ------------------------------------------------------------------
+perf.mark("PART 4: Key Findings")
 st.header("💡 Key Findings: Why Some Stores Have Negative Holiday Uplift")
 
 st.markdown("""
@@ -286,6 +298,7 @@ st.markdown("---")
 # ------------------------------------------------------------------
 # PART 5: Store-Level Predictions
 # ------------------------------------------------------------------
+perf.mark("PART 5: Store-Level Predictions")
 st.header("📋 Store-Level Holiday Uplift Predictions")
 
 with st.expander("View Detailed Store Predictions", expanded=False):
@@ -315,6 +328,7 @@ st.markdown("---")
 # ------------------------------------------------------------------
 # PART 6: Final Conclusion
 # ------------------------------------------------------------------
+perf.mark("PART 6: Final Conclusion")
 st.header("📝 Conclusion")
 
 st.success("""
@@ -352,3 +366,5 @@ st.info("📚 **Source Analysis**: This dashboard is based on the comprehensive
 # Footer
 st.markdown("---")
 st.caption("Walmart Sales Analysis Dashboard | Business Intelligence Project")
+
+perf.end_page()
@@ -0,0 +1,264 @@
+"""
+Dense store x week panel of the Walmart sales data.
+
+The dataset is a balanced panel (one row per Store and Date), so instead of
+re-grouping the long table on every rerun, SalesPanel holds a NumPy tensor of
+shape (stores, weeks, features) plus index maps for Store and Date. It is
+built once per data version by get_panel(), and trend / comparison / holiday
+computations run as array operations along its axes.
+"""
+import numpy as np
+import pandas as pd
+
+import perf
+from utils import get_data, get_data_version
+
+# Features that add up when several rows fall into the same store-week
+# (e.g. department-level data); every other feature is averaged.
+ADDITIVE_FEATURES = ('Weekly_Sales',)
+
+WEEKS_PER_YEAR = 52
+
+
+def _nanmean(x, axis=None, keepdims=False):
+    """NaN-ignoring mean that returns NaN (without warnings) for all-NaN slices."""
+    valid = ~np.isnan(x)
+    total = np.where(valid, x, 0.0).sum(axis=axis, keepdims=keepdims)
+    count = valid.sum(axis=axis, keepdims=keepdims)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return total / count
+
+
+class SalesPanel:
+    """NumPy tensor of shape (stores, weeks, features) with Store/Date index maps."""
+
+    def __init__(self, values, stores, dates, features):
+        self.values = values
+        self.stores = np.asarray(stores)
+        self.dates = np.asarray(dates)
+        self.features = list(features)
+        self.store_index = {s: i for i, s in enumerate(self.stores.tolist())}
+        self.date_index = {pd.Timestamp(d): j for j, d in enumerate(self.dates)}
+        self._feature_index = {f: k for k, f in enumerate(self.features)}
+        self._prefix = {}
+
+    @classmethod
+    def from_frame(cls, df, features=None):
+        """
+        Build the panel from a long DataFrame with Store and Date columns.
+        Missing store-weeks are NaN; duplicate rows for a store-week are summed
+        for ADDITIVE_FEATURES and averaged for the rest.
+        """
+        if features is None:
+            features = [c for c in df.select_dtypes(include=[np.number]).columns if c != 'Store']
+        data = df.dropna(subset=['Store', 'Date'])
+        store_col = data['Store'].to_numpy()
+        date_col = data['Date'].to_numpy()
+        stores = np.unique(store_col)
+        dates = np.unique(date_col)
+        n_stores, n_weeks = len(stores), len(dates)
+        flat = np.searchsorted(stores, store_col) * n_weeks + np.searchsorted(dates, date_col)
+
+        values = np.full((n_stores, n_weeks, len(features)), np.nan)
+        for k, feature in enumerate(features):
+            col = data[feature].to_numpy(dtype=float)
+            valid = ~np.isnan(col)
+            sums = np.bincount(flat[valid], weights=col[valid], minlength=n_stores * n_weeks)
+            counts = np.bincount(flat[valid], minlength=n_stores * n_weeks)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cell = sums if feature in ADDITIVE_FEATURES else sums / counts
+            values[:, :, k] = np.where(counts > 0, cell, np.nan).reshape(n_stores, n_weeks)
+        return cls(values, stores, dates, features)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def feature(self, name):
+        """(stores, weeks) view of one feature."""
+        return self.values[:, :, self._feature_index[name]]
+
+    def store_position(self, store):
+        return self.store_index[store]
+
+    def date_position(self, date):
+        """Index of the first week on or after `date`."""
+        return int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date)).astype(self.dates.dtype)))
+
+    # --------------------------------------------------------------
+    # Vectorized time operations (along the weeks axis)
+    # --------------------------------------------------------------
+    def lag(self, name, periods=1):
+        """Shift a feature forward in time by `periods` weeks (negative = lead), NaN-padded."""
+        x = self.feature(name)
+        out = np.full_like(x, np.nan)
+        if periods > 0:
+            out[:, periods:] = x[:, :-periods]
+        elif periods < 0:
+            out[:, :periods] = x[:, -periods:]
+        else:
+            out[:] = x
+        return out
+
+    def lead(self, name, periods=1):
+        """Value `periods` weeks ahead."""
+        return self.lag(name, -periods)
+
+    def delta(self, name, periods=1, pct=False):
+        """Change versus `periods` weeks earlier (absolute, or relative if pct=True)."""
+        x = self.feature(name)
+        prev = self.lag(name, periods)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (x - prev) / prev if pct else x - prev
+
+    def wow_delta(self, name, pct=False):
+        """Week-over-week change."""
+        return self.delta(name, 1, pct=pct)
+
+    def yoy_delta(self, name, pct=False):
+        """Year-over-year change (same week, 52 weeks earlier)."""
+        return self.delta(name, WEEKS_PER_YEAR, pct=pct)
+
+    # --------------------------------------------------------------
+    # Cross-sectional operations
+    # --------------------------------------------------------------
+    def normalize(self, name, method='zscore'):
+        """
+        Per-store normalization of a feature.
+        method: 'zscore' (mean 0, std 1), 'minmax' (0..1) or 'mean' (ratio to store mean).
+        """
+        x = self.feature(name)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if method == 'zscore':
+                mean = _nanmean(x, axis=1, keepdims=True)
+                std = np.sqrt(_nanmean((x - mean) ** 2, axis=1, keepdims=True))
+                return (x - mean) / std
+            if method == 'minmax':
+                lo = np.fmin.reduce(x, axis=1, keepdims=True)
+                hi = np.fmax.reduce(x, axis=1, keepdims=True)
+                return (x - lo) / (hi - lo)
+            if method == 'mean':
+                return x / _nanmean(x, axis=1, keepdims=True)
+        raise ValueError(f"Unknown normalization method: {method}")
+
+    def rank(self, name, ascending=False):
+        """Cross-store rank of a feature in every week (1 = best); NaN cells get NaN."""
+        x = self.feature(name)
+        missing = np.isnan(x)
+        keyed = np.where(missing, np.inf, x if ascending else -x)
+        order = np.argsort(keyed, axis=0, kind='stable')
+        ranks = np.empty_like(x)
+        positions = np.broadcast_to(np.arange(1, x.shape[0] + 1, dtype=float)[:, None], x.shape)
+        np.put_along_axis(ranks, order, positions, axis=0)
+        ranks[missing] = np.nan
+        return ranks
+
+    # --------------------------------------------------------------
+    # Aggregations
+    # --------------------------------------------------------------
+    def total_by_week(self, name, mask=None):
+        """
+        Sum across stores for every week (optionally over cells where mask is True).
+        Weeks without any observed cell are NaN.
+        """
+        x = self.feature(name)
+        if mask is not None:
+            x = np.where(mask, x, np.nan)
+        observed = ~np.isnan(x)
+        return np.where(observed.any(axis=0), np.where(observed, x, 0.0).sum(axis=0), np.nan)
+
+    def mean_by_store(self, name, mask=None):
+        """Mean over weeks for every store (optionally over cells where mask is True)."""
+        x = self.feature(name)
+        if mask is not None:
+            x = np.where(mask, x, np.nan)
+        return _nanmean(x, axis=1)
+
+    def mean_where(self, name, mask):
+        """Mean of a feature over all cells where mask is True."""
+        return float(_nanmean(np.where(mask, self.feature(name), np.nan)))
+
+    # --------------------------------------------------------------
+    # Date windows via per-store prefix sums
+    # --------------------------------------------------------------
+    def prefix_sums(self, name):
+        """
+        Per-store cumulative sums and observation counts over the week axis.
+        Both arrays have shape (stores, weeks + 1) with a leading zero column,
+        so any window [i, j) is cum[:, j] - cum[:, i]. Built once per feature.
+        """
+        if name not in self._prefix:
+            x = self.feature(name)
+            valid = ~np.isnan(x)
+            n_stores = x.shape[0]
+            cum_sum = np.zeros((n_stores, x.shape[1] + 1))
+            cum_count = np.zeros((n_stores, x.shape[1] + 1), dtype=np.int64)
+            np.cumsum(np.where(valid, x, 0.0), axis=1, out=cum_sum[:, 1:])
+            np.cumsum(valid, axis=1, out=cum_count[:, 1:])
+            self._prefix[name] = (cum_sum, cum_count)
+        return self._prefix[name]
+
+    def window_bounds(self, start, end):
+        """Week positions [i, j) covering dates from start to end (inclusive)."""
+        dtype = self.dates.dtype
+        i = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start)).astype(dtype), side='left')
+        j = np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end)).astype(dtype), side='right')
+        return int(i), int(max(i, j))
+
+    def window_sum(self, name, start, end):
+        """Per-store sum of a feature between two dates, in O(stores)."""
+        cum_sum, _ = self.prefix_sums(name)
+        i, j = self.window_bounds(start, end)
+        return cum_sum[:, j] - cum_sum[:, i]
+
+    def window_count(self, name, start, end):
+        """Per-store number of observed weeks between two dates."""
+        _, cum_count = self.prefix_sums(name)
+        i, j = self.window_bounds(start, end)
+        return cum_count[:, j] - cum_count[:, i]
+
+    def window_mean(self, name, start, end):
+        """Per-store mean of a feature between two dates (NaN where no weeks observed)."""
+        total = self.window_sum(name, start, end)
+        count = self.window_count(name, start, end)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / count, np.nan)
+
+    def subset(self, stores=None, start=None, end=None, holiday=None):
+        """
+        Panel restricted to `stores` (None = all) and to weeks between `start` and
+        `end`. With holiday=1 or 0, cells that are not holiday / non-holiday weeks
+        are set to NaN. Without a store list or holiday filter the tensor is a view.
+        """
+        rows = slice(None) if stores is None else np.flatnonzero(np.isin(self.stores, np.asarray(stores)))
+        i, j = self.window_bounds(start if start is not None else self.dates[0],
+                                  end if end is not None else self.dates[-1])
+        values = self.values[rows, i:j, :]
+        if holiday is not None and 'Holiday_Flag' in self._feature_index:
+            is_holiday = np.nan_to_num(values[:, :, self._feature_index['Holiday_Flag']]) > 0.5
+            keep = is_holiday if holiday else ~is_holiday
+            values = np.where(keep[:, :, None], values, np.nan)
+        return SalesPanel(values, self.stores[rows], self.dates[i:j], self.features)
+
+    def holiday_mask(self):
+        """Boolean (stores, weeks) mask of holiday weeks."""
+        return np.nan_to_num(self.feature('Holiday_Flag')) > 0.5
+
+    def to_frame(self, arr, name):
+        """Convert a (stores, weeks) array back to a long Store/Date/name DataFrame."""
+        n_stores, n_weeks = arr.shape
+        return pd.DataFrame({
+            'Store': np.repeat(self.stores, n_weeks),
+            'Date': np.tile(self.dates, n_stores),
+            name: arr.reshape(-1),
+        })
+
+
+@perf.cache_resource(show_spinner=False)
+def _build_panel(data_version):
+    return SalesPanel.from_frame(get_data())
+
+
+def get_panel():
+    """Return the SalesPanel for the current data version (built once per version)."""
+    return _build_panel(get_data_version())
@@ -0,0 +1,366 @@
+"""
+Per-run performance instrumentation: developer panel and JSON-lines trace log.
+
+Pages call start_page() at the top and end_page() at the bottom, and time
+their parts either with the section() context manager or, for long top-level
+scripts, with mark() which closes the previous part and opens the next one.
+
+- Open any page with ?perf=1 in the URL to show a "Performance" expander in
+  the sidebar with the section timings, cache hits/misses, working DataFrame
+  sizes and process memory of the current run.
+- With WALMART_TRACE=1 every run is also appended to logs/trace.jsonl (rotated
+  at 10 MB, 5 backups) with the page, session id, triggering widget, span
+  durations, cache hits and data version. WALMART_TRACE_DIR changes the folder.
+  benchmarks/trace_report.py summarises the log.
+
+With both the panel and the log off every call is a single session_state lookup.
+Cache counts cover functions decorated with perf.cache_data / perf.cache_resource
+(drop-in replacements for the st.* decorators). They are process-wide, so with
+several active sessions they include the other sessions' reruns.
+"""
+import datetime as dt
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+import streamlit as st
+
+_RUN_KEY = "_perf_run"
+_WIDGETS_KEY = "_perf_widgets"
+_LAST_PAGE_KEY = "_perf_last_page"
+
+APP_NAME = "walmart"
+TRACE_DIR = os.environ.get("WALMART_TRACE_DIR",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs"))
+TRACE_MAX_BYTES = 10 * 2**20
+TRACE_BACKUPS = 5
+
+
+# ------------------------------------------------------------------
+# Cache hit/miss counters (perf.cache_data and perf.cache_resource)
+# ------------------------------------------------------------------
+_cache_lock = threading.Lock()
+_cache_calls = defaultdict(int)
+_cache_misses = defaultdict(int)
+
+
+def _count(counter, name):
+    with _cache_lock:
+        counter[name] += 1
+
+
+def _counted(cache, func, options):
+    """Apply the Streamlit cache decorator `cache` to `func`, counting calls and misses.
+
+    The cache sees `compute`, which only runs on a miss; functools.wraps keeps
+    the name, signature and source Streamlit hashes, so `_`-prefixed arguments
+    are still skipped and every function keeps its own cache.
+    """
+    def decorate(func):
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _count(_cache_misses, name)
+            return func(*args, **kwargs)
+
+        cached = cache(**options)(compute)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            _count(_cache_calls, name)
+            return cached(*args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+
+    return decorate if func is None else decorate(func)
+
+
+def cache_data(func=None, **options):
+    """st.cache_data that also counts hits and misses (use like st.cache_data)."""
+    return _counted(st.cache_data, func, options)
+
+
+def cache_resource(func=None, **options):
+    """st.cache_resource that also counts hits and misses (use like st.cache_resource)."""
+    return _counted(st.cache_resource, func, options)
+
+
+def cache_counts():
+    """Snapshot {function: (hits, misses)} of the process-wide counters."""
+    with _cache_lock:
+        return {n: (calls - _cache_misses[n], _cache_misses[n]) for n, calls in _cache_calls.items()}
+
+
+def _cache_delta(before):
+    """{function: (hits, misses)} since the `before` snapshot, without unchanged functions."""
+    delta = {}
+    for name, (hits, misses) in cache_counts().items():
+        h0, m0 = before.get(name, (0, 0))
+        if hits - h0 or misses - m0:
+            delta[name] = (hits - h0, misses - m0)
+    return delta
+
+
+def rss_mb():
+    """Resident set size of this process in MB (peak RSS where current RSS is unavailable)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+# ------------------------------------------------------------------
+# Trace log
+# ------------------------------------------------------------------
+_trace_lock = threading.Lock()
+_trace_logger = None
+
+
+def trace_enabled():
+    return os.environ.get("WALMART_TRACE", "0") == "1"
+
+
+def _get_trace_logger():
+    """Logger writing one JSON object per line to a size-rotated file (created once per process)."""
+    global _trace_logger
+    with _trace_lock:
+        if _trace_logger is None:
+            logger = logging.getLogger(f"{APP_NAME}.trace")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            try:
+                os.makedirs(TRACE_DIR, exist_ok=True)
+                handler = RotatingFileHandler(os.path.join(TRACE_DIR, "trace.jsonl"), maxBytes=TRACE_MAX_BYTES,
+                                              backupCount=TRACE_BACKUPS, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(handler)
+            except OSError:
+                logger.addHandler(logging.NullHandler())
+            _trace_logger = logger
+    return _trace_logger
+
+
+def _session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except ImportError:
+        pass
+    return st.session_state.setdefault("_perf_session", uuid.uuid4().hex)
+
+
+_SIMPLE = (bool, int, float, str, dt.date, type(None))
+
+
+def _widget_snapshot():
+    """Values of keyed widgets (and other simple public session_state entries)."""
+    snapshot = {}
+    for key in st.session_state:
+        key = str(key)
+        if key.startswith("_"):
+            continue
+        value = st.session_state[key]
+        if isinstance(value, (list, tuple)) and all(isinstance(v, _SIMPLE) for v in value):
+            value = tuple(value)
+        elif not isinstance(value, _SIMPLE):
+            continue
+        snapshot[key] = value
+    return snapshot
+
+
+def _detect_trigger(page, widgets):
+    """What caused this run: the initial load, a page switch, changed widget keys, or a plain rerun."""
+    last_page = st.session_state.get(_LAST_PAGE_KEY)
+    if last_page is None:
+        return "initial"
+    if last_page != page:
+        return "navigation"
+    before = st.session_state.get(_WIDGETS_KEY, {})
+    changed = sorted(k for k, v in widgets.items() if k in before and before[k] != v)
+    return ",".join(changed) if changed else "rerun"
+
+
+def _write_trace(run, complete):
+    total = run.get("total", time.perf_counter() - run["start"])
+    cache = _cache_delta(run["cache_start"])
+    record = {
+        "ts": run["ts"],
+        "app": APP_NAME,
+        "page": run["page"],
+        "session": run["session"],
+        "trigger": run["trigger"],
+        "complete": complete,
+        "total_ms": round(total * 1000, 2),
+        "spans": [{"name": name, "ms": round(sec * 1000, 2)} for name, sec in run["sections"]],
+        "cache": {
+            "hits": sum(h for h, _ in cache.values()),
+            "misses": sum(m for _, m in cache.values()),
+            "functions": {name: {"hits": h, "misses": m} for name, (h, m) in sorted(cache.items())},
+        },
+        "frames": {label: rows for label, (rows, _, _) in run["frames"].items()},
+        "data_version": run["data_version"],
+        "rss_mb": round(rss_mb() or 0, 1),
+    }
+    _get_trace_logger().info(json.dumps(record, default=str, ensure_ascii=False))
+    run["traced"] = True
+
+
+# ------------------------------------------------------------------
+# Page runs and sections
+# ------------------------------------------------------------------
+def is_enabled():
+    """Whether the sidebar panel is requested (?perf=1)."""
+    return st.query_params.get("perf") == "1"
+
+
+def _default_data_version():
+    try:
+        from utils import get_data_version
+        return get_data_version()
+    except (ImportError, OSError):
+        return None
+
+
+def start_page(name, data_version=None):
+    """Start timing a script run of page `name` (no-op when the panel and the trace log are off)."""
+    previous = st.session_state.pop(_RUN_KEY, None)
+    panel, trace = is_enabled(), trace_enabled()
+    if previous is not None and previous["trace"] and not previous.get("traced"):
+        # The previous run never reached end_page() (st.stop() or an exception)
+        _write_trace(previous, complete=False)
+    if not (panel or trace):
+        return
+    widgets = _widget_snapshot() if trace else {}
+    st.session_state[_RUN_KEY] = {
+        "page": name,
+        "start": time.perf_counter(),
+        "ts": dt.datetime.now(dt.timezone.utc).isoformat(timespec="milliseconds"),
+        "session": _session_id() if trace else None,
+        "trigger": _detect_trigger(name, widgets) if trace else None,
+        "data_version": (data_version or _default_data_version()) if trace else None,
+        "trace": trace,
+        "sections": [],
+        "lap": None,
+        "frames": {},
+        "cache_start": cache_counts(),
+        "panel": st.sidebar.empty() if panel else None,
+    }
+    if trace:
+        st.session_state[_LAST_PAGE_KEY] = name
+        st.session_state[_WIDGETS_KEY] = widgets
+
+
+def _current_run():
+    return st.session_state.get(_RUN_KEY)
+
+
+@contextmanager
+def _timed(run, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run["sections"].append((name, time.perf_counter() - start))
+        _render(run)
+
+
+def section(name):
+    """Context manager timing the enclosed block as `name`."""
+    run = _current_run()
+    if run is None:
+        return nullcontext()
+    return _timed(run, name)
+
+
+def _close_lap(run):
+    if run["lap"] is not None:
+        name, start = run["lap"]
+        run["sections"].append((name, time.perf_counter() - start))
+        run["lap"] = None
+
+
+def mark(name):
+    """Close the section opened by the previous mark() and start timing `name`."""
+    run = _current_run()
+    if run is None:
+        return
+    _close_lap(run)
+    _render(run)
+    run["lap"] = (name, time.perf_counter())
+
+
+def track_frame(label, df):
+    """Record the shape and memory of a working DataFrame."""
+    run = _current_run()
+    if run is None or df is None:
+        return
+    mb = df.memory_usage(deep=True).sum() / 2**20 if run["panel"] is not None else None
+    run["frames"][label] = (len(df), df.shape[1], mb)
+
+
+def end_page():
+    """Close the last mark() section, show the final numbers and write the trace record."""
+    run = _current_run()
+    if run is None:
+        return
+    _close_lap(run)
+    run["total"] = time.perf_counter() - run["start"]
+    _render(run)
+    if run["trace"]:
+        _write_trace(run, complete=True)
+        # Widget values as the run left them, to spot what the user changes next
+        st.session_state[_WIDGETS_KEY] = _widget_snapshot()
+
+
+# ------------------------------------------------------------------
+# Panel
+# ------------------------------------------------------------------
+def _render(run):
+    """Redraw the sidebar panel; called after every section so it survives st.stop()."""
+    if run["panel"] is None:
+        return
+    elapsed = run.get("total", time.perf_counter() - run["start"])
+    cache_rows = [{"Function": name, "Hits": h, "Misses": m}
+                  for name, (h, m) in sorted(_cache_delta(run["cache_start"]).items())]
+
+    with run["panel"].container():
+        with st.expander("⏱️ Performance", expanded=True):
+            status = "" if "total" in run else " (running)"
+            st.caption(f"{run['page']}: {elapsed * 1000:,.0f} ms{status}")
+            if run["sections"]:
+                sections = pd.DataFrame(run["sections"], columns=["Section", "Seconds"])
+                sections["ms"] = (sections.pop("Seconds") * 1000).round(1)
+                sections["%"] = (sections["ms"] / max(elapsed * 1000, 1e-9) * 100).round(1)
+                st.dataframe(sections, hide_index=True, use_container_width=True)
+            if cache_rows:
+                cache = pd.DataFrame(cache_rows)
+                st.caption(f"Cache: {cache['Hits'].sum()} hits, {cache['Misses'].sum()} misses")
+                st.dataframe(cache, hide_index=True, use_container_width=True)
+            for label, (rows, cols, mb) in run["frames"].items():
+                st.caption(f"{label}: {rows:,} rows × {cols} cols, {mb:,.1f} MB")
+            rss = rss_mb()
+            if rss is not None:
+                st.caption(f"Process RSS: {rss:,.0f} MB")
@@ -0,0 +1,192 @@
+"""
+Precomputed indexes over the Walmart sales table.
+
+StoreDateIndex keeps the table physically sorted by (Store, Date) with a store
+offset table, so store and date-range filters become contiguous row ranges
+found with searchsorted instead of boolean masks over the full frame.
+
+TopSalesIndex keeps every store's weekly sales pre-sorted (highest first, with
+the date), so "top N sales events in date range X for stores Y" is answered by
+merging the heads of the selected stores' lists instead of scanning the frame;
+with a date or holiday filter the selected stores' rows are masked in one
+vectorized pass instead.
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+import perf
+from utils import get_data, get_data_version
+
+
+class StoreDateIndex:
+    """The sales table sorted by (Store, Date) plus a per-store offset table."""
+
+    def __init__(self, df):
+        frame = df.sort_values(['Store', 'Date'], kind='stable', ignore_index=True)
+        self.frame = frame
+        store_col = frame['Store'].to_numpy()
+        self.stores, starts = np.unique(store_col, return_index=True)
+        self.offsets = np.append(starts, len(frame))
+        self._dates = frame['Date'].to_numpy()
+
+    def store_range(self, store):
+        """Row range [a, b) of one store, or None if the store is unknown."""
+        p = np.searchsorted(self.stores, store)
+        if p >= len(self.stores) or self.stores[p] != store:
+            return None
+        return int(self.offsets[p]), int(self.offsets[p + 1])
+
+    def ranges(self, stores=None, start=None, end=None):
+        """
+        Contiguous row ranges [a, b) matching the store and date filters.
+        Stores are located in the offset table and dates by binary search
+        within each store's block.
+        """
+        if stores is None or len(stores) == 0:
+            bounds = list(zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist()))
+        else:
+            bounds = [r for r in (self.store_range(s) for s in sorted(set(stores))) if r is not None]
+        if start is None and end is None:
+            return bounds
+        dtype = self._dates.dtype
+        lo = np.datetime64(pd.Timestamp(start)).astype(dtype) if start is not None else None
+        hi = np.datetime64(pd.Timestamp(end)).astype(dtype) if end is not None else None
+        result = []
+        for a, b in bounds:
+            block = self._dates[a:b]
+            i = a + int(np.searchsorted(block, lo, side='left')) if lo is not None else a
+            j = a + int(np.searchsorted(block, hi, side='right')) if hi is not None else b
+            if j > i:
+                result.append((i, j))
+        return result
+
+    def view(self, stores=None, start=None, end=None):
+        """
+        Rows matching the store and date filters.
+        No filter returns the sorted frame itself and a single contiguous range
+        returns a slice of it, both without copying. Several ranges gather only
+        the selected rows.
+        """
+        if (stores is None or len(stores) == 0) and start is None and end is None:
+            return self.frame
+        bounds = self.ranges(stores, start, end)
+        if len(bounds) == 1:
+            a, b = bounds[0]
+            return self.frame.iloc[a:b]
+        if not bounds:
+            return self.frame.iloc[0:0]
+        positions = np.concatenate([np.arange(a, b) for a, b in bounds])
+        return self.frame.take(positions)
+
+
+class TopSalesIndex:
+    """Per-store weekly sales sorted in descending order, stored as contiguous blocks."""
+
+    def __init__(self, stores, offsets, sales, dates, holiday=None):
+        self.stores = np.asarray(stores)
+        self.offsets = np.asarray(offsets)
+        self.sales = np.asarray(sales)
+        self.dates = np.asarray(dates)
+        self.holiday = None if holiday is None else np.asarray(holiday)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the index from a DataFrame with Store, Date and Weekly_Sales columns."""
+        cols = ['Store', 'Date', 'Weekly_Sales'] + (['Holiday_Flag'] if 'Holiday_Flag' in df.columns else [])
+        data = df[cols].dropna(subset=['Store', 'Date', 'Weekly_Sales'])
+        store_col = data['Store'].to_numpy()
+        sales = data['Weekly_Sales'].to_numpy(dtype=float)
+        # Sort by store, then by sales descending within each store
+        order = np.lexsort((-sales, store_col))
+        store_col = store_col[order]
+        stores, starts = np.unique(store_col, return_index=True)
+        offsets = np.append(starts, len(store_col))
+        holiday = data['Holiday_Flag'].to_numpy()[order] if 'Holiday_Flag' in data.columns else None
+        return cls(stores, offsets, sales[order], data['Date'].to_numpy()[order], holiday)
+
+    def query(self, n, stores=None, start=None, end=None, holiday=None):
+        """
+        Top `n` weekly sales events, optionally limited to `stores`, to dates
+        between `start` and `end` (inclusive) and to holiday (1) or non-holiday
+        (0) weeks.
+
+        Without a date or holiday filter each selected store's best week goes on
+        a heap; popping the heap yields the global maximum and advances that
+        store's cursor, so the cost is O(n log stores). With a filter the
+        selected stores' rows are masked in one vectorized pass and the n
+        largest are picked with argpartition.
+        Returns a DataFrame with Date, Store and Weekly_Sales.
+        """
+        if stores is None or len(stores) == 0:
+            positions = np.arange(len(self.stores))
+        else:
+            positions = np.flatnonzero(np.isin(self.stores, np.asarray(stores)))
+
+        if start is None and end is None and holiday is None:
+            picked = self._merge_heads(n, positions)
+        else:
+            picked = self._filtered_top(n, positions, start, end, holiday)
+
+        store_of_row = self.stores[np.searchsorted(self.offsets, picked, side='right') - 1]
+        return pd.DataFrame({
+            'Date': self.dates[picked],
+            'Store': store_of_row,
+            'Weekly_Sales': self.sales[picked],
+        })
+
+    def _merge_heads(self, n, positions):
+        """Row numbers of the n largest sales across the given stores' sorted blocks."""
+        heap = [(-self.sales[self.offsets[p]], self.offsets[p], self.offsets[p + 1])
+                for p in positions if self.offsets[p] < self.offsets[p + 1]]
+        heapq.heapify(heap)
+        picked = []
+        while heap and len(picked) < n:
+            _, i, stop = heapq.heappop(heap)
+            picked.append(i)
+            if i + 1 < stop:
+                heapq.heappush(heap, (-self.sales[i + 1], i + 1, stop))
+        return np.asarray(picked, dtype=np.int64)
+
+    def _filtered_top(self, n, positions, start, end, holiday):
+        """Row numbers of the n largest sales of the given stores within the date/holiday filter."""
+        if len(positions) == len(self.stores):
+            rows = np.arange(len(self.sales))
+        elif len(positions):
+            rows = np.concatenate([np.arange(self.offsets[p], self.offsets[p + 1]) for p in positions])
+        else:
+            rows = np.zeros(0, dtype=np.int64)
+        keep = np.ones(len(rows), dtype=bool)
+        dates = self.dates[rows]
+        if start is not None:
+            keep &= dates >= np.datetime64(pd.Timestamp(start)).astype(self.dates.dtype)
+        if end is not None:
+            keep &= dates <= np.datetime64(pd.Timestamp(end)).astype(self.dates.dtype)
+        if holiday is not None and self.holiday is not None:
+            keep &= self.holiday[rows] == holiday
+        rows = rows[keep]
+        if len(rows) > n:
+            rows = rows[np.argpartition(-self.sales[rows], n - 1)[:n]] if n > 0 else rows[:0]
+        # Highest sales first; ties keep index order (store, then the block's order)
+        return rows[np.lexsort((rows, -self.sales[rows]))]
+
+
+@perf.cache_resource(show_spinner=False)
+def _build_top_sales_index(data_version):
+    return TopSalesIndex.from_frame(get_data())
+
+
+def get_top_sales_index():
+    """Return the TopSalesIndex for the current data version (built once per version)."""
+    return _build_top_sales_index(get_data_version())
+
+
+@perf.cache_resource(show_spinner=False)
+def _build_store_date_index(data_version):
+    return StoreDateIndex(get_data())
+
+
+def get_store_date_index():
+    """Return the StoreDateIndex for the current data version (built once per version)."""
+    return _build_store_date_index(get_data_version())
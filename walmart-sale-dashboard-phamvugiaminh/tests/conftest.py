@@ -0,0 +1,38 @@
+"""
+Shared fixtures: a small synthetic sales table with gaps and department rows.
+
+The app modules import each other by bare name (run from the app folder), so
+the app folder is put on sys.path here.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def sales():
+    """
+    Long sales table for 6 stores over 60 Friday weeks with some store-weeks
+    missing, a few NaN sales and a second department row for store 3.
+    """
+    rng = np.random.default_rng(7)
+    dates = pd.date_range("2011-01-07", periods=60, freq="W-FRI")
+    stores = [1, 2, 3, 5, 8, 13]
+    df = pd.DataFrame({
+        'Store': np.repeat(stores, len(dates)),
+        'Date': np.tile(dates, len(stores)),
+    })
+    n = len(df)
+    df['Weekly_Sales'] = rng.gamma(4.0, 250_000.0, n).round(2)
+    df['Holiday_Flag'] = (df['Date'].dt.month == 12).astype(int)
+    df['Temperature'] = rng.normal(60, 15, n)
+    df['Climate_Group'] = np.repeat(['Cold', 'Warm', 'Cold', 'Hot', 'Warm', 'Hot'], len(dates))
+    df = df.drop(index=rng.choice(n, 25, replace=False))
+    df.loc[df.sample(8, random_state=1).index, 'Weekly_Sales'] = np.nan
+    extra = df[df['Store'] == 3].sample(10, random_state=2).assign(Weekly_Sales=lambda d: d['Weekly_Sales'] / 3)
+    return pd.concat([df, extra]).sample(frac=1, random_state=3).reset_index(drop=True)
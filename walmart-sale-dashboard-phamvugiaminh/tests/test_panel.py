@@ -0,0 +1,85 @@
+"""SalesPanel tensor operations checked against plain pandas on the long table."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from panel import SalesPanel
+
+
+def _pivot(df, feature, aggfunc):
+    """(stores, weeks) frame of one feature over every store and week in df."""
+    grouped = df.groupby(['Store', 'Date'])[feature]
+    cells = grouped.sum(min_count=1) if aggfunc == 'sum' else grouped.mean()
+    full = pd.MultiIndex.from_product([np.sort(df['Store'].unique()), np.sort(df['Date'].unique())],
+                                      names=['Store', 'Date'])
+    return cells.reindex(full).unstack()
+
+
+@pytest.fixture
+def panel(sales):
+    return SalesPanel.from_frame(sales)
+
+
+def test_from_frame_sums_sales_and_averages_other_features(sales, panel):
+    assert panel.features == ['Weekly_Sales', 'Holiday_Flag', 'Temperature']
+    np.testing.assert_allclose(panel.feature('Weekly_Sales'), _pivot(sales, 'Weekly_Sales', 'sum').to_numpy())
+    np.testing.assert_allclose(panel.feature('Temperature'), _pivot(sales, 'Temperature', 'mean').to_numpy())
+    assert panel.store_position(13) == 5
+    assert panel.date_position("2011-01-08") == 1
+
+
+def test_week_over_week_and_year_over_year_deltas(sales, panel):
+    wide = _pivot(sales, 'Weekly_Sales', 'sum')
+    np.testing.assert_allclose(panel.wow_delta('Weekly_Sales'), (wide - wide.shift(1, axis=1)).to_numpy())
+    yoy = wide.pct_change(52, axis=1, fill_method=None)
+    np.testing.assert_allclose(panel.yoy_delta('Weekly_Sales', pct=True), yoy.to_numpy())
+    np.testing.assert_allclose(panel.lead('Weekly_Sales', 2), wide.shift(-2, axis=1).to_numpy())
+
+
+def test_rank_and_normalize_match_pandas(sales, panel):
+    wide = _pivot(sales, 'Weekly_Sales', 'sum')
+    np.testing.assert_allclose(panel.rank('Weekly_Sales'), wide.rank(axis=0, ascending=False).to_numpy())
+    zscore = wide.sub(wide.mean(axis=1), axis=0).div(wide.std(axis=1, ddof=0), axis=0)
+    np.testing.assert_allclose(panel.normalize('Weekly_Sales'), zscore.to_numpy())
+    with pytest.raises(ValueError):
+        panel.normalize('Weekly_Sales', method='median')
+
+
+def test_aggregations_match_groupby(sales, panel):
+    totals = sales.groupby('Date')['Weekly_Sales'].sum(min_count=1)
+    np.testing.assert_allclose(panel.total_by_week('Weekly_Sales'), totals.to_numpy())
+
+    store_weeks = _pivot(sales, 'Weekly_Sales', 'sum').stack().rename('Weekly_Sales').reset_index()
+    holiday = panel.holiday_mask()
+    expected = store_weeks[store_weeks['Date'].dt.month == 12].groupby('Store')['Weekly_Sales'].mean()
+    np.testing.assert_allclose(panel.mean_by_store('Weekly_Sales', holiday), expected.to_numpy())
+    assert panel.mean_where('Weekly_Sales', ~holiday) == pytest.approx(
+        store_weeks.loc[store_weeks['Date'].dt.month != 12, 'Weekly_Sales'].mean())
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2011-01-07", "2012-02-24"),   # whole range
+    ("2011-03-01", "2011-06-30"),   # bounds between weeks
+    ("2011-12-02", "2011-12-02"),   # single week
+    ("2013-01-01", "2013-06-30"),   # after the data
+])
+def test_window_prefix_sums_match_filtered_groupby(sales, panel, start, end):
+    store_weeks = sales.groupby(['Store', 'Date'])['Weekly_Sales'].sum(min_count=1).reset_index()
+    inside = store_weeks[store_weeks['Date'].between(pd.Timestamp(start), pd.Timestamp(end))]
+    grouped = inside.groupby('Store')['Weekly_Sales']
+    stores = panel.stores
+    np.testing.assert_allclose(panel.window_sum('Weekly_Sales', start, end),
+                               grouped.sum().reindex(stores, fill_value=0.0).to_numpy())
+    np.testing.assert_array_equal(panel.window_count('Weekly_Sales', start, end),
+                                  grouped.count().reindex(stores, fill_value=0).to_numpy())
+    np.testing.assert_allclose(panel.window_mean('Weekly_Sales', start, end),
+                               grouped.mean().reindex(stores).to_numpy())
+
+
+def test_subset_restricts_stores_weeks_and_holidays(sales, panel):
+    sub = panel.subset(stores=[2, 13], start="2011-11-01", end="2011-12-31", holiday=1)
+    assert sub.stores.tolist() == [2, 13]
+    assert pd.DatetimeIndex(sub.dates).month.isin([11, 12]).all()
+    expected = sales[sales['Store'].isin([2, 13]) & (sales['Date'].dt.month == 12)
+                     & sales['Date'].between("2011-11-01", "2011-12-31")]
+    assert np.nansum(sub.feature('Weekly_Sales')) == pytest.approx(expected['Weekly_Sales'].sum())
@@ -0,0 +1,53 @@
+"""TopSalesIndex and StoreDateIndex checked against boolean masks over the long table."""
+import pandas as pd
+import pytest
+
+from sales_index import StoreDateIndex, TopSalesIndex
+
+
+def _filtered(df, stores=None, start=None, end=None):
+    mask = pd.Series(True, index=df.index)
+    if stores:
+        mask &= df['Store'].isin(stores)
+    if start is not None:
+        mask &= df['Date'] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df['Date'] <= pd.Timestamp(end)
+    return df[mask]
+
+
+@pytest.mark.parametrize("n, stores, start, end, holiday", [
+    (10, None, None, None, None),
+    (5, [3, 8], None, None, None),
+    (7, None, "2011-06-01", "2011-09-30", None),
+    (4, [1, 2, 13], "2011-02-01", "2012-01-31", 1),
+    (500, [5], None, None, 0),   # more than the store has
+    (3, [99], None, None, None),  # unknown store
+])
+def test_top_sales_query_matches_nlargest(sales, n, stores, start, end, holiday):
+    index = TopSalesIndex.from_frame(sales)
+    expected = _filtered(sales.dropna(subset=['Weekly_Sales']), stores, start, end)
+    if holiday is not None:
+        expected = expected[expected['Holiday_Flag'] == holiday]
+    expected = expected.nlargest(n, 'Weekly_Sales')
+
+    result = index.query(n, stores=stores, start=start, end=end, holiday=holiday)
+    assert result['Weekly_Sales'].tolist() == expected['Weekly_Sales'].tolist()
+    assert result['Store'].tolist() == expected['Store'].tolist()
+    assert result['Date'].tolist() == expected['Date'].tolist()
+
+
+@pytest.mark.parametrize("stores, start, end", [
+    (None, None, None),
+    ([8], None, None),
+    ([13, 1, 1], "2011-04-01", None),
+    (None, None, "2011-03-31"),
+    ([2, 3, 5], "2011-05-06", "2011-05-06"),
+    ([99], None, None),
+])
+def test_store_date_view_matches_boolean_mask(sales, stores, start, end):
+    index = StoreDateIndex(sales)
+    expected = _filtered(sales, stores, start, end).sort_values(['Store', 'Date'], kind='stable')
+    pd.testing.assert_frame_equal(index.view(stores, start, end).reset_index(drop=True),
+                                  expected.reset_index(drop=True))
+
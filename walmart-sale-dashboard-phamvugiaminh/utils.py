@@ -1,28 +1,54 @@
-import pandas as pd
+import importlib.util
 import os
 
+import pandas as pd
+
 # Lấy đường dẫn tuyệt đối của thư mục chứa file này
 _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 _DATA_DIR = os.path.join(_BASE_DIR, "data")
 
 
-def get_data():
+def get_data_path():
     """
-    Load processed data with climate groups.
-    Returns DataFrame with cleaned/processed Walmart sales data including Climate_Group column.
+    Resolve the file that get_data() reads.
+    The WALMART_DATA_PATH environment variable overrides the bundled files (used
+    by the benchmarks to point the app at synthetic data); otherwise prefers the
+    processed file with climate groups, then cleaned data, then raw data.
     """
+    override = os.environ.get("WALMART_DATA_PATH")
+    if override:
+        return override
     # Ưu tiên file đã xử lý với climate
     processed_path = os.path.join(_DATA_DIR, "Walmart_Sales_processed_with_climate.csv")
     if os.path.exists(processed_path):
-        df = pd.read_csv(processed_path)
-    else:
-        # Fallback to cleaned data
-        cleaned_path = os.path.join(_DATA_DIR, "Walmart_Sales_cleaned.csv")
-        if os.path.exists(cleaned_path):
-            df = pd.read_csv(cleaned_path)
-        else:
-            # Last resort: raw data
-            df = pd.read_csv(os.path.join(_DATA_DIR, "Walmart_Sales.csv"))
+        return processed_path
+    # Fallback to cleaned data
+    cleaned_path = os.path.join(_DATA_DIR, "Walmart_Sales_cleaned.csv")
+    if os.path.exists(cleaned_path):
+        return cleaned_path
+    # Last resort: raw data
+    return os.path.join(_DATA_DIR, "Walmart_Sales.csv")
+
+
+def get_data_version():
+    """
+    Identify the current version of the dataset read by get_data().
+    Returns a short string built from the file name, size and modification time,
+    so caches keyed on it are invalidated whenever the data file changes.
+    """
+    path = get_data_path()
+    stat = os.stat(path)
+    return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def get_data():
+    """
+    Load processed data with climate groups.
+    Returns DataFrame with cleaned/processed Walmart sales data including Climate_Group column.
+    """
+    path = get_data_path()
+    # Large synthetic datasets (generate_data.py) are usually written as Parquet
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
     
     # Parse Date column to datetime
     if 'Date' in df.columns:
@@ -45,3 +71,12 @@ def get_raw_data():
     
     return df
 
+
+def has_modules(*names):
+    """
+    Check that optional top-level packages are installed without importing them.
+    Pages decide what to render with this and import heavy libraries
+    (matplotlib, seaborn, scipy, sklearn, shap) only where they are used,
+    so a cold page load does not pay for code the user never reaches.
+    """
+    return all(importlib.util.find_spec(name) is not None for name in names)